@@ -7,7 +7,7 @@ import time
 from argparse import ArgumentParser
 from configparser import ConfigParser, NoOptionError
 
-from pyrimaa import aei, board
+from pyrimaa import aei, board, book, solver
 
 log = logging.getLogger("analyze")
 
@@ -72,14 +72,36 @@ def get_config(args=None):
         action="store_false",
         help="Allow incomplete or otherwise illegal setup moves",
     )
+    parser.add_argument(
+        "--solve",
+        type=int,
+        metavar="MOVES",
+        help="Use the built in solver instead of an engine to look for a "
+        "forced win within MOVES moves of the side to move",
+    )
+    parser.add_argument(
+        "--solve-nodes", type=int, help="Stop the solver after this many positions"
+    )
+    parser.add_argument(
+        "--solve-time", type=float, help="Stop the solver after this many seconds"
+    )
+    parser.add_argument(
+        "--book",
+        metavar="BOOKFILE",
+        help="List the moves for the position in an opening book instead of "
+        "running an engine",
+    )
     parser.add_argument("position_file", help="File with board or move list")
     parser.add_argument("move_number", help="Move to analyze", nargs="?")
     args = parser.parse_args(args)
 
     config = ConfigParser()
     if config.read(args.config) != [args.config]:
-        print(f"Could not open '{args.config}'")
-        sys.exit(1)
+        if args.solve is None and args.book is None:
+            print(f"Could not open '{args.config}'")
+            sys.exit(1)
+    if not config.has_section("global"):
+        config.add_section("global")
     try:
         loglevel = config.get("global", "log_level")
     except NoOptionError:
@@ -106,6 +128,13 @@ def get_config(args=None):
         args.search_position = config.getboolean("global", "search_position")
     except NoOptionError:
         args.search_position = True
+    if args.solve is not None:
+        if args.solve < 1:
+            print("Solve needs at least 1 move")
+            sys.exit(1)
+        return args
+    if args.book is not None:
+        return args
     if args.bot is None:
         args.bot = config.get("global", "default_engine")
     cfg_sections = config.sections()
@@ -143,6 +172,36 @@ def get_config(args=None):
     return args
 
 
+def solve_position(pos, cfg):
+    """Look for a forced win with the built in solver"""
+    print(pos.board_to_str())
+    search = solver.Solver(max_nodes=cfg.solve_nodes, max_time=cfg.solve_time)
+    result = search.solve(pos, cfg.solve)
+    print(
+        f"solve {result['result']} in {cfg.solve} moves, {result['nodes']} nodes "
+        f"{result['seconds']:.3f}s {result['nps']:.0f} nodes/s"
+    )
+    if result["move"] is not None:
+        print(f"bestmove: {pos.steps_to_str(result['move'])}")
+    return 0
+
+
+def lookup_book(pos, cfg):
+    """List the moves for the position found in an opening book"""
+    print(pos.board_to_str())
+    try:
+        opening_book = book.Book(cfg.book)
+    except (OSError, ValueError) as exc:
+        print(f"Could not open book: {exc}")
+        return 1
+    with opening_book:
+        moves = opening_book.lookup(pos)
+    print(f"book {len(moves)} moves")
+    for move_str, weight, games, wins in moves:
+        print(f"{move_str}: weight {weight}, won {wins} of {games} games")
+    return 0
+
+
 def main(args=None):
     try:
         cfg = get_config(args)
@@ -166,6 +225,27 @@ def main(args=None):
         else:
             print("Disabling full legality checking on setup")
 
+    if have_board:
+        pos = start
+    else:
+        pos = board.Position(board.Color.GOLD, 4, board.BLANK_BOARD)
+        for mnum, full_move in enumerate(start):
+            move = full_move[3:]
+            if mnum < 2 and cfg.strict_setup is not None:
+                do_checks = cfg.strict_setup
+            else:
+                do_checks = cfg.strict_checks
+            try:
+                pos = pos.do_move_str(move, do_checks)
+            except board.IllegalMove as exc:
+                print(f'Illegal move found "{full_move}", {exc}')
+                return 1
+
+    if cfg.solve is not None:
+        return solve_position(pos, cfg)
+    if cfg.book is not None:
+        return lookup_book(pos, cfg)
+
     eng_com = aei.get_engine(cfg.com_method, cfg.enginecmd, "analyze.aei")
     try:
         eng = aei.EngineController(eng_com)
@@ -180,22 +260,10 @@ def main(args=None):
 
         eng.newgame()
         if have_board:
-            pos = start
             eng.setposition(pos)
         else:
-            pos = board.Position(board.Color.GOLD, 4, board.BLANK_BOARD)
-            for mnum, full_move in enumerate(start):
-                move = full_move[3:]
-                if mnum < 2 and cfg.strict_setup is not None:
-                    do_checks = cfg.strict_setup
-                else:
-                    do_checks = cfg.strict_checks
-                try:
-                    pos = pos.do_move_str(move, do_checks)
-                except board.IllegalMove as exc:
-                    print(f'Illegal move found "{full_move}", {exc}')
-                    return 1
-                eng.makemove(move)
+            for full_move in start:
+                eng.makemove(full_move[3:])
         print(pos.board_to_str())
 
         for option, value in cfg.post_options:
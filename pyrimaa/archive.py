@@ -0,0 +1,511 @@
+#!/usr/bin/env python
+"""Compact binary archive of game records with random access
+
+An archive holds the same games as the PGN that roundrobin writes, tags,
+numbered move lines and result, and converts back to exactly that text.
+Each step, capture or placement of a move is a 16 bit word, so a game takes
+less than half the space of its text. Games are added in segments, each
+ending with a table of the tag names and values not seen before and an
+index with the offset, move count and result of its games, so adding games
+does not rewrite those already in the archive. The header points to the
+last segment and the segments are read in when the archive is opened, after
+which any game is found without reading the ones before it and its moves
+are only decoded as they are iterated.
+
+A move word has the square in bits 0-5, the piece in bits 6-9, the
+direction of a step in bits 10-11, the kind of token in bits 12-13 and bit
+14 set on the last token of the move. A move that is not made of step,
+capture and placement tokens separated by single spaces is stored as its
+text instead, a word of the raw kind with the length in bytes followed by
+the bytes padded to a whole word.
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+from argparse import ArgumentParser
+
+from pyrimaa import pgn
+from pyrimaa.board import SQUARE_NAMES, Piece
+
+MAGIC = b"AEIARCH\x00"
+VERSION = 2
+
+# magic, version, games, strings, offset of the last segment or 0, end offset
+_HEADER = struct.Struct("<8sI4Q")
+# offset of the segment before or 0, games, strings, string table offset,
+# index offset
+_SEGMENT = struct.Struct("<5Q")
+_LENGTH = struct.Struct("<I")
+# data offset, words, moves, tags, first move number, first side, winner or
+# -1 when not known, reason code or 0, side letters
+_GAME = struct.Struct("<QIHHHBbB2s")
+# tag name and value string numbers
+_TAG = struct.Struct("<II")
+
+_STEP = 0
+_CAPTURE = 1
+_PLACE = 2
+_RAW = 3
+_KIND_SHIFT = 12
+_LAST = 1 << 14
+_MAX_RAW = 0xFFF
+# largest count of moves or tags and first move number of a game
+_MAX_FIELD = 0xFFFF
+
+_DIRECTIONS = "nsew"
+_SIDES = ("gs", "wb")
+_LABEL = re.compile(r"([1-9][0-9]*|0)([gswb])$")
+
+
+def _token_codes():
+    codes = {}
+    for piece in range(Piece.GRABBIT, Piece.COUNT):
+        pchar = Piece.PCHARS[piece]
+        if pchar == "x":
+            continue
+        for index, square in enumerate(SQUARE_NAMES):
+            base = piece << 6 | index
+            codes[pchar + square] = _PLACE << _KIND_SHIFT | base
+            codes[pchar + square + "x"] = _CAPTURE << _KIND_SHIFT | base
+            for dnum, dchar in enumerate(_DIRECTIONS):
+                codes[pchar + square + dchar] = _STEP << _KIND_SHIFT | dnum << 10 | base
+    return codes
+
+
+_TOKEN_CODES = _token_codes()
+_TOKENS = {code: token for token, code in _TOKEN_CODES.items()}
+
+
+def encode_move(move_str):
+    """Encode the text of a move, without its number, as a list of words"""
+    try:
+        words = [_TOKEN_CODES[token] for token in move_str.split(" ")]
+    except KeyError:
+        data = move_str.encode("utf-8")
+        if len(data) > _MAX_RAW:
+            raise ValueError(f"Move too long to archive, {len(data)} bytes") from None
+        words = [_RAW << _KIND_SHIFT | _LAST | len(data)]
+        if len(data) % 2:
+            data += b"\x00"
+        words.extend(struct.unpack(f"<{len(data) // 2}H", data))
+        return words
+    words[-1] |= _LAST
+    return words
+
+
+def decode_moves(words):
+    """Yield the text of each move in a sequence of words"""
+    tokens = []
+    pos = 0
+    while pos < len(words):
+        word = words[pos]
+        pos += 1
+        if word >> _KIND_SHIFT & 3 == _RAW:
+            length = word & _MAX_RAW
+            count = (length + 1) // 2
+            data = struct.pack(f"<{count}H", *words[pos : pos + count])
+            pos += count
+            yield data[:length].decode("utf-8")
+            continue
+        tokens.append(_TOKENS[word & ~_LAST])
+        if word & _LAST:
+            yield " ".join(tokens)
+            tokens = []
+
+
+def _parse_labels(moves):
+    """Split numbered move lines into the move texts and numbering
+
+    Returns (move texts, first move number, first side, side letters).
+    Raises ValueError if the numbers do not follow on from the first.
+    """
+    if not moves:
+        return ([], 0, 0, _SIDES[0])
+    texts = []
+    label, _, text = moves[0].partition(" ")
+    match = _LABEL.match(label)
+    if match is None:
+        raise ValueError(f"Invalid move number in {moves[0]!r}")
+    number = first_number = int(match.group(1))
+    sides = _SIDES[0] if match.group(2) in _SIDES[0] else _SIDES[1]
+    side = first_side = sides.index(match.group(2))
+    for line in moves:
+        label, _, text = line.partition(" ")
+        if label != f"{number}{sides[side]}":
+            raise ValueError(f"Move number out of sequence in {line!r}")
+        texts.append(text)
+        if side:
+            number += 1
+        side ^= 1
+    return (texts, first_number, first_side, sides)
+
+
+class ArchiveWriter:
+    """Write games to an archive file
+
+    With append set the games are added to those in an existing archive,
+    otherwise the file is replaced. Games are written as they are added and
+    become part of the archive when flush or close writes their index after
+    them, so flush after each game to keep the archive up to date while it
+    grows. Nothing already in the file is changed apart from the header, so
+    a writer stopped part way leaves the archive as it was at the last
+    flush.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self._strings = []
+        self._string_ids = {}
+        self._flushed_strings = 0
+        self._games = 0
+        self._pending = []
+        self._last_segment = 0
+        if append and os.path.exists(path) and os.path.getsize(path):
+            with GameArchive(path) as archive:
+                for string in archive._strings:
+                    self._string_id(string)
+                self._flushed_strings = len(self._strings)
+                self._games = len(archive)
+                self._last_segment = archive._last_segment
+                self._end = archive._end
+            self._file = open(path, "r+b")
+            # drop anything written after the last flush
+            self._file.truncate(self._end)
+        else:
+            self._file = open(path, "wb")
+            self._end = _HEADER.size
+            self._write_header()
+
+    def __len__(self):
+        return self._games + len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string_id(self, string):
+        sid = self._string_ids.get(string)
+        if sid is None:
+            sid = self._string_ids[string] = len(self._strings)
+            self._strings.append(string)
+        return sid
+
+    def _write_header(self):
+        self._file.seek(0)
+        self._file.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                self._games,
+                self._flushed_strings,
+                self._last_segment,
+                self._end,
+            )
+        )
+        self._file.flush()
+
+    def add_game(self, tags, moves):
+        """Add a game
+
+        tags is a sequence of (name, value) pairs and moves the numbered move
+        lines, as read by pgn.read_records or kept in Game.moves. The winner
+        is taken from the "Result" tag and the reason from "ResultCode".
+        """
+        texts, number, side, sides = _parse_labels(moves)
+        if len(texts) > _MAX_FIELD or number > _MAX_FIELD:
+            raise ValueError(
+                f"Game too long to archive, {len(texts)} moves from move {number}"
+            )
+        if len(tags) > _MAX_FIELD:
+            raise ValueError(f"Too many tags to archive, {len(tags)}")
+        words = []
+        for text in texts:
+            words.extend(encode_move(text))
+        tag_data = b"".join(
+            _TAG.pack(self._string_id(name), self._string_id(value))
+            for name, value in tags
+        )
+        tag_values = dict(tags)
+        winner = pgn.RESULTS.get(tag_values.get("Result"), -1)
+        reason = tag_values.get("ResultCode", "")
+        reason = ord(reason) if len(reason) == 1 and reason.isascii() else 0
+        self._file.seek(self._end)
+        self._file.write(tag_data)
+        self._file.write(struct.pack(f"<{len(words)}H", *words))
+        self._pending.append(
+            _GAME.pack(
+                self._end,
+                len(words),
+                len(texts),
+                len(tags),
+                number,
+                side,
+                winner,
+                reason,
+                sides.encode("ascii"),
+            )
+        )
+        self._end = self._file.tell()
+
+    def flush(self):
+        """Add the games written since the last flush to the archive
+
+        Their index and any new tag strings are written after them as a
+        segment that points back to the one before, then the header is
+        changed to point to it.
+        """
+        if not self._pending:
+            self._file.flush()
+            return
+        self._file.seek(self._end)
+        string_offset = self._end
+        strings = self._strings[self._flushed_strings :]
+        for string in strings:
+            data = string.encode("utf-8")
+            self._file.write(_LENGTH.pack(len(data)))
+            self._file.write(data)
+        index_offset = self._file.tell()
+        self._file.write(b"".join(self._pending))
+        segment_offset = self._file.tell()
+        self._file.write(
+            _SEGMENT.pack(
+                self._last_segment,
+                len(self._pending),
+                len(strings),
+                string_offset,
+                index_offset,
+            )
+        )
+        self._file.flush()
+        self._end = self._file.tell()
+        self._games += len(self._pending)
+        self._flushed_strings = len(self._strings)
+        self._last_segment = segment_offset
+        self._pending = []
+        self._write_header()
+
+    def close(self):
+        if not self._file.closed:
+            try:
+                self.flush()
+            finally:
+                self._file.close()
+
+
+class GameArchive:
+    """An archive file mapped into memory for reading
+
+    Games are numbered from 0 in the order they were added. Raises
+    ValueError if the file is not an archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file can not be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a game archive") from None
+        try:
+            self._read_index()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_index(self):
+        path = self.path
+        archive_map = self._map
+        if len(archive_map) < _HEADER.size:
+            raise ValueError(f"{path} is not a game archive")
+        magic, version, games, strings, last_segment, end = _HEADER.unpack_from(
+            archive_map
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a game archive")
+        if version != VERSION:
+            raise ValueError(f"{path} is archive version {version} not {VERSION}")
+        # anything after the end was written after the last flush
+        if len(archive_map) < end:
+            raise ValueError(f"{path} is truncated")
+        segments = []
+        offset = last_segment
+        while offset:
+            if offset + _SEGMENT.size > end:
+                raise ValueError(f"{path} is corrupt")
+            segment = _SEGMENT.unpack_from(archive_map, offset)
+            if segment[0] >= offset:
+                raise ValueError(f"{path} is corrupt")
+            segments.append(segment)
+            offset = segment[0]
+        segments.reverse()
+        if (
+            sum(segment[1] for segment in segments) != games
+            or sum(segment[2] for segment in segments) != strings
+        ):
+            raise ValueError(f"{path} is corrupt")
+        self._games = games
+        self._last_segment = last_segment
+        self._end = end
+        self._strings = []
+        for _, _, count, offset, _ in segments:
+            for _ in range(count):
+                (length,) = _LENGTH.unpack_from(archive_map, offset)
+                offset += _LENGTH.size
+                self._strings.append(
+                    archive_map[offset : offset + length].decode("utf-8")
+                )
+                offset += length
+        if len(segments) == 1:
+            self._index = archive_map
+            self._index_offset = segments[0][4]
+        else:
+            # the index of every segment in one table for lookups by number
+            self._index = b"".join(
+                archive_map[offset : offset + count * _GAME.size]
+                for _, count, _, _, offset in segments
+            )
+            self._index_offset = 0
+
+    def __len__(self):
+        return self._games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, num):
+        """The (tags, numbered move lines) of a game"""
+        if num < 0:
+            num += self._games
+        return (self.tags(num), list(self.moves(num)))
+
+    def __iter__(self):
+        for num in range(self._games):
+            yield self[num]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _game_record(self, num):
+        if not 0 <= num < self._games:
+            raise IndexError(f"No game {num} in the archive")
+        return _GAME.unpack_from(self._index, self._index_offset + num * _GAME.size)
+
+    def tags(self, num):
+        """The tags of a game as a list of (name, value) pairs"""
+        offset, _, _, tags = self._game_record(num)[:4]
+        strings = self._strings
+        return [
+            (strings[name], strings[value])
+            for name, value in _TAG.iter_unpack(
+                self._map[offset : offset + tags * _TAG.size]
+            )
+        ]
+
+    def result(self, num):
+        """The (winning Color, reason) of a game, each None if not known"""
+        winner, reason = self._game_record(num)[6:8]
+        return (
+            None if winner < 0 else winner,
+            chr(reason) if reason else None,
+        )
+
+    def moves(self, num):
+        """Yield the numbered move lines of a game, such as "2g Ee2n Ee3n" """
+        offset, words, _, tags, number, side, _, _, sides = self._game_record(num)
+        sides = sides.decode("ascii")
+        words = struct.unpack_from(f"<{words}H", self._map, offset + tags * _TAG.size)
+        for text in decode_moves(words):
+            yield f"{number}{sides[side]} {text}"
+            if side:
+                number += 1
+            side ^= 1
+
+
+def pack_games(lines, path, append=False):
+    """Write the games in lines of PGN to an archive
+
+    Returns the number of games written.
+    """
+    with ArchiveWriter(path, append) as writer:
+        count = 0
+        for tags, moves in pgn.read_records(lines):
+            writer.add_game(tags, moves)
+            count += 1
+    return count
+
+
+def unpack_games(path, out):
+    """Write the games in an archive to a file as PGN
+
+    Returns the number of games written.
+    """
+    with GameArchive(path) as archive:
+        for tags, moves in archive:
+            pgn.write_game(out, tags, moves)
+        return len(archive)
+
+
+def main(args=None):
+    """Main entry point
+
+    Converts PGN files to an archive or an archive back to PGN.
+    """
+    parser = ArgumentParser(description="Convert games between PGN and archives")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+    pack = commands.add_parser(
+        "pack", help="Write the games in PGN files to an archive"
+    )
+    pack.add_argument(
+        "-a", "--append", action="store_true", help="Add to an existing archive"
+    )
+    pack.add_argument("archive", help="Archive file to write")
+    pack.add_argument("games", nargs="+", help="PGN files of games")
+    unpack = commands.add_parser("unpack", help="Write the games in an archive as PGN")
+    unpack.add_argument("archive", help="Archive file to read")
+    unpack.add_argument("output", nargs="?", help="PGN file to write, default stdout")
+    config = parser.parse_args(args)
+
+    if config.command == "pack":
+
+        def read_all():
+            for filename in config.games:
+                with open(filename) as game_file:
+                    yield from game_file
+
+        try:
+            count = pack_games(read_all(), config.archive, config.append)
+        except (OSError, ValueError) as exc:
+            print(f"Could not write archive: {exc}")
+            return 1
+        text_size = sum(os.path.getsize(filename) for filename in config.games)
+        size = os.path.getsize(config.archive)
+        print(f"Wrote {count} games to {config.archive}")
+        print(f"  {text_size} bytes of PGN in {size} bytes")
+        return 0
+
+    try:
+        if config.output is None:
+            unpack_games(config.archive, sys.stdout)
+        else:
+            with open(config.output, "w") as out:
+                unpack_games(config.archive, out)
+    except (OSError, ValueError) as exc:
+        print(f"Could not read archive: {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
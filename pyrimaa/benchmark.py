@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from argparse import ArgumentParser
+
+from pyrimaa import board, notation
+
+CROWDED_MIDGAME = """20g
+ +-----------------+
+8| r r . r r . r r |
+7| r d h . c h d r |
+6| . c x e m x . . |
+5| . H . D E . M . |
+4| . . C . . C . . |
+3| R . x H . x D R |
+2| R R . R R . R R |
+1| . . . . . . . . |
+ +-----------------+
+   a b c d e f g h""".splitlines()
+
+
+def _load_position(filename):
+    if filename is None:
+        return board.parse_long_pos(CROWDED_MIDGAME)[1]
+    with open(filename) as posfile:
+        return board.parse_pos_file(posfile.readlines())[1]
+
+
+def position_size(pos, count=10000):
+    """Measure the memory used per Position object
+
+    Creates count copies of the position by taking a step and measures the
+    newly allocated memory with tracemalloc.
+    """
+    step = next(pos.iter_steps())[0]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        positions = [pos.do_step(step) for _ in range(count)]
+        used = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    # remove the list holding the positions from the total
+    used -= sys.getsizeof(positions)
+    return used / count
+
+
+def bench_memory(pos, packed=False):
+    """Measure Position size and the memory needed by get_moves
+
+    get_moves is timed in one run and its memory measured with tracemalloc
+    in a second, so the tracing does not slow the timed run. Only the memory
+    allocated by get_moves is counted, the peak while it runs and what is
+    still held by the moves it returns.
+    """
+    result = {"bytes_per_position": position_size(pos), "packed": packed}
+    gc.collect()
+    start = time.perf_counter()
+    moves = pos.get_moves(packed=packed)
+    elapsed = time.perf_counter() - start
+    result["moves"] = len(moves)
+    result["seconds"] = elapsed
+    del moves
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        moves = pos.get_moves(packed=packed)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # the moves are kept until measured so what they hold is counted
+    del moves
+    result["peak_bytes"] = peak - before
+    result["moves_bytes"] = current - before
+    return result
+
+
+def bench_startup(module="pyrimaa.board", repeat=10):
+    """Time starting a new interpreter and importing a module
+
+    The time for starting the interpreter without the import is measured as
+    well so the cost of the import itself can be reported. The fastest of
+    repeat runs is used for each.
+    """
+
+    def fastest(code):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        return best
+
+    baseline = fastest("pass")
+    with_import = fastest(f"import {module}")
+    return {
+        "module": module,
+        "repeat": repeat,
+        "interpreter_seconds": baseline,
+        "startup_seconds": with_import,
+        "import_seconds": with_import - baseline,
+    }
+
+
+def _bit_to_index_cascade(bit):
+    """The mask and compare bit_to_index replaced by the bit_length version"""
+    cnt = (bit & 0xAAAAAAAAAAAAAAAA) != 0
+    cnt |= ((bit & 0xCCCCCCCCCCCCCCCC) != 0) << 1
+    cnt |= ((bit & 0xF0F0F0F0F0F0F0F0) != 0) << 2
+    cnt |= ((bit & 0xFF00FF00FF00FF00) != 0) << 3
+    cnt |= ((bit & 0xFFFF0000FFFF0000) != 0) << 4
+    cnt |= ((bit & 0xFFFFFFFF00000000) != 0) << 5
+    return cnt
+
+
+def bench_bits(pos, repeat=5, number=200):
+    """Time the bitboard primitives against the versions they replaced
+
+    Every primitive is run over the bitboards of the given position and the
+    fastest of repeat runs of number iterations is reported in seconds.
+    """
+    boards = [bits for bits in pos.bitBoards if bits]
+    squares = list(range(64))
+
+    def cascade_scan():
+        for bits in boards:
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                _bit_to_index_cascade(bit)
+
+    def bit_length_scan():
+        for bits in boards:
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                bit.bit_length() - 1
+
+    def iter_bits_scan():
+        bit_to_index = board.bit_to_index
+        for bits in boards:
+            for bit in board.iter_bits(bits):
+                bit_to_index(bit)
+
+    def bin_popcount():
+        for bits in boards:
+            bin(bits).count("1")
+
+    def popcount():
+        for bits in boards:
+            board.popcount(bits)
+
+    def neighbors_computed():
+        for ix in squares:
+            board.neighbors_of(1 << ix)
+
+    def neighbors_table():
+        for ix in squares:
+            board.SQUARE_NEIGHBORS[ix]
+
+    def index_to_alg_computed():
+        for ix in squares:
+            "abcdefgh"[ix % 8] + "12345678"[ix // 8]
+
+    def index_to_alg_table():
+        for ix in squares:
+            board.index_to_alg(ix)
+
+    result = {}
+    for func in (
+        cascade_scan,
+        bit_length_scan,
+        iter_bits_scan,
+        bin_popcount,
+        popcount,
+        neighbors_computed,
+        neighbors_table,
+        index_to_alg_computed,
+        index_to_alg_table,
+    ):
+        result[func.__name__] = min(timeit.repeat(func, repeat=repeat, number=number))
+    result["bit_scan_speedup"] = result["cascade_scan"] / result["bit_length_scan"]
+    return result
+
+
+def _random_games(count, seed, max_turns=60):
+    """Play random step games returning the moves of each as strings
+
+    Each game starts with the setup moves of both sides and is given as a
+    list of (position, move string) pairs.
+    """
+    rnd = random.Random(seed)
+    games = []
+    for _ in range(count):
+        pos = board.Position(board.Color.GOLD, 4, board.BLANK_BOARD)
+        setup = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        moves = []
+        for setup_str in setup.to_placing_move():
+            move_str = setup_str[2:]
+            moves.append((pos, move_str))
+            pos = pos.do_move_str(move_str)
+        for _ in range(max_turns):
+            if pos.is_goal() or pos.is_rabbit_loss():
+                break
+            steps, result = pos.get_rnd_step_move(rnd)
+            if steps is None:
+                break
+            moves.append((pos, pos.steps_to_str(steps)))
+            pos = result
+        games.append(moves)
+    return games
+
+
+def bench_notation(pos, games=20, seed=1, repeat=3):
+    """Throughput of move string decoding and encoding
+
+    Uses the moves of randomly played games and the moves from the given
+    position. Each result is the best of repeat runs in moves per second.
+    """
+    games = _random_games(games, seed)
+    moves = [move for game in games for move in game]
+    move_strs = [move_str for _, move_str in moves]
+    steps = [
+        (mpos, notation.decode_move(move_str)[1])
+        for mpos, move_str in moves
+        if notation.move_kind(move_str) == notation.MoveKind.STEPS
+    ]
+    pos_steps = list(pos.get_moves().values())
+
+    def decode_uncached():
+        decode = notation.decode_move.__wrapped__
+        for move_str in move_strs:
+            decode(move_str)
+
+    def decode_cached():
+        decode = notation.decode_move
+        for move_str in move_strs:
+            decode(move_str)
+
+    def encode():
+        for mpos, msteps in steps:
+            notation.encode_steps(mpos, msteps)
+
+    def encode_position():
+        for msteps in pos_steps:
+            notation.encode_steps(pos, msteps)
+
+    def encode_position_bulk():
+        notation.encode_moves(pos, pos_steps)
+
+    def replay():
+        for game in games:
+            gpos = game[0][0]
+            for _, move_str in game:
+                gpos = gpos.do_move_str(move_str)
+
+    result = {"moves": len(move_strs), "position_moves": len(pos_steps)}
+    for func, count in (
+        (decode_uncached, len(move_strs)),
+        (decode_cached, len(move_strs)),
+        (encode, len(steps)),
+        (encode_position, len(pos_steps)),
+        (encode_position_bulk, len(pos_steps)),
+        (replay, len(move_strs)),
+    ):
+        best = min(timeit.repeat(func, repeat=repeat, number=1))
+        result[func.__name__ + "_per_second"] = count / best
+    return result
+
+
+def _restart_step_move(pos, rnd):
+    """The random step move generation get_rnd_step_move replaced
+
+    Starts the whole move over from the beginning after reaching a dead end.
+    """
+    taken = []
+    deadends = set()
+    npos = pos
+    while npos.color == pos.color:
+        steps = npos.get_steps()
+        steps = [s for s in steps if s[1] not in deadends]
+        if npos.bitBoards != pos.bitBoards and not npos.inpush:
+            steps.append(((), npos.get_null_move()))
+        if npos.stepsLeft == 1:
+            steps = [s for s in steps if s[1].bitBoards != pos.bitBoards]
+        if len(steps) == 0:
+            if taken:
+                deadends.add(npos)
+                npos = pos
+                taken = []
+                continue
+            return (None, npos)
+        randstep = rnd.choice(steps)
+        taken.append(randstep[0])
+        npos = randstep[1]
+    if not taken[-1]:
+        taken = taken[:-1]
+    return (taken, npos)
+
+
+def bench_sampler(pos, samples=1000, uniform_samples=3, seed=1):
+    """Moves per second of the random move samplers
+
+    The sampler get_rnd_step_move replaced, get_rnd_step_move itself and
+    its uniform mode are each used to pick random moves from the position.
+    """
+    rnd = random.Random(seed)
+
+    def restart():
+        for _ in range(samples):
+            _restart_step_move(pos, rnd)
+
+    def backtrack():
+        for _ in range(samples):
+            pos.get_rnd_step_move(rnd)
+
+    def uniform():
+        for _ in range(uniform_samples):
+            pos.get_rnd_step_move(rnd, uniform=True)
+
+    result = {}
+    for func, count in (
+        (restart, samples),
+        (backtrack, samples),
+        (uniform, uniform_samples),
+    ):
+        start = time.perf_counter()
+        func()
+        result[func.__name__ + "_per_second"] = count / (time.perf_counter() - start)
+    return result
+
+
+def _report(name, result, as_json):
+    if as_json:
+        report = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "benchmark": name,
+            "results": result,
+        }
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for key, value in result.items():
+            if isinstance(value, float):
+                value = f"{value:.6g}"
+            print(f"{key}: {value}")
+
+
+def main(args=None):
+    """Main entry point
+
+    Runs one of the available benchmarks and reports the results.
+    """
+    parser = ArgumentParser(description="Benchmarks for the pyrimaa library")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    commands = parser.add_subparsers(dest="benchmark", metavar="benchmark")
+    commands.required = True
+    memory = commands.add_parser(
+        "memory", help="Position size and peak memory of get_moves"
+    )
+    memory.add_argument(
+        "--packed", action="store_true", help="Have get_moves return a MoveSet"
+    )
+    memory.add_argument(
+        "position",
+        nargs="?",
+        help="Position file to use, defaults to a crowded midgame position",
+    )
+    startup = commands.add_parser(
+        "startup", help="Time to start python and import a module"
+    )
+    startup.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=10,
+        help="Times to start python, the fastest time is reported",
+    )
+    startup.add_argument(
+        "module", nargs="?", default="pyrimaa.board", help="Module to import"
+    )
+    bits = commands.add_parser(
+        "bits", help="Bitboard primitives against the versions they replaced"
+    )
+    bits.add_argument(
+        "position",
+        nargs="?",
+        help="Position file to use, defaults to a crowded midgame position",
+    )
+    notation_cmd = commands.add_parser(
+        "notation", help="Move string decoding and encoding throughput"
+    )
+    notation_cmd.add_argument(
+        "-g", "--games", type=int, default=20, help="Random games to replay"
+    )
+    notation_cmd.add_argument(
+        "--seed", type=int, default=1, help="Seed for the random games"
+    )
+    notation_cmd.add_argument(
+        "position",
+        nargs="?",
+        help="Position file to use, defaults to a crowded midgame position",
+    )
+    sampler = commands.add_parser("sampler", help="Random move sampling speed")
+    sampler.add_argument(
+        "-n", "--samples", type=int, default=1000, help="Random step moves to sample"
+    )
+    sampler.add_argument(
+        "-u",
+        "--uniform-samples",
+        type=int,
+        default=3,
+        help="Uniformly random moves to sample",
+    )
+    sampler.add_argument("--seed", type=int, default=1, help="Random seed")
+    sampler.add_argument(
+        "position",
+        nargs="?",
+        help="Position file to use, defaults to a crowded midgame position",
+    )
+    config = parser.parse_args(args)
+
+    if config.benchmark == "memory":
+        pos = _load_position(config.position)
+        _report("memory", bench_memory(pos, config.packed), config.json)
+    elif config.benchmark == "bits":
+        pos = _load_position(config.position)
+        _report("bits", bench_bits(pos), config.json)
+    elif config.benchmark == "notation":
+        pos = _load_position(config.position)
+        result = bench_notation(pos, config.games, config.seed)
+        _report("notation", result, config.json)
+    elif config.benchmark == "sampler":
+        pos = _load_position(config.position)
+        result = bench_sampler(pos, config.samples, config.uniform_samples, config.seed)
+        _report("sampler", result, config.json)
+    elif config.benchmark == "startup":
+        if config.repeat < 1:
+            print("Repeat must be at least 1")
+            return 1
+        _report("startup", bench_startup(config.module, config.repeat), config.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,19 @@
 import math
 import random
+import struct
 import sys
-import time
-from argparse import ArgumentParser
+from array import array
+
+from pyrimaa.board_tables import (
+    INDEPENDENT_BEFORE,
+    MOVE_OFFSETS,
+    ZOBRIST_KEYS,
+    ZOBRIST_LAST_FROM,
+    ZOBRIST_LAST_PIECE,
+    ZOBRIST_PUSH,
+    ZOBRIST_SIDE,
+    ZOBRIST_STEPS,
+)
 
 
 class Color:
@@ -64,6 +75,9 @@ BASIC_SETUP = (
     0x0008000000000000,
 )
 
+# bitboards of the squares on each rank, first to eighth
+RANK_MASKS = tuple(0xFF << (rank * 8) for rank in range(8))
+
 BLANK_BOARD = (ALL_BITS, 0, 0, 0, 0, 0, 0, None, None, 0, 0, 0, 0, 0, 0)
 
 
@@ -77,21 +91,55 @@ def neighbors_of(bits):
 
 
 def bit_to_index(bit):
-    """get the index of a bit"""
-    cnt = (bit & 0xAAAAAAAAAAAAAAAA) != 0
-    cnt |= ((bit & 0xCCCCCCCCCCCCCCCC) != 0) << 1
-    cnt |= ((bit & 0xF0F0F0F0F0F0F0F0) != 0) << 2
-    cnt |= ((bit & 0xFF00FF00FF00FF00) != 0) << 3
-    cnt |= ((bit & 0xFFFF0000FFFF0000) != 0) << 4
-    cnt |= ((bit & 0xFFFFFFFF00000000) != 0) << 5
-    return cnt
+    """get the index of a bit
+
+    The bitboard passed in should have exactly one bit set. Hot loops inline
+    the bit_length call instead of calling this.
+
+    """
+    return bit.bit_length() - 1
+
+
+def iter_bits(bits):
+    """iterate over the set bits of a bitboard, lowest first
+
+    Yields a bitboard with only the one bit set for each.
+
+    """
+    while bits:
+        bit = bits & -bits
+        yield bit
+        bits ^= bit
+
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # pragma: no cover
+
+    def popcount(bits):
+        """count the number of set bits in a bitboard"""
+        return bin(bits).count("1")
+
+
+def mirror_bits(bits):
+    """mirror a bitboard left to right, swapping the a and h files"""
+    bits = ((bits >> 1) & 0x5555555555555555) | ((bits & 0x5555555555555555) << 1)
+    bits = ((bits >> 2) & 0x3333333333333333) | ((bits & 0x3333333333333333) << 2)
+    return ((bits >> 4) & 0x0F0F0F0F0F0F0F0F) | ((bits & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def mirror_steps(steps):
+    """mirror the (from, to) steps of a move left to right"""
+    return [(from_ix ^ 7, to_ix ^ 7) for from_ix, to_ix in steps]
+
+
+SQUARE_BITS = [1 << ix for ix in range(64)]
+SQUARE_NAMES = [f"{'abcdefgh'[ix % 8]}{ix // 8 + 1}" for ix in range(64)]
 
 
 def index_to_alg(cnt):
     """Convert a bit index to algebraic notation"""
-    column = "abcdefgh"[int(cnt % 8)]
-    rank = "12345678"[int(cnt // 8)]
-    return column + rank
+    return SQUARE_NAMES[cnt]
 
 
 def alg_to_index(sqr):
@@ -111,10 +159,9 @@ def sq_to_index(column, rank):
     return (rank * 8) + column
 
 
-MOVE_OFFSETS = [[[], []], [[], []]]
-
-
 def _generate_move_offsets():
+    """Squares a piece can step to, indexed by [color][not rabbit][square]"""
+    offsets = [[[], []], [[], []]]
     for i in range(64):
         bit = 1 << i
         moves = neighbors_of(bit)
@@ -124,17 +171,11 @@ def _generate_move_offsets():
         srmoves = moves
         if bit & NOT_8_RANK:
             srmoves ^= bit << 8
-        MOVE_OFFSETS[0][1].append(moves)
-        MOVE_OFFSETS[1][1].append(moves)
-        MOVE_OFFSETS[0][0].append(grmoves)
-        MOVE_OFFSETS[1][0].append(srmoves)
-
-
-_generate_move_offsets()
-
-RMOVE_OFFSETS = MOVE_OFFSETS[0][1]
-
-ZOBRIST_KEYS = [[], [], []]
+        offsets[0][1].append(moves)
+        offsets[1][1].append(moves)
+        offsets[0][0].append(grmoves)
+        offsets[1][0].append(srmoves)
+    return offsets
 
 
 # generate zobrist keys, assuring no duplicate keys or 0
@@ -142,38 +183,137 @@ def _zobrist_newkey(used_keys, rnd):
     candidate = 0
     while candidate in used_keys:
         candidate = rnd.randint(-(2**63 - 1), 2**63 - 1)
-    used_keys.append(candidate)
+    used_keys.add(candidate)
     return candidate
 
 
 def _generate_zobrist_keys():
+    """Generate the Zobrist keys from a fixed seed
+
+    Returns a dictionary of the side, steps left, piece, push, last piece
+    and last from square keys.
+    """
     rnd = random.Random()
     rnd.seed(0xF00F)
-    used_keys = [0]
-    ZOBRIST_KEYS[0] = _zobrist_newkey(used_keys, rnd)
+    used_keys = {0}
+    side = _zobrist_newkey(used_keys, rnd)
+    pieces = []
     for piece in range(Piece.COUNT):
-        ZOBRIST_KEYS[2].append([])
+        pieces.append([])
         for _ in range(64):
             if piece == Piece.EMPTY:
-                ZOBRIST_KEYS[2][piece].append(0)
+                pieces[piece].append(0)
             else:
-                ZOBRIST_KEYS[2][piece].append(_zobrist_newkey(used_keys, rnd))
-    for _ in range(5):
-        ZOBRIST_KEYS[1].append(_zobrist_newkey(used_keys, rnd))
+                pieces[piece].append(_zobrist_newkey(used_keys, rnd))
+    steps = [_zobrist_newkey(used_keys, rnd) for _ in range(5)]
+    # keys for the push and last step state, generated after the original
+    # keys so those keep their values
+    push = _zobrist_newkey(used_keys, rnd)
+    last_piece = [0]
+    for _ in range(Piece.GRABBIT, Piece.COUNT):
+        last_piece.append(_zobrist_newkey(used_keys, rnd))
+    last_from = [_zobrist_newkey(used_keys, rnd) for _ in range(64)]
+    return {
+        "ZOBRIST_SIDE": side,
+        "ZOBRIST_STEPS": steps,
+        "ZOBRIST_KEYS": pieces,
+        "ZOBRIST_PUSH": push,
+        "ZOBRIST_LAST_PIECE": last_piece,
+        "ZOBRIST_LAST_FROM": last_from,
+    }
+
+
+# The tables above are generated into board_tables.py by make_tables.py so
+# importing this module does not have to compute them.
+RMOVE_OFFSETS = MOVE_OFFSETS[0][1]
+# the neighbors of each square
+SQUARE_NEIGHBORS = RMOVE_OFFSETS
+
+# combined side to move and steps left keys, indexed by [color][steps_left]
+ZOBRIST_TURN = [
+    list(ZOBRIST_STEPS),
+    [ZOBRIST_SIDE ^ key for key in ZOBRIST_STEPS],
+]
 
 
-_generate_zobrist_keys()
+def _zobrist_state(color, steps_left, inpush, last_piece, last_from):
+    """Zobrist hash of the turn state of a position apart from the pieces"""
+    zobrist = ZOBRIST_TURN[color][steps_left] ^ ZOBRIST_LAST_PIECE[last_piece]
+    if inpush:
+        zobrist ^= ZOBRIST_PUSH
+    if last_from is not None:
+        zobrist ^= ZOBRIST_LAST_FROM[last_from]
+    return zobrist
 
-ZOBRIST_KEYS = ZOBRIST_KEYS[2]
 
 TRAP_NEIGHBORS = neighbors_of(TRAPS)
 
 
+def _generate_canonical_masks():
+    """For each square the lower squares at least 5 steps away
+
+    A step from one of these squares can neither affect nor be affected by a
+    step from the original square, so the two can be taken in either order.
+    """
+    masks = []
+    for from_ix in range(64):
+        mask = 0
+        for other_ix in range(from_ix):
+            distance = abs(from_ix % 8 - other_ix % 8) + abs(
+                from_ix // 8 - other_ix // 8
+            )
+            if distance >= 5:
+                mask |= 1 << other_ix
+        masks.append(mask)
+    return masks
+
+
+# binary layout of a position used by Position.to_bytes, the 12 piece
+# bitboards, the zobrist hash, side to move, steps left, push flag, last
+# piece and last from square (255 for none)
+_POSITION_STRUCT = struct.Struct("<12Qq5B")
+POSITION_BYTES = _POSITION_STRUCT.size
+_PACKED_PIECES = tuple(range(Piece.GRABBIT, Piece.GELEPHANT + 1)) + tuple(
+    range(Piece.SRABBIT, Piece.SELEPHANT + 1)
+)
+
+
+def _position_from_bytes(data):
+    return Position.from_bytes(data)
+
+
+def _get_rng(rnd):
+    """The random number generator to use for rnd
+
+    rnd can be None for the random module, a random.Random or a seed.
+
+    """
+    if rnd is None:
+        return random
+    if isinstance(rnd, random.Random):
+        return rnd
+    return random.Random(rnd)
+
+
 class IllegalMove(ValueError):
     pass
 
 
 class Position:
+    __slots__ = (
+        "color",
+        "stepsLeft",
+        "bitBoards",
+        "inpush",
+        "last_piece",
+        "last_from",
+        "placement",
+        "_zhash",
+        "_mhash",
+        "_stronger",
+        "_frozen",
+    )
+
     def __init__(
         self,
         side,
@@ -196,24 +336,26 @@ class Position:
             for piece in range(Piece.GRABBIT, Piece.GELEPHANT + 1):
                 placement[Color.GOLD] |= bitboards[piece]
                 placement[Color.SILVER] |= bitboards[piece | Piece.COLOR]
-        self.placement = list(placement)
+        self.placement = tuple(placement)
 
         if zobrist is None:
-            # zobrist = ZOBRIST_KEYS[0][sideMoving] ^ ZOBRIST_KEYS[1][stepsLeft]
-            zobrist = 0
+            zobrist = _zobrist_state(side, steps_left, inpush, last_piece, last_from)
             for piece in range(Piece.COUNT):
-                pieces = bitboards[piece]
-                while pieces:
-                    pbit = pieces & -pieces
-                    pieces ^= pbit
-                    pix = bit_to_index(pbit)
-                    zobrist ^= ZOBRIST_KEYS[piece][pix]
+                if bitboards[piece]:
+                    piece_keys = ZOBRIST_KEYS[piece]
+                    for pbit in iter_bits(bitboards[piece]):
+                        zobrist ^= piece_keys[pbit.bit_length() - 1]
         self._zhash = zobrist
+        # computed when first needed by mirror_key
+        self._mhash = None
+        # computed when first needed by stronger_neighbors and frozen_pieces
+        self._stronger = None
+        self._frozen = None
 
     def __eq__(self, other):
         try:
-            # if self._zhash != other._zhash:
-            #    return False
+            if self._zhash != other._zhash:
+                return False
             if self.color != other.color or self.stepsLeft != other.stepsLeft:
                 return False
             if (
@@ -236,18 +378,140 @@ class Position:
     def __hash__(self):
         return self._zhash
 
+    def _state_hash(self):
+        return _zobrist_state(
+            self.color, self.stepsLeft, self.inpush, self.last_piece, self.last_from
+        )
+
+    def __reduce__(self):
+        return (_position_from_bytes, (self.to_bytes(),))
+
+    def mirror_key(self):
+        """Zobrist hash of the position mirrored left to right
+
+        The same as mirror()._zhash but without creating the position. It is
+        computed the first time it is needed and then kept.
+
+        """
+        if self._mhash is None:
+            last_from = self.last_from
+            if last_from is not None:
+                last_from ^= 7
+            zobrist = _zobrist_state(
+                self.color, self.stepsLeft, self.inpush, self.last_piece, last_from
+            )
+            bitboards = self.bitBoards
+            for piece in range(Piece.GRABBIT, Piece.COUNT):
+                bits = bitboards[piece]
+                if bits:
+                    piece_keys = ZOBRIST_KEYS[piece]
+                    while bits:
+                        bit = bits & -bits
+                        bits ^= bit
+                        zobrist ^= piece_keys[(bit.bit_length() - 1) ^ 7]
+            self._mhash = zobrist
+        return self._mhash
+
+    def canonical_key(self):
+        """Key that is the same for a position and its mirror image
+
+        The smaller of the Zobrist hashes of the position and its mirror, so
+        caches and books can store both orientations in one entry. When the
+        key is not _zhash the position has to be mirrored, along with any
+        moves, to match what was stored.
+
+        """
+        return min(self._zhash, self.mirror_key())
+
+    def mirror(self):
+        """Create the position mirrored left to right, a file swapped with h"""
+        last_from = self.last_from
+        if last_from is not None:
+            last_from ^= 7
+        pos = Position(
+            self.color,
+            self.stepsLeft,
+            [None if bits is None else mirror_bits(bits) for bits in self.bitBoards],
+            self.inpush,
+            self.last_piece,
+            last_from,
+            placement=[mirror_bits(bits) for bits in self.placement],
+            zobrist=self.mirror_key(),
+        )
+        pos._mhash = self._zhash
+        return pos
+
+    def to_bytes(self):
+        """Pack the position into POSITION_BYTES bytes
+
+        The piece bitboards and turn state are stored along with the zobrist
+        hash so from_bytes does not need to recompute it.
+
+        """
+        bitboards = self.bitBoards
+        last_from = self.last_from
+        return _POSITION_STRUCT.pack(
+            bitboards[1],
+            bitboards[2],
+            bitboards[3],
+            bitboards[4],
+            bitboards[5],
+            bitboards[6],
+            bitboards[9],
+            bitboards[10],
+            bitboards[11],
+            bitboards[12],
+            bitboards[13],
+            bitboards[14],
+            self._zhash,
+            self.color,
+            self.stepsLeft,
+            self.inpush,
+            self.last_piece,
+            255 if last_from is None else last_from,
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a position from the bytes given by to_bytes
+
+        The stored hash is trusted, use check_hash to verify data from an
+        untrusted source.
+
+        """
+        if len(data) != POSITION_BYTES:
+            raise ValueError(
+                f"Position data must be {POSITION_BYTES} bytes, got {len(data)}"
+            )
+        values = _POSITION_STRUCT.unpack(data)
+        bitboards = list(BLANK_BOARD)
+        gplacement = splacement = 0
+        for ix in range(6):
+            gplacement |= values[ix]
+            splacement |= values[ix + 6]
+        for piece, bits in zip(_PACKED_PIECES, values):
+            bitboards[piece] = bits
+        bitboards[Piece.EMPTY] = ALL_BITS ^ (gplacement | splacement)
+        color, steps_left, inpush, last_piece, last_from = values[13:]
+        return cls(
+            color,
+            steps_left,
+            bitboards,
+            bool(inpush),
+            last_piece,
+            None if last_from == 255 else last_from,
+            placement=(gplacement, splacement),
+            zobrist=values[12],
+        )
+
     def check_hash(self):
         """Check to make sure the hash is correct"""
         bitboards = self.bitBoards
-        # zobrist = ZOBRIST_KEYS[0][sideMoving] ^ ZOBRIST_KEYS[1][stepsLeft]
-        zobrist = 0
+        zobrist = self._state_hash()
         for piece in range(Piece.COUNT):
-            pieces = bitboards[piece]
-            while pieces:
-                pbit = pieces & -pieces
-                pieces ^= pbit
-                pix = bit_to_index(pbit)
-                zobrist ^= ZOBRIST_KEYS[piece][pix]
+            if bitboards[piece]:
+                for pbit in iter_bits(bitboards[piece]):
+                    zobrist ^= ZOBRIST_KEYS[piece][bit_to_index(pbit)]
         if zobrist != self._zhash:
             raise RuntimeError("hash value is incorrect.")
 
@@ -275,7 +539,7 @@ class Position:
                 else:
                     cplacement[1] |= pboard
             empty &= ~pboard
-        if cplacement != self.placement:
+        if tuple(cplacement) != tuple(self.placement):
             if cplacement[0] != self.placement[0]:
                 print(f"gplacement {cplacement[0]:X} {self.placement[0]:X}")
             if cplacement[1] != self.placement[1]:
@@ -327,13 +591,61 @@ class Position:
         norabbits = self.is_rabbit_loss()
         if norabbits:
             return norabbits
-        if len(self.get_steps()) == 0:
+        if not self.has_legal_step():
             if self.color == Color.GOLD:
                 return -1
             else:
                 return 1
         return False
 
+    def has_legal_step(self):
+        """Check if the side to move has at least one legal step
+
+        Only bitboard operations are used and the check stops at the first
+        kind of step found, no steps or positions are generated.
+
+        """
+        color = self.color
+        bitboards = self.bitBoards
+        pcbit = color << 3
+        ocbit = pcbit ^ Piece.COLOR
+        movable = self.placement[color] & ~self.frozen_pieces(color)
+        if self.inpush:
+            # only finishing the push with a stronger piece is allowed
+            pushers = 0
+            for piece in range(
+                ((self.last_piece & Piece.DECOLOR) + 1) | pcbit,
+                (Piece.GELEPHANT | pcbit) + 1,
+            ):
+                pushers |= bitboards[piece]
+            return bool(pushers & movable & SQUARE_NEIGHBORS[self.last_from])
+        empty = bitboards[Piece.EMPTY]
+        rabbits = bitboards[Piece.GRABBIT | pcbit]
+        if movable & ~rabbits & neighbors_of(empty):
+            return True
+        rabbit_to = ((empty & NOT_A_FILE) >> 1) | ((empty & NOT_H_FILE) << 1)
+        if color == Color.GOLD:
+            rabbit_to |= (empty & NOT_1_RANK) >> 8
+        else:
+            rabbit_to |= (empty & NOT_8_RANK) << 8
+        if movable & rabbits & rabbit_to:
+            return True
+        if self.last_piece != Piece.EMPTY:
+            weaker = 0
+            for strength in range(Piece.GRABBIT, self.last_piece & Piece.DECOLOR):
+                weaker |= bitboards[strength | ocbit]
+            if weaker & SQUARE_NEIGHBORS[self.last_from]:
+                return True
+        if self.stepsLeft > 1:
+            pushers = 0
+            victims = 0
+            for strength in range(Piece.GELEPHANT, Piece.GRABBIT, -1):
+                pushers |= bitboards[strength | pcbit] & movable
+                victims |= bitboards[(strength - 1) | ocbit] & neighbors_of(pushers)
+            if victims & neighbors_of(empty):
+                return True
+        return False
+
     def _to_long_str(self, dots=True):
         bitBoards = self.bitBoards
         layout = [" +-----------------+"]
@@ -407,12 +719,8 @@ class Position:
             self.bitBoards[Piece.GRABBIT : Piece.GELEPHANT + 1]
         ):
             pname = Piece.PCHARS[piece + 1]
-            while pieceBoard:
-                bit = pieceBoard & -pieceBoard
-                pieceBoard ^= bit
-                pix = bit_to_index(bit)
-                sqr = index_to_alg(pix)
-                whitestr.append(pname + sqr)
+            for bit in iter_bits(pieceBoard):
+                whitestr.append(pname + index_to_alg(bit_to_index(bit)))
         whitestr = " ".join(whitestr)
 
         blackstr = [color_str[Color.SILVER]]
@@ -420,61 +728,16 @@ class Position:
             self.bitBoards[Piece.SRABBIT : Piece.SELEPHANT + 1]
         ):
             pname = Piece.PCHARS[(piece + 1) | Piece.COLOR]
-            while pieceBoard:
-                bit = pieceBoard & -pieceBoard
-                pieceBoard ^= bit
-                pix = bit_to_index(bit)
-                sqr = index_to_alg(pix)
-                blackstr.append(pname + sqr)
+            for bit in iter_bits(pieceBoard):
+                blackstr.append(pname + index_to_alg(bit_to_index(bit)))
         blackstr = " ".join(blackstr)
         return (whitestr, blackstr)
 
     def steps_to_str(self, steps):
         """Convert steps to a move string"""
-        dir_chars = {1: "w", -1: "e", 8: "s", -8: "n"}
-        pos = self
-        move_rep = []
-        for step in steps:
-            step_rep = []
-            from_bit = 1 << step[0]
-            for piece in range(Piece.GRABBIT, Piece.COUNT):
-                if pos.bitBoards[piece] is not None and pos.bitBoards[piece] & from_bit:
-                    break
-            if not pos.bitBoards[piece] & from_bit:
-                raise ValueError("Tried to move empty piece")
-            step_rep.append(Piece.PCHARS[piece])
-            step_rep.append(index_to_alg(step[0]))
-            direction = step[0] - step[1]
-            try:
-                step_rep.append(dir_chars[direction])
-            except KeyError:
-                step_rep.append("," + index_to_alg(step[1]))
-            move_rep.append("".join(step_rep))
-            npos = pos.do_step(step)
-            trap = neighbors_of(from_bit) & TRAPS
-            pcolor = (piece & Piece.COLOR) >> 3
-            if (
-                pos.placement[pcolor] & trap or trap & (1 << step[1])
-            ) and npos.bitBoards[Piece.EMPTY] & trap:
-                tix = bit_to_index(trap)
-                if tix == step[1]:
-                    tpiece = piece
-                else:
-                    pcbit = pcolor << 3
-                    for tpiece in range(
-                        Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1
-                    ):
-                        if (
-                            pos.bitBoards[tpiece] is not None
-                            and pos.bitBoards[tpiece] & trap
-                        ):
-                            break
-                step_rep = [Piece.PCHARS[tpiece]]
-                step_rep.append(index_to_alg(tix))
-                step_rep.append("x")
-                move_rep.append("".join(step_rep))
-            pos = npos
-        return " ".join(move_rep)
+        from pyrimaa.notation import encode_steps
+
+        return encode_steps(self, steps)
 
     def place_piece(self, piece, index):
         bit = 1 << index
@@ -485,7 +748,13 @@ class Position:
         newBoards[piece] |= bit
         newBoards[Piece.EMPTY] &= ~bit
         newPlacement[(piece & Piece.COLOR) >> 3] |= bit
-        zobrist = self._zhash ^ ZOBRIST_KEYS[piece][index]
+        # the new position starts clear of any push or last step
+        zobrist = (
+            self._zhash
+            ^ self._state_hash()
+            ^ _zobrist_state(self.color, self.stepsLeft, False, Piece.EMPTY, None)
+            ^ ZOBRIST_KEYS[piece][index]
+        )
         return Position(
             self.color,
             self.stepsLeft,
@@ -510,7 +779,13 @@ class Position:
         newBoards[piece] &= ~bit
         newBoards[Piece.EMPTY] |= bit
         newPlacement[side] &= ~bit
-        zobrist = self._zhash ^ ZOBRIST_KEYS[piece][index]
+        # the new position starts clear of any push or last step
+        zobrist = (
+            self._zhash
+            ^ self._state_hash()
+            ^ _zobrist_state(self.color, self.stepsLeft, False, Piece.EMPTY, None)
+            ^ ZOBRIST_KEYS[piece][index]
+        )
         return Position(
             self.color,
             self.stepsLeft,
@@ -549,14 +824,18 @@ class Position:
             return BadStep("Tried to move to a non-empty square")
         piece = self.piece_at(from_bit)
         direction = step[1] - step[0]
-        from_neighbors = neighbors_of(from_bit)
+        from_neighbors = SQUARE_NEIGHBORS[step[0]]
         pcbit = piece & Piece.COLOR
         pcolor = pcbit >> 3
         pstrength = piece & Piece.DECOLOR
-        if not neighbors_of(from_bit) & to_bit:
+        if not from_neighbors & to_bit:
             return BadStep("Tried to move to non-adjacent square")
         if pcolor == self.color:
-            if self.is_frozen_at(from_bit):
+            if (
+                from_neighbors & self.placement[pcolor ^ 1]
+                and not from_neighbors & self.placement[pcolor]
+                and from_bit & self.frozen_pieces(pcolor)
+            ):
                 return BadStep("Tried to move a frozen piece")
             if pstrength == Piece.GRABBIT:
                 if (pcolor == Color.GOLD and direction == -8) or (
@@ -578,18 +857,13 @@ class Position:
             ):
                 if self.stepsLeft == 1:
                     return BadStep("Tried to start a push on the last step")
-                stronger_and_unfrozen = False
+                pushers = 0
                 for s in range(
                     (piece ^ Piece.COLOR) + 1, (Piece.GELEPHANT | (self.color << 3)) + 1
                 ):
-                    if (
-                        from_neighbors
-                        & bitboards[s]
-                        & (~self.frozen_neighbors(from_bit))
-                    ):
-                        stronger_and_unfrozen = True
-                        break
-                if not stronger_and_unfrozen:
+                    pushers |= bitboards[s]
+                pushers &= from_neighbors
+                if not (pushers and pushers & ~self.frozen_pieces(self.color)):
                     return BadStep("Tried to push a piece with no pusher around")
         return True
 
@@ -605,46 +879,76 @@ class Position:
                 return piece
         return Piece.EMPTY
 
+    def stronger_neighbors(self, color):
+        """For each piece strength of the given color the squares next to a
+        stronger enemy piece
+
+        Returns a tuple indexed by piece strength, a piece on one of its
+        squares is frozen unless it also has a friendly neighbor. The result
+        is cached.
+
+        """
+        cache = self._stronger
+        if cache is None:
+            cache = self._stronger = [None, None]
+        stronger = cache[color]
+        if stronger is None:
+            bitboards = self.bitBoards
+            ocbit = (color ^ 1) << 3
+            stronger = [0] * (Piece.GELEPHANT + 1)
+            enemy = 0
+            for strength in range(Piece.GELEPHANT, Piece.EMPTY, -1):
+                stronger[strength] = neighbors_of(enemy)
+                enemy |= bitboards[strength | ocbit]
+            stronger = cache[color] = tuple(stronger)
+        return stronger
+
+    def frozen_pieces(self, color):
+        """returns a bitboard of the frozen pieces of the given color
+
+        The result is cached.
+
+        """
+        cache = self._frozen
+        if cache is None:
+            cache = self._frozen = [None, None]
+        frozen = cache[color]
+        if frozen is None:
+            bitboards = self.bitBoards
+            stronger = self.stronger_neighbors(color)
+            pcbit = color << 3
+            frozen = 0
+            for strength in range(Piece.GRABBIT, Piece.GELEPHANT + 1):
+                frozen |= bitboards[strength | pcbit] & stronger[strength]
+            frozen &= ~neighbors_of(self.placement[color])
+            cache[color] = frozen
+        return frozen
+
     def is_frozen_at(self, bit):
         """test if a piece is frozen
 
         The argument bitboard passed in should have exactly one bit set.
 
         """
-        bitboards = self.bitBoards
         placement = self.placement
-        neighbors = neighbors_of(bit)
-        piece = self.piece_at(bit)
-        pcbit = piece & Piece.COLOR
-        pcolor = pcbit >> 3
-        isfrozen = (
-            not neighbors & placement[pcolor] and neighbors & placement[pcolor ^ 1]
-        )
-        if isfrozen:
-            isfrozen = False
-            for s in range(
-                (piece ^ Piece.COLOR) + 1, (Piece.GELEPHANT | (pcbit ^ Piece.COLOR)) + 1
-            ):
-                if neighbors & bitboards[s]:
-                    return True
+        if bit & placement[Color.GOLD]:
+            return bool(bit & self.frozen_pieces(Color.GOLD))
+        if bit & placement[Color.SILVER]:
+            return bool(bit & self.frozen_pieces(Color.SILVER))
         return False
 
     def frozen_neighbors(self, bits):
         """returns a bitboard with the frozen neighbors of the given bitboard"""
-        frozen_neighbors = 0
-        neighbor_bits = (
-            (bits & NOT_A_FILE) >> 1,
-            (bits & NOT_H_FILE) << 1,
-            (bits & NOT_1_RANK) >> 8,
-            (bits & NOT_8_RANK) << 8,
-        )
-        for nbit in neighbor_bits:
-            if self.is_frozen_at(nbit):
-                frozen_neighbors |= nbit
-        return frozen_neighbors
+        frozen = self.frozen_pieces(Color.GOLD) | self.frozen_pieces(Color.SILVER)
+        return neighbors_of(bits) & frozen
+
+    def do_step(self, step, piece=None):
+        """Generate a new position from this position with the given steps
+
+        If the piece being moved is already known, as it is for the steps
+        from iter_steps, passing it in saves looking it up again.
 
-    def do_step(self, step):
-        """Generate a new position from this position with the given steps"""
+        """
         bitBoards = self.bitBoards
         placement = self.placement
         stepsLeft = self.stepsLeft
@@ -656,11 +960,15 @@ class Position:
         from_bit = 1 << from_ix
         to_ix = step[1]
         to_bit = 1 << to_ix
-        pcolor = bool(placement[1] & from_bit)
-        pcbit = pcolor << 3
-        for piece in range(Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
-            if bitBoards[piece] & from_bit:
-                break
+        if piece is None:
+            pcolor = bool(placement[1] & from_bit)
+            pcbit = pcolor << 3
+            for piece in range(Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
+                if bitBoards[piece] & from_bit:
+                    break
+        else:
+            pcbit = piece & Piece.COLOR
+            pcolor = pcbit >> 3
         ispush = False
         ispull = False
         if pcolor != color:
@@ -682,10 +990,10 @@ class Position:
         zobrist ^= ZOBRIST_KEYS[piece][from_ix]
         zobrist ^= ZOBRIST_KEYS[piece][to_ix]
         # remove trapped pieces, can only be one if any
-        ntrap = neighbors_of(from_bit) & TRAPS & ~neighbors_of(newPlacement[pcolor])
+        ntrap = SQUARE_NEIGHBORS[from_ix] & TRAPS & ~neighbors_of(newPlacement[pcolor])
         if ntrap & newPlacement[pcolor]:
             nottrapped = ~ntrap
-            tix = bit_to_index(ntrap)
+            tix = ntrap.bit_length() - 1
             newBoards[Piece.EMPTY] |= ntrap
             newPlacement[pcolor] &= nottrapped
             for tpiece in range(Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
@@ -702,6 +1010,9 @@ class Position:
         if self.inpush or ispull:
             piece = Piece.EMPTY
             from_ix = None
+        zobrist ^= self._state_hash() ^ _zobrist_state(
+            color, stepsLeft, ispush, piece, from_ix
+        )
         return Position(
             color,
             stepsLeft,
@@ -725,7 +1036,7 @@ class Position:
                     raise IllegalMove(str(is_legal))
             pos = pos.do_step(step)
         if pos.color == self.color:
-            pos = Position(self.color ^ 1, 4, pos.bitBoards, placement=pos.placement)
+            pos = pos.get_null_move()
         return pos
 
     def _check_setup_step(self, piece, ix, bitboards, available):
@@ -736,48 +1047,52 @@ class Position:
         if available[piece & ~Piece.COLOR] < 1:
             raise IllegalMove(f"Tried to place too many '{Piece.PCHARS[piece]}'")
 
+    def do_setup(self, placements, strict_checks=True):
+        """Generate a new position by placing pieces
+
+        placements is a sequence of (piece, square index) pairs, as decoded
+        from a setup move.
+
+        """
+        bitboards = list(self.bitBoards)
+        available = {
+            Piece.GRABBIT: 8,
+            Piece.GCAT: 2,
+            Piece.GDOG: 2,
+            Piece.GHORSE: 2,
+            Piece.GCAMEL: 1,
+            Piece.GELEPHANT: 1,
+        }
+        for piece, ix in placements:
+            bit = 1 << ix
+            if strict_checks:
+                self._check_setup_step(piece, ix, bitboards, available)
+                available[piece & ~Piece.COLOR] -= 1
+            if not bitboards[Piece.EMPTY] & bit:
+                raise IllegalMove("Tried to place a piece onto another")
+            bitboards[piece] |= bit
+            bitboards[Piece.EMPTY] &= ~bit
+        if strict_checks:
+            not_placed = [p[0] for p in available.items() if p[1] > 0]
+            if not_placed:
+                raise IllegalMove("Did not place all pieces in setup")
+        return Position(self.color ^ 1, 4, bitboards)
+
     def do_move_str(self, move_str, strict_checks=True):
-        try:
-            steps = parse_move(move_str)
-            result = self.do_move(steps, strict_checks)
-        except ValueError as exc:
-            if str(exc) == "Can't represent placing step":
-                bitboards = list(self.bitBoards)
-                available = {
-                    Piece.GRABBIT: 8,
-                    Piece.GCAT: 2,
-                    Piece.GDOG: 2,
-                    Piece.GHORSE: 2,
-                    Piece.GCAMEL: 1,
-                    Piece.GELEPHANT: 1,
-                }
-                for step_str in move_str.split():
-                    if len(step_str) != 3:
-                        raise IllegalMove("Found mixture of step types") from None
-                    piece = Piece.PCHARS.index(step_str[0])
-                    ix = alg_to_index(step_str[1:])
-                    bit = 1 << ix
-                    if strict_checks:
-                        self._check_setup_step(piece, ix, bitboards, available)
-                        available[piece & ~Piece.COLOR] -= 1
-                    if not bitboards[Piece.EMPTY] & bit:
-                        raise IllegalMove(
-                            "Tried to place a piece onto another"
-                        ) from None
-                    bitboards[piece] |= bit
-                    bitboards[Piece.EMPTY] &= ~bit
-                if strict_checks:
-                    not_placed = [p[0] for p in available.items() if p[1] > 0]
-                    if not_placed:
-                        raise IllegalMove("Did not place all pieces in setup") from None
-
-                result = Position(self.color ^ 1, 4, bitboards)
-            else:
-                raise
-        return result
+        """Generate a new position from a move string of steps or a setup"""
+        from pyrimaa.notation import MoveKind, decode_move
 
-    def get_single_steps(self):
-        """Generate all regular steps from this position"""
+        kind, items = decode_move(move_str)
+        if kind == MoveKind.SETUP:
+            return self.do_setup(items, strict_checks)
+        return self.do_move(items, strict_checks)
+
+    def get_single_steps(self, skip=0):
+        """Generate all regular steps from this position
+
+        Pieces on the squares in the skip bitboard are not moved.
+
+        """
         color = self.color
         bitboards = self.bitBoards
         placementBoards = self.placement
@@ -789,22 +1104,21 @@ class Position:
         else:
             newcolor = color
 
+        # hash of the position without the turn state
+        board_hash = self._zhash ^ self._state_hash()
+        newturn_hash = ZOBRIST_TURN[newcolor][newstepsleft]
+
         move_list = []  # list to return generated steps in
         move_list_append = move_list.append
-        stronger = placementBoards[color ^ 1]  # stronger enemy pieces
-        neighbors_of_my = neighbors_of(placementBoards[color])
+        movable = ~self.frozen_pieces(color) & ~skip
         pcbit = color << 3
         for piece in range(Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
-            # remove enemy of the same rank
-            stronger ^= bitboards[piece ^ Piece.COLOR]
-            piecestomove = bitboards[piece] & (
-                neighbors_of_my | ~neighbors_of(stronger)
-            )
+            piecestomove = bitboards[piece] & movable
 
             while piecestomove:
                 from_bit = piecestomove & -piecestomove
                 piecestomove ^= from_bit
-                from_ix = bit_to_index(from_bit)
+                from_ix = from_bit.bit_length() - 1
                 potential_squares = (
                     bitboards[Piece.EMPTY]
                     & MOVE_OFFSETS[color][(piece & Piece.DECOLOR) != Piece.GRABBIT][
@@ -815,7 +1129,7 @@ class Position:
                 while potential_squares:
                     to_bit = potential_squares & -potential_squares
                     potential_squares ^= to_bit
-                    to_ix = bit_to_index(to_bit)
+                    to_ix = to_bit.bit_length() - 1
                     # create new position
                     # make copies of the current boards
                     newBoards = list(bitboards)
@@ -826,7 +1140,7 @@ class Position:
                     newBoards[piece] ^= step_bits
                     newPlacement[color] ^= step_bits
                     # update the zobrist hash
-                    zobrist = self._zhash
+                    zobrist = board_hash ^ newturn_hash
                     zobrist ^= ZOBRIST_KEYS[piece][from_ix]
                     zobrist ^= ZOBRIST_KEYS[piece][to_ix]
                     # remove trapped pieces, can only be one if any
@@ -866,6 +1180,8 @@ class Position:
                                     break
 
                     if newcolor == color:
+                        zobrist ^= ZOBRIST_LAST_PIECE[piece]
+                        zobrist ^= ZOBRIST_LAST_FROM[from_ix]
                         pos = Position(
                             newcolor,
                             newstepsleft,
@@ -890,59 +1206,81 @@ class Position:
                     move_list_append(((from_ix, to_ix), pos))
         return move_list
 
-    def get_steps(self):
-        """Get all the steps from this position"""
+    def iter_single_steps(self):
+        """Generate all regular steps from this position without creating the
+        resulting positions
+
+        Yields tuples of ((from_ix, to_ix), piece). The position after a step
+        can be created when needed with do_step(step, piece).
+
+        """
+        color = self.color
+        bitboards = self.bitBoards
+        empty = bitboards[Piece.EMPTY]
+        movable = ~self.frozen_pieces(color)
+        pcbit = color << 3
+        for piece in range(Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
+            piecestomove = bitboards[piece] & movable
+            offsets = MOVE_OFFSETS[color][(piece & Piece.DECOLOR) != Piece.GRABBIT]
+
+            while piecestomove:
+                from_bit = piecestomove & -piecestomove
+                piecestomove ^= from_bit
+                from_ix = from_bit.bit_length() - 1
+                potential_squares = empty & offsets[from_ix]
+
+                while potential_squares:
+                    to_bit = potential_squares & -potential_squares
+                    potential_squares ^= to_bit
+                    yield ((from_ix, to_bit.bit_length() - 1), piece)
+
+    def get_steps(self, skip=0):
+        """Get all the steps from this position
+
+        Regular steps of pieces on the squares in the skip bitboard are left
+        out, pushes, pulls and finishing a push are always included.
+
+        """
         color = self.color
         bitboards = self.bitBoards
-        placement = self.placement
         last_from = self.last_from
-        neighbors_of_my = neighbors_of(self.placement[color])
+        movable = ~self.frozen_pieces(color)
 
         step_list = []
         if self.inpush:
-            lastbit = 1 << last_from
-            lf_neighbors = neighbors_of(lastbit)
-            stronger = 0
+            lf_neighbors = SQUARE_NEIGHBORS[last_from] & movable
             attackers = 0
             pcbit = color << 3
             lstrength = self.last_piece & Piece.DECOLOR
             for piece in range(Piece.GELEPHANT | pcbit, lstrength | pcbit, -1):
-                attackers |= (
-                    bitboards[piece]
-                    & lf_neighbors
-                    & (neighbors_of_my | ~neighbors_of(stronger))
-                )
-                stronger |= bitboards[piece ^ Piece.COLOR]
+                attackers |= bitboards[piece] & lf_neighbors
             while attackers:
                 abit = attackers & -attackers
                 attackers ^= abit
-                step = (bit_to_index(abit), last_from)
+                step = (abit.bit_length() - 1, last_from)
                 step_list.append((step, self.do_step(step)))
         else:
             opponent = color ^ 1
-            stronger = placement[opponent] ^ bitboards[Piece.GRABBIT | (opponent << 3)]
             pcbit = color << 3
             attackers = 0
             if self.stepsLeft > 1:
                 for piece in range(Piece.GCAT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
-                    stronger ^= bitboards[piece ^ Piece.COLOR]
-                    attackers |= bitboards[piece] & (
-                        neighbors_of_my | ~neighbors_of(stronger)
-                    )
+                    attackers |= bitboards[piece]
+                attackers &= movable
             ocbit = opponent << 3
             empty_neighbors = neighbors_of(bitboards[Piece.EMPTY])
             for vpiece in range(Piece.GRABBIT | ocbit, Piece.GELEPHANT | ocbit):
                 pullsdone = 0
                 if self.last_piece & Piece.DECOLOR > vpiece & Piece.DECOLOR:
                     last_from = self.last_from
-                    lastbit = 1 << last_from
-                    pulls = bitboards[vpiece] & neighbors_of(lastbit)
+                    lastbit = SQUARE_BITS[last_from]
+                    pulls = bitboards[vpiece] & SQUARE_NEIGHBORS[last_from]
                     pullsdone |= lastbit | pulls
                     while pulls:
                         pbit = pulls & -pulls
                         pulls ^= pbit
-                        step = (bit_to_index(pbit), last_from)
-                        step_list.append((step, self.do_step(step)))
+                        step = (pbit.bit_length() - 1, last_from)
+                        step_list.append((step, self.do_step(step, vpiece)))
                 if self.stepsLeft < 2:
                     continue
                 attackers &= ~bitboards[vpiece ^ Piece.COLOR]
@@ -950,147 +1288,411 @@ class Position:
                 while victims:
                     vbit = victims & -victims
                     victims ^= vbit
-                    vix = bit_to_index(vbit)
-                    to_bits = neighbors_of(vbit) & bitboards[Piece.EMPTY]
+                    vix = vbit.bit_length() - 1
+                    to_bits = SQUARE_NEIGHBORS[vix] & bitboards[Piece.EMPTY]
                     while to_bits:
                         tbit = to_bits & -to_bits
                         to_bits ^= tbit
                         if (vbit & pullsdone) and (tbit & pullsdone):
                             continue
-                        step = (vix, bit_to_index(tbit))
-                        step_list.append((step, self.do_step(step)))
+                        step = (vix, tbit.bit_length() - 1)
+                        step_list.append((step, self.do_step(step, vpiece)))
 
-            step_list += self.get_single_steps()
+            step_list += self.get_single_steps(skip)
         return step_list
 
+    def iter_steps(self):
+        """Get all the steps from this position without creating the resulting
+        positions
+
+        Yields tuples of ((from_ix, to_ix), piece) in the same order get_steps
+        returns them. The position after a step can be created when needed
+        with do_step(step, piece).
+
+        """
+        color = self.color
+        bitboards = self.bitBoards
+        last_from = self.last_from
+        movable = ~self.frozen_pieces(color)
+
+        if self.inpush:
+            lf_neighbors = SQUARE_NEIGHBORS[last_from] & movable
+            attackers = 0
+            pcbit = color << 3
+            lstrength = self.last_piece & Piece.DECOLOR
+            for piece in range(Piece.GELEPHANT | pcbit, lstrength | pcbit, -1):
+                attackers |= bitboards[piece] & lf_neighbors
+            while attackers:
+                abit = attackers & -attackers
+                attackers ^= abit
+                piece = Piece.GELEPHANT | pcbit
+                while not bitboards[piece] & abit:
+                    piece -= 1
+                yield ((abit.bit_length() - 1, last_from), piece)
+        else:
+            opponent = color ^ 1
+            pcbit = color << 3
+            attackers = 0
+            if self.stepsLeft > 1:
+                for piece in range(Piece.GCAT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
+                    attackers |= bitboards[piece]
+                attackers &= movable
+            ocbit = opponent << 3
+            empty_neighbors = neighbors_of(bitboards[Piece.EMPTY])
+            for vpiece in range(Piece.GRABBIT | ocbit, Piece.GELEPHANT | ocbit):
+                pullsdone = 0
+                if self.last_piece & Piece.DECOLOR > vpiece & Piece.DECOLOR:
+                    last_from = self.last_from
+                    lastbit = SQUARE_BITS[last_from]
+                    pulls = bitboards[vpiece] & SQUARE_NEIGHBORS[last_from]
+                    pullsdone |= lastbit | pulls
+                    while pulls:
+                        pbit = pulls & -pulls
+                        pulls ^= pbit
+                        yield ((pbit.bit_length() - 1, last_from), vpiece)
+                if self.stepsLeft < 2:
+                    continue
+                attackers &= ~bitboards[vpiece ^ Piece.COLOR]
+                victims = bitboards[vpiece] & neighbors_of(attackers) & empty_neighbors
+                while victims:
+                    vbit = victims & -victims
+                    victims ^= vbit
+                    vix = vbit.bit_length() - 1
+                    to_bits = SQUARE_NEIGHBORS[vix] & bitboards[Piece.EMPTY]
+                    while to_bits:
+                        tbit = to_bits & -to_bits
+                        to_bits ^= tbit
+                        if (vbit & pullsdone) and (tbit & pullsdone):
+                            continue
+                        yield ((vix, tbit.bit_length() - 1), vpiece)
+
+            yield from self.iter_single_steps()
+
     def get_null_move(self):
         """Generate a null move"""
-        return Position(
+        zobrist = self._zhash ^ self._state_hash() ^ ZOBRIST_TURN[self.color ^ 1][4]
+        pos = Position(
             self.color ^ 1,
             4,
             self.bitBoards,
             placement=self.placement,
-            zobrist=self._zhash,
+            zobrist=zobrist,
         )
+        # the pieces have not changed so neither has what is frozen
+        if self._frozen is not None:
+            pos._stronger = list(self._stronger)
+            pos._frozen = list(self._frozen)
+        return pos
+
+    def _canonical_steps(self):
+        """Get the steps from this position in canonical order
+
+        If the last step was a regular step, steps of other pieces far enough
+        away that they could have been taken first are skipped when they come
+        from a lower square. The same result is reached by taking them in the
+        other order so the skipped steps would only produce transpositions.
+
+        """
+        if self.inpush or self.last_piece == Piece.EMPTY:
+            return self.get_steps()
+        return self.get_steps(INDEPENDENT_BEFORE[self.last_from])
+
+    def _gen_moves(self, by_key=False, nodes=None, canonical=False):
+        """Generator behind iter_moves, get_moves and get_moves_nodes
 
-    def get_moves(self):
-        """Generate all possible moves from this position"""
+        With by_key finished moves are told apart by their hash alone so they
+        do not need to be kept alive. If nodes is given its first element is
+        increased by the number of steps generated. With canonical most
+        transpositions of independent steps are never generated.
+
+        """
         color = self.color
+        # the null move is not a legal move, mark it as seen from the start
+        null_move = self.get_null_move()
+        seen = {null_move._zhash if by_key else null_move}
         partial = {self: ()}
-        finished = {}
         while partial:
             nextpart = {}
             for npos, nsteps in partial.items():
-                for step, move in npos.get_steps():
+                if canonical and nsteps:
+                    steps = npos._canonical_steps()
+                else:
+                    steps = npos.get_steps()
+                if nodes is not None:
+                    nodes[0] += len(steps)
+                for step, move in steps:
                     if move.color == color:
                         if move not in nextpart:
                             nextpart[move] = nsteps + (step,)
-                    elif move not in finished:
-                        finished[move] = nsteps + (step,)
+                    else:
+                        key = move._zhash if by_key else move
+                        if key not in seen:
+                            seen.add(key)
+                            yield (nsteps + (step,), move)
                 if not npos.inpush:
                     move = npos.get_null_move()
-                    if move not in finished:
-                        finished[move] = nsteps
+                    key = move._zhash if by_key else move
+                    if key not in seen:
+                        seen.add(key)
+                        yield (nsteps, move)
             partial = nextpart
-        del finished[self.get_null_move()]
-        return finished
 
-    def get_moves_nodes(self):
+    def iter_moves(self, canonical=False):
+        """Generate the possible moves from this position one at a time
+
+        Yields (steps, position) tuples for each unique move as soon as it is
+        found, in the same order get_moves finds them. Moves are still only
+        given once, but the generator can be stopped early when only some of
+        the moves are needed, without paying for a full enumeration.
+
+        """
+        return self._gen_moves(canonical=canonical)
+
+    def get_moves(self, packed=False, canonical=False):
+        """Generate all possible moves from this position
+
+        Normally returns a dict of resulting position to steps. With packed
+        a MoveSet is returned instead, which takes much less memory. With
+        canonical independent steps are only tried in one order, this finds
+        the same moves faster but the steps for a move may differ.
+
+        """
+        moves = self._gen_moves(by_key=packed, canonical=canonical)
+        if packed:
+            return MoveSet(self, moves)
+        return {move: steps for steps, move in moves}
+
+    def get_moves_nodes(self, packed=False, canonical=False):
         """Generate all possible moves from this position, also keep track of
         and return the number of nodes visited while generating them."""
-        color = self.color
-        partial = {self: ()}
-        finished = {}
-        nodes = 0
-        while partial:
-            nextpart = {}
-            for npos, nsteps in partial.items():
-                steps = npos.get_steps()
-                nodes += len(steps)
-                for step, move in steps:
-                    if move.color == color:
-                        if move not in nextpart:
-                            nextpart[move] = nsteps + (step,)
-                    elif move not in finished:
-                        finished[move] = nsteps + (step,)
-                if not npos.inpush:
-                    move = npos.get_null_move()
-                    if move not in finished:
-                        finished[move] = nsteps
-            partial = nextpart
-        del finished[self.get_null_move()]
-        return (finished, nodes)
+        nodes = [0]
+        moves = self._gen_moves(packed, nodes, canonical)
+        if packed:
+            moves = MoveSet(self, moves)
+        else:
+            moves = {move: steps for steps, move in moves}
+        return (moves, nodes[0])
+
+    def _rnd_step_choices(self, start):
+        """Steps to sample from when building a random move from start"""
+        steps = self.get_steps()
+        if self.bitBoards != start.bitBoards and not self.inpush:
+            steps.append(((), self.get_null_move()))
+        if self.stepsLeft == 1:
+            # the last step can not return the board to the starting state
+            steps = [s for s in steps if s[1].bitBoards != start.bitBoards]
+        return steps
+
+    def get_rnd_step_move(self, rnd=None, uniform=False):
+        """Generate a move from this position by taking random steps
+
+        Each step is chosen at random from the steps that can still lead to
+        a legal move, backing up and trying another step when a dead end is
+        reached. This favors moves reachable by fewer step orders, with
+        uniform the move is instead chosen uniformly from all unique moves,
+        which needs all of them to be generated.
+
+        rnd is the random.Random to use or a seed for a new one, by default
+        the random module is used.
+
+        Returns a tuple of (steps, position) or (None, self) when there is
+        no legal move.
 
-    def get_rnd_step_move(self):
-        """Generate a move from this position by taking random steps."""
-        pos = self
+        """
+        rnd = _get_rng(rnd)
+        if uniform:
+            chosen = (None, self)
+            for count, move in enumerate(self.iter_moves(), 1):
+                if rnd.randrange(count) == 0:
+                    chosen = move
+            return chosen
         taken = []
-        deadends = set()
-        while pos.color == self.color:
-            steps = pos.get_steps()
-            steps = [s for s in steps if s[1] not in deadends]
-            if pos.bitBoards != self.bitBoards and not pos.inpush:
-                nullmove = pos.get_null_move()
-                steps.append(((), nullmove))
-
-            if pos.stepsLeft == 1:
-                # This is the last step, if it returns the board to the
-                # starting state it is illegal
-                steps = [s for s in steps if s[1].bitBoards != self.bitBoards]
-
-            if len(steps) == 0:
+        choices = [self._rnd_step_choices(self)]
+        while choices:
+            steps = choices[-1]
+            if not steps:
+                # dead end, back up a step
+                choices.pop()
                 if taken:
-                    # This is a deadend with no legal steps.
-                    # Can occur when a push returns the position to the start
-                    # and has no steps left to change the position after that.
-                    # This method almost certainly introduces some bias in the
-                    # results that could be avoided with proper backtracking.
-                    deadends.add(pos)
-                    pos = self
-                    taken = []
-                    continue
-                else:
-                    # nothing can move we must be either eliminated or
-                    # immobilized
-                    return (None, pos)
+                    taken.pop()
+                continue
+            ix = rnd.randrange(len(steps))
+            step, pos = steps[ix]
+            steps[ix] = steps[-1]
+            steps.pop()
+            if pos.color != self.color:
+                if step:
+                    taken.append(step)
+                return (taken, pos)
+            taken.append(step)
+            choices.append(pos._rnd_step_choices(self))
+        # nothing can move we must be either eliminated or immobilized
+        return (None, self)
+
+    def _goal_distance(self, color):
+        """Fewest steps any rabbit of color needs to reach its goal rank
+
+        Returns 8 if color has no rabbits.
+        """
+        if color == Color.GOLD:
+            rabbits = self.bitBoards[Piece.GRABBIT]
+            if not rabbits:
+                return 8
+            return 7 - ((rabbits.bit_length() - 1) >> 3)
+        rabbits = self.bitBoards[Piece.SRABBIT]
+        if not rabbits:
+            return 8
+        return ((rabbits & -rabbits).bit_length() - 1) >> 3
+
+    def _goal_search(self, start, taken, failed):
+        color = start.color
+        steps_left = self.stepsLeft
+        distance = self._goal_distance(color)
+        if distance > steps_left:
+            return None
+        if distance == 0 and not self.inpush and self.bitBoards != start.bitBoards:
+            return (taken, self.get_null_move())
+        if self._zhash in failed:
+            return None
+        if distance == steps_left and not self.inpush:
+            # no step to spare, only a rabbit moving forward can still goal
+            rabbits = self.bitBoards[Piece.GRABBIT | (color << 3)]
+            rabbits &= ~self.frozen_pieces(color)
+            empty = self.bitBoards[Piece.EMPTY]
+            if color == Color.GOLD:
+                rabbits &= RANK_MASKS[7 - distance] & (empty >> 8)
+                offset = 8
+            else:
+                rabbits &= RANK_MASKS[distance] & (empty << 8)
+                offset = -8
+            steps = []
+            while rabbits:
+                bit = rabbits & -rabbits
+                rabbits ^= bit
+                from_ix = bit.bit_length() - 1
+                step = (from_ix, from_ix + offset)
+                steps.append((step, self.do_step(step)))
+        else:
+            steps = self.get_steps()
+        for step, pos in steps:
+            if pos.color != color:
+                # the turn ended with this step
+                if pos._goal_distance(color) == 0 and pos.bitBoards != start.bitBoards:
+                    return (taken + [step], pos)
+                continue
+            found = pos._goal_search(start, taken + [step], failed)
+            if found:
+                return found
+        failed.add(self._zhash)
+        return None
+
+    def get_goal_move(self):
+        """Find a move that wins by goal for the side to move
 
-            randstep = random.choice(steps)
-            taken.append(randstep[0])
-            pos = randstep[1]
-        if not taken[-1]:
-            taken = taken[:-1]
-        if pos.bitBoards == self.bitBoards:  # pragma: no cover
-            raise RuntimeError("Produced illegal null move.")
-        return (taken, pos)
+        A rabbit can move at most one rank per step, so positions with no
+        rabbit within stepsLeft ranks of goal are rejected without
+        generating any steps. Otherwise the steps are searched depth first,
+        including pushes and pulls to clear the way or unfreeze a rabbit,
+        and lines that can no longer get a rabbit to goal in the steps left
+        are cut off.
+
+        Returns a tuple of (steps, position) for a goal move or None if there
+        is no goal this turn.
+
+        """
+        if self._goal_distance(self.color) > self.stepsLeft:
+            return None
+        return self._goal_search(self, [], set())
+
+
+def pack_step(step):
+    """Pack a (from_ix, to_ix) step into a 16 bit integer, from_ix << 6 | to_ix"""
+    return step[0] << 6 | step[1]
+
+
+def unpack_step(code):
+    """Unpack a step packed with pack_step"""
+    return (code >> 6, code & 0x3F)
+
+
+class MoveSet:
+    """Compact set of the moves from a position
+
+    Only the Zobrist hash and the packed steps of each move are stored, in
+    parallel arrays, the resulting positions are created again when asked
+    for. Iterating and indexing by position mirror the dict returned by
+    Position.get_moves. Membership is by position hash.
+
+    """
+
+    __slots__ = ("position", "keys", "offsets", "steps", "_index")
+
+    def __init__(self, position, moves=()):
+        self.position = position
+        self.keys = array("q")
+        self.offsets = array("L", [0])
+        self.steps = array("H")
+        self._index = {}
+        for steps, move in moves:
+            self.add(move, steps)
+
+    def add(self, move, steps):
+        """Add a move, returns False if it was already in the set"""
+        key = move if isinstance(move, int) else move._zhash
+        if key in self._index:
+            return False
+        self._index[key] = len(self.keys)
+        self.keys.append(key)
+        self.steps.extend([pack_step(step) for step in steps])
+        self.offsets.append(len(self.steps))
+        return True
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, move):
+        key = move if isinstance(move, int) else move._zhash
+        return key in self._index
+
+    def __iter__(self):
+        for ix in range(len(self.keys)):
+            yield self.position_at(ix)
+
+    def __getitem__(self, move):
+        key = move if isinstance(move, int) else move._zhash
+        return self.steps_at(self._index[key])
+
+    def index(self, move):
+        """Get the index of a move in the set"""
+        key = move if isinstance(move, int) else move._zhash
+        try:
+            return self._index[key]
+        except KeyError:
+            raise ValueError("Move is not in the set") from None
+
+    def steps_at(self, ix):
+        """Get the steps of the move at the given index"""
+        return tuple(
+            unpack_step(code)
+            for code in self.steps[self.offsets[ix] : self.offsets[ix + 1]]
+        )
+
+    def position_at(self, ix):
+        """Create the position resulting from the move at the given index"""
+        return self.position.do_move(self.steps_at(ix), strict_checks=False)
+
+    def items(self):
+        """Iterate over (position, steps) pairs like dict.items"""
+        for ix in range(len(self.keys)):
+            steps = self.steps_at(ix)
+            yield (self.position.do_move(steps, strict_checks=False), steps)
 
 
 def parse_move(line):
     """Parse steps from a move string"""
-    text = line.split()
-    if len(text) == 0:
-        raise ValueError(f"No steps in move given to parse. {repr(line)}")
-
-    steps = []
-    for step in text:
-        from_ix = alg_to_index(step[1:3])
-        if len(step) > 3:
-            if step[3] == "x":
-                continue
-            elif step[3] == "n":
-                to_ix = from_ix + 8
-            elif step[3] == "s":
-                to_ix = from_ix - 8
-            elif step[3] == "e":
-                to_ix = from_ix + 1
-            elif step[3] == "w":
-                to_ix = from_ix - 1
-            else:
-                raise ValueError("Invalid step direction.")
-            steps.append((from_ix, to_ix))
-        else:
-            raise ValueError("Can't represent placing step")
+    from pyrimaa.notation import decode_steps
 
-    return steps
+    return decode_steps(line)
 
 
 def parse_long_pos(text):
@@ -1178,8 +1780,34 @@ def parse_short_pos(side, stepsleft, text):
     return pos
 
 
+def parse_pos_file(text):
+    """Parse a position from the lines of a long or short format file"""
+    if len(text) > 1 and text[1].lstrip().startswith("["):
+        text = [x.strip() for x in text]
+        movenum = int(text[0][:-1])
+        pos = parse_short_pos("wbgs".index(text[0][-1]) % 2, 4, text[1])
+        return (movenum, pos)
+    return parse_long_pos(text)
+
+
+def _rnd_move(pos):
+    """Choose a uniformly random move without keeping every move in memory
+
+    Returns the number of moves found and the position after the chosen
+    move, or None if there are no moves.
+    """
+    chosen = None
+    count = 0
+    for count, (_, move) in enumerate(pos.iter_moves(), 1):
+        if random.randrange(count) == 0:
+            chosen = move
+    return (count, chosen)
+
+
 def test_random_play():
     """Randomly plays games printing out each move."""
+    import time
+
     total_turns = 0
     goal_wins = immo_wins = 0
     start_time = time.time()
@@ -1187,23 +1815,22 @@ def test_random_play():
         pos = Position(Color.GOLD, 4, BASIC_SETUP)
         turn = 2
         while not pos.is_goal():
-            moves = pos.get_moves()
-            del moves[pos.get_null_move()]
+            num_moves, move = _rnd_move(pos)
             print(turn)
             print(pos.board_to_str())
-            print(len(moves))
+            print(num_moves)
             print(time.time() - start_time)
             print()
-            if len(moves) == 0:
+            if num_moves == 0:
                 immo_wins += 1
                 print(f"{i + 1}, {immo_wins} win by immobilization. ")
                 break
 
             turn += 1
-            pos = random.choice(moves.keys())
+            pos = move
 
         total_turns += turn
-        if len(moves) != 0:
+        if num_moves != 0:
             goal_wins += 1
             print(f"{i + 1}, {goal_wins} win by goal.")
 
@@ -1217,7 +1844,7 @@ def rnd_step_game(pos):
     while (not pos.is_goal()) and (not pos.is_rabbit_loss()):
         steps, result = pos.get_rnd_step_move()
         if steps is None:  # immobilization or elimination
-            assert len(pos.get_moves()) == 0
+            assert next(pos.iter_moves(), None) is None
             if pos.color == Color.GOLD:
                 return -1
             else:
@@ -1233,15 +1860,14 @@ def rnd_step_game(pos):
 
 def rnd_game(pos):
     while (not pos.is_goal()) and (not pos.is_rabbit_loss()):
-        moves = pos.get_moves()
-        del moves[pos.get_null_move()]
-        if len(moves) == 0:
+        num_moves, move = _rnd_move(pos)
+        if num_moves == 0:
             if pos.color == Color.GOLD:
                 return -1
             else:
                 return 1
 
-        pos = random.choice(moves.keys())
+        pos = move
 
     if pos.is_goal():
         return pos.is_goal()
@@ -1266,8 +1892,7 @@ def test_rnd_steps():
                 print(pos.board_to_str())
                 print("Win by elimination/immobilization.")
                 print()
-                moves = pos.get_moves()
-                if len(moves) != 0:
+                if next(pos.iter_moves(), None) is not None:
                     print("Uh, oh. immo not immo.")
                     print(immo_wins)
                     return
@@ -1295,20 +1920,18 @@ def main(args=None):
     Takes a filename and attempts to parse it as a board position,
     then outputs a few statistics about the possible moves.
     """
+    import time
+    from argparse import ArgumentParser
+
     parser = ArgumentParser(
         description="Give a few statistics and possible moves for a position"
     )
     parser.add_argument("filename", help="Position file to look at")
     config = parser.parse_args(args)
     filename = config.filename
-    positionfile = open(filename)
-    positiontext = positionfile.readlines()
-    if positiontext[1][0] == "[":
-        positiontext = [x.strip() for x in positiontext]
-        movenum = int(positiontext[0][:-1])
-        pos = parse_short_pos("wbgs".index(positiontext[0][-1]) % 2, 4, positiontext[1])
-    else:
-        movenum, pos = parse_long_pos(positiontext)
+    with open(filename) as positionfile:
+        positiontext = positionfile.readlines()
+    movenum, pos = parse_pos_file(positiontext)
     print(f"{movenum}{'gs'[pos.color]}")
     print()
     print(pos.board_to_str())
@@ -1340,7 +1963,7 @@ def main(args=None):
     gentime = time.time() - starttime
     print(f"{len(moves)} unique moves generated in {gentime:.2f} seconds")
 
-    real_steps = [s for s, m in pos.get_steps()]
+    real_steps = [s for s, p in pos.iter_steps()]
     for i in range(64):
         for j in range(64):
             tstep = (i, j)
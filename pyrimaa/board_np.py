@@ -0,0 +1,213 @@
+"""Bitboard operations over batches of positions using NumPy
+
+This module needs NumPy, which is an optional dependency of pyrimaa. The
+bitboards of many positions are held as uint64 arrays so checks that
+pyrimaa.board does one Position at a time can be done for a whole batch.
+"""
+
+import numpy as np
+
+from pyrimaa.board import (
+    NOT_1_RANK,
+    NOT_8_RANK,
+    NOT_A_FILE,
+    NOT_H_FILE,
+    Color,
+    Piece,
+    Position,
+)
+
+_NOT_A_FILE = np.uint64(NOT_A_FILE)
+_NOT_H_FILE = np.uint64(NOT_H_FILE)
+_NOT_1_RANK = np.uint64(NOT_1_RANK)
+_NOT_8_RANK = np.uint64(NOT_8_RANK)
+_1 = np.uint64(1)
+_8 = np.uint64(8)
+
+# number of bits set in each byte value
+_BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def neighbors_of(bits):
+    """get the neighboring bits to each bitboard in an array"""
+    bits = np.asarray(bits, dtype=np.uint64)
+    bitboard = (bits & _NOT_A_FILE) >> _1
+    bitboard |= (bits & _NOT_H_FILE) << _1
+    bitboard |= (bits & _NOT_1_RANK) >> _8
+    bitboard |= (bits & _NOT_8_RANK) << _8
+    return bitboard
+
+
+def popcount(bits):
+    """count the bits set in each bitboard in an array"""
+    bits = np.ascontiguousarray(bits, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).astype(np.int64)
+    counts = _BYTE_COUNTS[bits.view(np.uint8)].reshape(bits.shape + (8,))
+    return counts.sum(axis=-1, dtype=np.int64)
+
+
+class PositionBatch:
+    """A batch of positions stored as a struct of arrays
+
+    boards has shape (Piece.COUNT, n) with one uint64 bitboard per piece type
+    and position, the unused piece indexes 7 and 8 are always 0. color,
+    steps_left, inpush, last_piece and last_from hold the rest of the state
+    of each position, with a last_from of -1 for None.
+
+    """
+
+    __slots__ = ("boards", "color", "steps_left", "inpush", "last_piece", "last_from")
+
+    def __init__(self, boards, color, steps_left, inpush, last_piece, last_from):
+        self.boards = np.asarray(boards, dtype=np.uint64)
+        self.color = np.asarray(color, dtype=np.uint8)
+        self.steps_left = np.asarray(steps_left, dtype=np.uint8)
+        self.inpush = np.asarray(inpush, dtype=bool)
+        self.last_piece = np.asarray(last_piece, dtype=np.uint8)
+        self.last_from = np.asarray(last_from, dtype=np.int8)
+        count = len(self.color)
+        if self.boards.shape != (Piece.COUNT, count):
+            raise ValueError(
+                f"Expected boards of shape {(Piece.COUNT, count)} "
+                f"got {self.boards.shape}"
+            )
+        for field in (self.steps_left, self.inpush, self.last_piece, self.last_from):
+            if field.shape != (count,):
+                raise ValueError("All position fields must have the same length")
+
+    @classmethod
+    def from_positions(cls, positions):
+        """Create a batch from a sequence of Position"""
+        positions = list(positions)
+        count = len(positions)
+        boards = np.zeros((Piece.COUNT, count), dtype=np.uint64)
+        for piece in range(Piece.COUNT):
+            if piece == Piece.GELEPHANT + 1 or piece == Piece.COLOR:
+                continue
+            boards[piece] = [pos.bitBoards[piece] for pos in positions]
+        return cls(
+            boards,
+            [pos.color for pos in positions],
+            [pos.stepsLeft for pos in positions],
+            [pos.inpush for pos in positions],
+            [pos.last_piece for pos in positions],
+            [-1 if pos.last_from is None else pos.last_from for pos in positions],
+        )
+
+    def __len__(self):
+        return len(self.color)
+
+    def __getitem__(self, index):
+        """Convert one position of the batch back to a Position"""
+        boards = [int(board) for board in self.boards[:, index]]
+        boards[Piece.GELEPHANT + 1] = None
+        boards[Piece.COLOR] = None
+        last_from = int(self.last_from[index])
+        return Position(
+            int(self.color[index]),
+            int(self.steps_left[index]),
+            boards,
+            bool(self.inpush[index]),
+            int(self.last_piece[index]),
+            None if last_from < 0 else last_from,
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_positions(self):
+        """Convert the batch back to a list of Position"""
+        return list(self)
+
+    def placement(self):
+        """Bitboards of all the pieces of each color, shape (2, n)"""
+        boards = self.boards
+        return np.stack(
+            (
+                np.bitwise_or.reduce(boards[Piece.GRABBIT : Piece.GELEPHANT + 1]),
+                np.bitwise_or.reduce(boards[Piece.SRABBIT : Piece.SELEPHANT + 1]),
+            )
+        )
+
+    def is_goal(self):
+        """Goal check for each position, same results as Position.is_goal
+
+        Returns an int8 array with 1 for a gold win, -1 for a silver win and
+        0 where neither side has reached goal.
+        """
+        ggoal = (self.boards[Piece.GRABBIT] & ~_NOT_8_RANK) != 0
+        sgoal = (self.boards[Piece.SRABBIT] & ~_NOT_1_RANK) != 0
+        # when both reached goal the side that just moved wins
+        gold_to_move = self.color == Color.GOLD
+        result = np.where(ggoal, 1, 0).astype(np.int8)
+        result[sgoal & (gold_to_move | ~ggoal)] = -1
+        return result
+
+    def is_rabbit_loss(self):
+        """Rabbit loss check for each position, same results as
+        Position.is_rabbit_loss
+
+        Returns an int8 array with 1 for a gold win, -1 for a silver win and
+        0 where both sides still have rabbits.
+        """
+        grabbits = self.boards[Piece.GRABBIT] != 0
+        srabbits = self.boards[Piece.SRABBIT] != 0
+        gold_to_move = self.color == Color.GOLD
+        result = np.where(srabbits, 0, 1).astype(np.int8)
+        result[~grabbits & (gold_to_move | srabbits)] = -1
+        return result
+
+    def frozen(self):
+        """Bitboards of the frozen pieces of each color, shape (2, n)"""
+        boards = self.boards
+        placement = self.placement()
+        frozen = np.zeros_like(placement)
+        for color in (Color.GOLD, Color.SILVER):
+            pcbit = color << 3
+            ocbit = pcbit ^ Piece.COLOR
+            enemy = np.zeros(len(self), dtype=np.uint64)
+            for strength in range(Piece.GELEPHANT, Piece.EMPTY, -1):
+                frozen[color] |= boards[strength | pcbit] & neighbors_of(enemy)
+                enemy |= boards[strength | ocbit]
+            frozen[color] &= ~neighbors_of(placement[color])
+        return frozen
+
+    def mobility(self):
+        """Count the regular steps each color could take, shape (2, n)
+
+        Every unfrozen piece step to an empty neighbor is counted, without
+        rabbits stepping backward. Pushes, pulls and the push state are not
+        considered.
+        """
+        boards = self.boards
+        empty = boards[Piece.EMPTY]
+        movable = self.placement() & ~self.frozen()
+        # pieces with an empty square to the west, east, south and north
+        west = (empty & _NOT_H_FILE) << _1
+        east = (empty & _NOT_A_FILE) >> _1
+        south = (empty & _NOT_8_RANK) << _8
+        north = (empty & _NOT_1_RANK) >> _8
+        mobility = np.zeros((2, len(self)), dtype=np.int64)
+        for color in (Color.GOLD, Color.SILVER):
+            rabbits = boards[Piece.GRABBIT | (color << 3)]
+            pieces = movable[color]
+            if color == Color.GOLD:
+                forward, back = north, south
+            else:
+                forward, back = south, north
+            mobility[color] = (
+                popcount(pieces & west)
+                + popcount(pieces & east)
+                + popcount(pieces & forward)
+                + popcount(pieces & ~rabbits & back)
+            )
+        return mobility
+
+    def material(self):
+        """Count the pieces of each type, shape (Piece.COUNT, n)
+
+        Row Piece.EMPTY counts the empty squares.
+        """
+        return popcount(self.boards)
@@ -0,0 +1,1433 @@
+"""Precomputed tables for pyrimaa.board
+
+Generated by "python -m pyrimaa.make_tables" from the _generate_* functions
+in board.py, do not edit.
+"""
+
+INDEPENDENT_BEFORE = [
+    0x0000000000000000,
+    0x0000000000000000,
+    0x0000000000000000,
+    0x0000000000000000,
+    0x0000000000000000,
+    0x0000000000000001,
+    0x0000000000000003,
+    0x0000000000000007,
+    0x00000000000000F0,
+    0x00000000000000E0,
+    0x00000000000000C0,
+    0x0000000000000080,
+    0x0000000000000001,
+    0x0000000000000103,
+    0x0000000000000307,
+    0x000000000000070F,
+    0x000000000000F0F8,
+    0x000000000000E0F0,
+    0x000000000000C0E0,
+    0x00000000000080C1,
+    0x0000000000000183,
+    0x0000000000010307,
+    0x000000000003070F,
+    0x0000000000070F1F,
+    0x0000000000F0F8FC,
+    0x0000000000E0F0F8,
+    0x0000000000C0E0F1,
+    0x000000000080C1E3,
+    0x00000000000183C7,
+    0x000000000103078F,
+    0x0000000003070F1F,
+    0x00000000070F1F3F,
+    0x00000000F0F8FCFE,
+    0x00000000E0F0F8FD,
+    0x00000000C0E0F1FB,
+    0x0000000080C1E3F7,
+    0x000000000183C7EF,
+    0x0000000103078FDF,
+    0x00000003070F1FBF,
+    0x000000070F1F3F7F,
+    0x000000F0F8FCFEFF,
+    0x000000E0F0F8FDFF,
+    0x000000C0E0F1FBFF,
+    0x00000080C1E3F7FF,
+    0x0000000183C7EFFF,
+    0x00000103078FDFFF,
+    0x000003070F1FBFFF,
+    0x0000070F1F3F7FFF,
+    0x0000F0F8FCFEFFFF,
+    0x0000E0F0F8FDFFFF,
+    0x0000C0E0F1FBFFFF,
+    0x000080C1E3F7FFFF,
+    0x00000183C7EFFFFF,
+    0x000103078FDFFFFF,
+    0x0003070F1FBFFFFF,
+    0x00070F1F3F7FFFFF,
+    0x00F0F8FCFEFFFFFF,
+    0x00E0F0F8FDFFFFFF,
+    0x00C0E0F1FBFFFFFF,
+    0x0080C1E3F7FFFFFF,
+    0x000183C7EFFFFFFF,
+    0x0103078FDFFFFFFF,
+    0x03070F1FBFFFFFFF,
+    0x070F1F3F7FFFFFFF,
+]
+
+MOVE_OFFSETS = [
+    [
+        [
+            0x0000000000000102,
+            0x0000000000000205,
+            0x000000000000040A,
+            0x0000000000000814,
+            0x0000000000001028,
+            0x0000000000002050,
+            0x00000000000040A0,
+            0x0000000000008040,
+            0x0000000000010200,
+            0x0000000000020500,
+            0x0000000000040A00,
+            0x0000000000081400,
+            0x0000000000102800,
+            0x0000000000205000,
+            0x000000000040A000,
+            0x0000000000804000,
+            0x0000000001020000,
+            0x0000000002050000,
+            0x00000000040A0000,
+            0x0000000008140000,
+            0x0000000010280000,
+            0x0000000020500000,
+            0x0000000040A00000,
+            0x0000000080400000,
+            0x0000000102000000,
+            0x0000000205000000,
+            0x000000040A000000,
+            0x0000000814000000,
+            0x0000001028000000,
+            0x0000002050000000,
+            0x00000040A0000000,
+            0x0000008040000000,
+            0x0000010200000000,
+            0x0000020500000000,
+            0x0000040A00000000,
+            0x0000081400000000,
+            0x0000102800000000,
+            0x0000205000000000,
+            0x000040A000000000,
+            0x0000804000000000,
+            0x0001020000000000,
+            0x0002050000000000,
+            0x00040A0000000000,
+            0x0008140000000000,
+            0x0010280000000000,
+            0x0020500000000000,
+            0x0040A00000000000,
+            0x0080400000000000,
+            0x0102000000000000,
+            0x0205000000000000,
+            0x040A000000000000,
+            0x0814000000000000,
+            0x1028000000000000,
+            0x2050000000000000,
+            0x40A0000000000000,
+            0x8040000000000000,
+            0x0200000000000000,
+            0x0500000000000000,
+            0x0A00000000000000,
+            0x1400000000000000,
+            0x2800000000000000,
+            0x5000000000000000,
+            0xA000000000000000,
+            0x4000000000000000,
+        ],
+        [
+            0x0000000000000102,
+            0x0000000000000205,
+            0x000000000000040A,
+            0x0000000000000814,
+            0x0000000000001028,
+            0x0000000000002050,
+            0x00000000000040A0,
+            0x0000000000008040,
+            0x0000000000010201,
+            0x0000000000020502,
+            0x0000000000040A04,
+            0x0000000000081408,
+            0x0000000000102810,
+            0x0000000000205020,
+            0x000000000040A040,
+            0x0000000000804080,
+            0x0000000001020100,
+            0x0000000002050200,
+            0x00000000040A0400,
+            0x0000000008140800,
+            0x0000000010281000,
+            0x0000000020502000,
+            0x0000000040A04000,
+            0x0000000080408000,
+            0x0000000102010000,
+            0x0000000205020000,
+            0x000000040A040000,
+            0x0000000814080000,
+            0x0000001028100000,
+            0x0000002050200000,
+            0x00000040A0400000,
+            0x0000008040800000,
+            0x0000010201000000,
+            0x0000020502000000,
+            0x0000040A04000000,
+            0x0000081408000000,
+            0x0000102810000000,
+            0x0000205020000000,
+            0x000040A040000000,
+            0x0000804080000000,
+            0x0001020100000000,
+            0x0002050200000000,
+            0x00040A0400000000,
+            0x0008140800000000,
+            0x0010281000000000,
+            0x0020502000000000,
+            0x0040A04000000000,
+            0x0080408000000000,
+            0x0102010000000000,
+            0x0205020000000000,
+            0x040A040000000000,
+            0x0814080000000000,
+            0x1028100000000000,
+            0x2050200000000000,
+            0x40A0400000000000,
+            0x8040800000000000,
+            0x0201000000000000,
+            0x0502000000000000,
+            0x0A04000000000000,
+            0x1408000000000000,
+            0x2810000000000000,
+            0x5020000000000000,
+            0xA040000000000000,
+            0x4080000000000000,
+        ],
+    ],
+    [
+        [
+            0x0000000000000002,
+            0x0000000000000005,
+            0x000000000000000A,
+            0x0000000000000014,
+            0x0000000000000028,
+            0x0000000000000050,
+            0x00000000000000A0,
+            0x0000000000000040,
+            0x0000000000000201,
+            0x0000000000000502,
+            0x0000000000000A04,
+            0x0000000000001408,
+            0x0000000000002810,
+            0x0000000000005020,
+            0x000000000000A040,
+            0x0000000000004080,
+            0x0000000000020100,
+            0x0000000000050200,
+            0x00000000000A0400,
+            0x0000000000140800,
+            0x0000000000281000,
+            0x0000000000502000,
+            0x0000000000A04000,
+            0x0000000000408000,
+            0x0000000002010000,
+            0x0000000005020000,
+            0x000000000A040000,
+            0x0000000014080000,
+            0x0000000028100000,
+            0x0000000050200000,
+            0x00000000A0400000,
+            0x0000000040800000,
+            0x0000000201000000,
+            0x0000000502000000,
+            0x0000000A04000000,
+            0x0000001408000000,
+            0x0000002810000000,
+            0x0000005020000000,
+            0x000000A040000000,
+            0x0000004080000000,
+            0x0000020100000000,
+            0x0000050200000000,
+            0x00000A0400000000,
+            0x0000140800000000,
+            0x0000281000000000,
+            0x0000502000000000,
+            0x0000A04000000000,
+            0x0000408000000000,
+            0x0002010000000000,
+            0x0005020000000000,
+            0x000A040000000000,
+            0x0014080000000000,
+            0x0028100000000000,
+            0x0050200000000000,
+            0x00A0400000000000,
+            0x0040800000000000,
+            0x0201000000000000,
+            0x0502000000000000,
+            0x0A04000000000000,
+            0x1408000000000000,
+            0x2810000000000000,
+            0x5020000000000000,
+            0xA040000000000000,
+            0x4080000000000000,
+        ],
+        [
+            0x0000000000000102,
+            0x0000000000000205,
+            0x000000000000040A,
+            0x0000000000000814,
+            0x0000000000001028,
+            0x0000000000002050,
+            0x00000000000040A0,
+            0x0000000000008040,
+            0x0000000000010201,
+            0x0000000000020502,
+            0x0000000000040A04,
+            0x0000000000081408,
+            0x0000000000102810,
+            0x0000000000205020,
+            0x000000000040A040,
+            0x0000000000804080,
+            0x0000000001020100,
+            0x0000000002050200,
+            0x00000000040A0400,
+            0x0000000008140800,
+            0x0000000010281000,
+            0x0000000020502000,
+            0x0000000040A04000,
+            0x0000000080408000,
+            0x0000000102010000,
+            0x0000000205020000,
+            0x000000040A040000,
+            0x0000000814080000,
+            0x0000001028100000,
+            0x0000002050200000,
+            0x00000040A0400000,
+            0x0000008040800000,
+            0x0000010201000000,
+            0x0000020502000000,
+            0x0000040A04000000,
+            0x0000081408000000,
+            0x0000102810000000,
+            0x0000205020000000,
+            0x000040A040000000,
+            0x0000804080000000,
+            0x0001020100000000,
+            0x0002050200000000,
+            0x00040A0400000000,
+            0x0008140800000000,
+            0x0010281000000000,
+            0x0020502000000000,
+            0x0040A04000000000,
+            0x0080408000000000,
+            0x0102010000000000,
+            0x0205020000000000,
+            0x040A040000000000,
+            0x0814080000000000,
+            0x1028100000000000,
+            0x2050200000000000,
+            0x40A0400000000000,
+            0x8040800000000000,
+            0x0201000000000000,
+            0x0502000000000000,
+            0x0A04000000000000,
+            0x1408000000000000,
+            0x2810000000000000,
+            0x5020000000000000,
+            0xA040000000000000,
+            0x4080000000000000,
+        ],
+    ],
+]
+
+ZOBRIST_KEYS = [
+    [
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+    ],
+    [
+        -6664897935236317750,
+        -1357698273264466443,
+        5884654911090608791,
+        -7931983249642985699,
+        3891695359735476097,
+        -803778981846756060,
+        -1866339136188209537,
+        483381647664452385,
+        -3771402785914687698,
+        -7434486691051625446,
+        4903985464010966934,
+        -7957821548127224058,
+        -1223033838372832279,
+        7927704523267074804,
+        4921990439379022035,
+        2178076656174594095,
+        -7670995601348598017,
+        1697117513505434658,
+        -4204945355086948382,
+        -331337708530197110,
+        5467840327974007883,
+        -2542842032933776991,
+        8387235992836292585,
+        5800395624533422254,
+        -3148251496988002900,
+        -8330507397781643871,
+        -2460558962981627465,
+        -5770076921103886282,
+        -2270416591245971837,
+        -7299092955909811691,
+        786330107652755947,
+        -1035487966212427541,
+        1127732873535295958,
+        -6216358335052438867,
+        7787056572017670452,
+        4355145303236179421,
+        19570571422698867,
+        -4595423710110832783,
+        -7253954943609509888,
+        3810945570807517412,
+        -1075917446874049184,
+        6036115755888558705,
+        8516627088906365970,
+        -7010398461548895273,
+        1413959309380599427,
+        4144807815435746287,
+        3394175292607391444,
+        -1406325611629623131,
+        -6069917674739870158,
+        -9189575375290057274,
+        -5585716369197477837,
+        6587327267168240589,
+        7937208013616801707,
+        -2342127848752860538,
+        7806818076280983755,
+        8463831914641551575,
+        537898267514769429,
+        -5541476853358423510,
+        -1211069150970930131,
+        -2201420452225922671,
+        -2822863970154271608,
+        821297176011314391,
+        -9042097979811002093,
+        4065853193428120278,
+    ],
+    [
+        5536634489839024008,
+        554264177268687748,
+        8156758902255089904,
+        -2707621728720910365,
+        8737775146437213766,
+        -2592362361834832818,
+        7712992356254236362,
+        7837148553798363702,
+        3241292636768274160,
+        -3707687254192870139,
+        -3954665124843372444,
+        2385923344911432445,
+        -2408580070589828819,
+        -7333990302806342496,
+        -7879866561589578356,
+        -5344999674498238848,
+        -6950326994134545055,
+        -1232958532557064720,
+        -2224327823758725769,
+        -5550280167302775657,
+        7685139160121129217,
+        5955739594991376646,
+        530579553641432552,
+        -5483238061835504842,
+        7967480497246964896,
+        -3359651344318354990,
+        -4714004620042737126,
+        -161269158115990899,
+        2578128825626836402,
+        -6372336724754283543,
+        -7261310263595553747,
+        -2523247942312570167,
+        -227368021115011240,
+        -2176292790006924028,
+        7277917984060661292,
+        1081088843845279097,
+        7448020078116991127,
+        5018835682645814991,
+        -2587417350879929478,
+        7316446928155141221,
+        -7063210229388564763,
+        6752433431408019655,
+        -6507539254522075721,
+        748870230136295454,
+        5796668924895587737,
+        252224888676405171,
+        -2642261307488698821,
+        -1997206807527740768,
+        4745243170923771161,
+        5524965631168515838,
+        3560184995441759615,
+        5149426969978415473,
+        4354115737034152635,
+        4076750846452621168,
+        4203827300241170513,
+        3541714567828147048,
+        -8525960088788537572,
+        2490237397237850113,
+        -3810254874638614521,
+        8929190776729622767,
+        -7103269140068415356,
+        8193072458430564522,
+        3373063770362534370,
+        5473949354209043059,
+    ],
+    [
+        -5316603379635581022,
+        1060826802164926130,
+        -8744161204468145286,
+        -8899358663513826727,
+        -8355831571374777926,
+        611678018002033572,
+        -6296792753817259709,
+        661546272619451595,
+        6813786715910418321,
+        3749762484646492141,
+        3833545191604519486,
+        -358193053970367070,
+        -2329168845780305390,
+        2078345267559301749,
+        -8791383499524855779,
+        -810317194161825936,
+        -7682488691123543016,
+        -548642826392126142,
+        3602516677755576694,
+        -8929991572541979749,
+        -7767116435498750415,
+        -6786280443183342164,
+        7219873341141679826,
+        -5327349200760807028,
+        3808776094401443041,
+        6840434844591350581,
+        -7391087720216007108,
+        -2940258068060702263,
+        908746948179356695,
+        -7156564265574316713,
+        -8803759560701340006,
+        -6780565697737223163,
+        6196060584487443011,
+        5120523314454659585,
+        3113711092621068941,
+        -1127454813449701285,
+        8581500179977347053,
+        6116883168838267532,
+        -3792202684039022706,
+        -2611311929580200835,
+        939460667742851557,
+        2678055349343725346,
+        3663352279504856199,
+        3502675822973424092,
+        1376911226637132905,
+        -5693047036633592506,
+        3682245990986289570,
+        -2924936011111479008,
+        8883188542866513329,
+        2484491507800097720,
+        -1322968221698582836,
+        8577685621453845644,
+        -1204237608443814246,
+        5051397340412202715,
+        -6107317469789843031,
+        -4839882279698580742,
+        -2688209977339407538,
+        7090202352622712054,
+        -6779136506877636406,
+        1970332845142298269,
+        -5442620515764504486,
+        1357508188028060427,
+        775655149129289215,
+        -1151767389025970772,
+    ],
+    [
+        -1000613917335721667,
+        4825541109432497612,
+        712211869192677445,
+        -464783324533518962,
+        -8824828734568388561,
+        -6514569624715885817,
+        9046455510132760842,
+        -9166094193069802669,
+        7880364116462245326,
+        -5678933089723314067,
+        -4658987884689117227,
+        5802496173926730979,
+        8715986269029201245,
+        8002085871608956488,
+        3593811577039816876,
+        -6374055564294832587,
+        7562678823992498483,
+        6113006692634995041,
+        9175539468477768406,
+        2840924662390141550,
+        -6208836655351422390,
+        1310602465896611691,
+        -3683968420592759633,
+        1593977730857694201,
+        2316413373548100906,
+        -2992851421179379983,
+        -3233566060359480919,
+        8800758954690164789,
+        -4785022669432374714,
+        -1004113164099616122,
+        1391812007891230763,
+        -823431513467519176,
+        7954398814030148669,
+        6555811446835934308,
+        2661259413772734552,
+        -1581197762144281010,
+        5519541064044482769,
+        2447772820801505749,
+        4386944870609107855,
+        5118219509823440089,
+        1467422804434561657,
+        318692564643198269,
+        -7942362115565883684,
+        -5668440091864428308,
+        -2616690632587357038,
+        -2179162754641614411,
+        -7231776725616990164,
+        -9073382470003232942,
+        9017299071733609189,
+        8653433964860850332,
+        4364461198046836230,
+        371063497503209781,
+        3245087656899458308,
+        -3150022292758660892,
+        -3849477594538936593,
+        2232376688931921796,
+        -5798012900685705772,
+        5672096765732342919,
+        8738822909186439479,
+        -7173385819837678921,
+        -5046843337597754689,
+        3197990864038910966,
+        -7385486634473499250,
+        2786712790012759112,
+    ],
+    [
+        -8380208192384026670,
+        -2865666977847514037,
+        -6298472454845856597,
+        8559528235067478505,
+        -7112207438734762639,
+        -6430397154415046661,
+        -4070640941923729445,
+        -8083379188404581159,
+        8871515180389869139,
+        -7551302936975223734,
+        3700373807679708863,
+        -4045140370345806154,
+        3645739343282821521,
+        1245045166814098430,
+        8981655780507796296,
+        9052589775352274462,
+        -6665918310220049714,
+        -6915594220280454346,
+        -4243110236122786599,
+        -8956572688326391286,
+        -1981045927882914722,
+        4224899119527881465,
+        -7204653747675817979,
+        8758497403786045662,
+        -7253853909555255223,
+        8014278261175375470,
+        3574692422113708368,
+        -3843880158437332897,
+        -3202354019372137762,
+        -4860229557671576300,
+        -7104261569777982153,
+        1622134376852737568,
+        3109481312422170001,
+        -5070448357943802084,
+        4728884329123981414,
+        668406523815951598,
+        -2886364234959030382,
+        -8226125368079583175,
+        -6755224160346604620,
+        -5660346310719059484,
+        -2149589671985763223,
+        -4598563750579278094,
+        -7004774570850777964,
+        1062898409336411827,
+        -2180184555005514915,
+        605941590788058893,
+        3703777759758576396,
+        -4338588944810276169,
+        305078588077139092,
+        8019133070371930155,
+        8569802546853946200,
+        6160483052623903304,
+        2398446050841743754,
+        -7888852197421290721,
+        -8520980860293247480,
+        3514062977993700168,
+        5935166347560978071,
+        -5280606780829593995,
+        -85276749951567460,
+        -7316686165917830786,
+        -5087603179090448762,
+        -5776055780172319647,
+        -1670358211707493197,
+        6576038554754321471,
+    ],
+    [
+        -9129302761145381579,
+        6060435678448263964,
+        -3624912036337919925,
+        -6345179480472830821,
+        -2356082242213623368,
+        7484489354518102745,
+        -3350916336297477209,
+        -7862009127075240686,
+        2661152288224784672,
+        -7737641937469808649,
+        8022459528256250971,
+        1438297543418233276,
+        -406168863811074701,
+        605333063870832413,
+        8749845655990628989,
+        6854368307676406411,
+        3995800404122854032,
+        4441674986651081176,
+        -2910771982760152257,
+        3681158616894699195,
+        5306762426190575653,
+        2171737588607950804,
+        3247122944344192897,
+        4560425814720787905,
+        -4827737636628674970,
+        -4332413470866829362,
+        51487294052926424,
+        6131702678945377171,
+        3684886653725094169,
+        4271606224638936415,
+        -7161229336379330929,
+        -6035193707817653262,
+        -5637154603822711807,
+        4981385755493677245,
+        4177288038852675901,
+        -2803437823718996793,
+        3409090514803816522,
+        -1892134498384751409,
+        5172338726961357688,
+        -6437952720995970679,
+        6256865003333976519,
+        4817063341052371324,
+        8832765153193720957,
+        5762826155870947428,
+        1907291497232837070,
+        5432203497249543990,
+        1830927516439957865,
+        3244590009574216633,
+        1461593965856831481,
+        5548289116437283971,
+        2990012848317717050,
+        -6968977848547617238,
+        -8382610117489004132,
+        1926164776509112281,
+        4654456213064269810,
+        -6981121165167461606,
+        3842295748193421251,
+        -2577581362824424872,
+        -619751817563607198,
+        -7167012544487607473,
+        1104662622697354641,
+        1856178442308974285,
+        5622299470979662763,
+        5543811561667553153,
+    ],
+    [
+        4854717910117235588,
+        9003917901728184145,
+        8801070267073996144,
+        -8015591121766483745,
+        4515305147307181078,
+        -4343806666875210401,
+        -7682651316027509955,
+        -3445332839142225410,
+        4441891428106582553,
+        -7604560082397222539,
+        -5102090516488669152,
+        -6786819488636492536,
+        -3412028190260208131,
+        -3603406138325482675,
+        2892833705041046751,
+        590899194965328531,
+        2251802701196060059,
+        801425770006838,
+        7409584098487488601,
+        4705185069210195502,
+        1854630523071104120,
+        -4643451060600450579,
+        9156192857429260786,
+        3968883521951286386,
+        -5391832858281948829,
+        -361389009378674456,
+        5433193496537267807,
+        4185710377923285491,
+        -4763011952487156320,
+        -2573116044665926797,
+        5917746678223118657,
+        -4186797356445786053,
+        4960550548419350134,
+        6735700782442025245,
+        7787394371090496522,
+        -4813712358599795282,
+        4047621039567572054,
+        3103430541997391347,
+        -1199082001698177617,
+        -8928181332546700616,
+        5068865445791271155,
+        -3142281080031434517,
+        844243702488931454,
+        -4469689554826811197,
+        -2964431255984108328,
+        7484897536659901036,
+        5134169939541971299,
+        -3150024300613206318,
+        3856366435603617220,
+        4217645516680774013,
+        1365436538921363621,
+        -4927983725371729325,
+        3346392224451146035,
+        6359099585619629777,
+        151892455502100589,
+        -6376487356971356244,
+        -7935296209957754097,
+        241677154522608689,
+        8209384112838034305,
+        74579878581156857,
+        5886167354777815755,
+        2951179939931750721,
+        7554001703512086673,
+        -8032586600937338098,
+    ],
+    [
+        2745891183554230805,
+        2641399440584980952,
+        -4312391660707035136,
+        -777044338247347338,
+        8123350720518644519,
+        7607994033911668731,
+        -6824294045759226031,
+        -1004463536530891283,
+        -5550387021808653598,
+        3944809318423028795,
+        2640865519715833321,
+        6556722299641673378,
+        -4845208045968385818,
+        7184064541294940737,
+        5914646524554378466,
+        8841319146104558179,
+        6004402084908648154,
+        3902635449770142610,
+        8636909678022488463,
+        -2382809367391621317,
+        8368737550834573507,
+        -1174734553431554636,
+        -1451079791854217286,
+        8003787513760460936,
+        -5285670717242356925,
+        1067966903292290715,
+        -139936033956191315,
+        -4013240761840712490,
+        -955137896250267084,
+        1969028028592492242,
+        4358319936491417684,
+        -1491415978772666929,
+        -3150075929573282627,
+        9123288463327304474,
+        4628066054176142150,
+        3785755718903536775,
+        7554729536184065159,
+        -8125684704573870744,
+        -4501446450837098354,
+        -5126791230788396061,
+        -8233481345780127418,
+        -4431150799151906446,
+        4272254119209906833,
+        8952252115254741129,
+        5029631832233770634,
+        -2486154195553313485,
+        5913619532222173764,
+        192657390338871654,
+        -4935919811037430989,
+        4776272022325994981,
+        5495167981729540666,
+        5947844428300631004,
+        275348333167997251,
+        5741939095421278485,
+        -5164389297662242313,
+        3114074130540007790,
+        8096086898422451837,
+        -731394565326328039,
+        -7787939977070656527,
+        8230186704453351815,
+        -903523543359768456,
+        4658890325563447154,
+        4373870354891647295,
+        2497938221819029241,
+    ],
+    [
+        6565490862652509229,
+        6242606849228292311,
+        2489539333044426591,
+        7429526838736390586,
+        801033854586769559,
+        2131029950126366022,
+        -2385545492863583710,
+        -444088791883266338,
+        6522235705425026330,
+        6075262479940689161,
+        7535390002777147291,
+        6907773521916112476,
+        1361518607868740005,
+        -3541307999328066512,
+        1816115358834355774,
+        8358342590622514670,
+        -535480659100648486,
+        -8386965949386969557,
+        7334872311591748376,
+        -4193383183902837573,
+        -3604323799667009376,
+        6435830439016016238,
+        -1341854593541733889,
+        6373368807308466950,
+        6988109748688651933,
+        1321498141003594158,
+        -5082859236098328912,
+        -3081526993951325911,
+        -8293626277773761045,
+        -2256920758971185558,
+        841258502312554809,
+        6605101089198604341,
+        7881591074058843113,
+        1296180919307278182,
+        8785693363699211556,
+        4406675185430993508,
+        -8064135330036412807,
+        9002377810116873357,
+        662674248957864661,
+        -7069176444992912694,
+        -903165700182606129,
+        -7544284351265662127,
+        -4673045936211791445,
+        -3316676635179358380,
+        5509483078698364928,
+        1431034578035447354,
+        -7325887672347785874,
+        -780907555601755662,
+        -8125638533729126780,
+        844712634418644221,
+        -4697998846531962666,
+        280167907204309691,
+        -6904550420589795778,
+        -2378484317898578390,
+        62336533846890933,
+        876484195155730578,
+        2210341346401403509,
+        1824173395152846020,
+        -6374885693091000192,
+        -2109152945388067821,
+        1373682638314336016,
+        -4385016739399553457,
+        3468423141982296707,
+        4418259682266436790,
+    ],
+    [
+        3350739946147279610,
+        -7758963422196969989,
+        5625496492317947920,
+        -4359836027989016284,
+        -745940795498541175,
+        2789054668166707177,
+        -8006364439513707876,
+        5427186651625660917,
+        -2788946766520629043,
+        -6981943848293105477,
+        -8494035610572029184,
+        -3822880029240778639,
+        5462395377656652945,
+        1015953880628040612,
+        -9135571998465295457,
+        -2939714544883823208,
+        -8212063439092880816,
+        -1188959652977405341,
+        -5069283302170413891,
+        -4557945456833915101,
+        -159720212214068888,
+        6818567284795468945,
+        7818028760484191016,
+        1052869984597690855,
+        5776170183250741533,
+        3798088672949552613,
+        -2926780398956167053,
+        -2900933574674347678,
+        -5924064744945146860,
+        4292396545296708741,
+        -6619166433941586079,
+        4176302770435014350,
+        584792869543242804,
+        -8801314813152670336,
+        6192498978628721591,
+        -9082079655576654650,
+        9014271189482248477,
+        -6071861122477107965,
+        250816181531698577,
+        -3315158820939275731,
+        2819643136411189621,
+        2662631988053645485,
+        5397557867066146470,
+        3920581031787622770,
+        6835014108610841823,
+        3711552318658582081,
+        8610076116053523824,
+        -547429315676201629,
+        -1167924969152495746,
+        -3733806744201585389,
+        5409447538133180495,
+        837056144641635448,
+        -7445445129615534244,
+        2306105871138849019,
+        -1996628570028172394,
+        -7424113010770593527,
+        -9079988113073747834,
+        6243975739557301410,
+        -1530687925530754011,
+        -7783509067877077675,
+        286686681783272571,
+        -6377480549907862173,
+        -5954992928454350352,
+        7067216231641837917,
+    ],
+    [
+        -4206805969581051921,
+        -8771747372727536971,
+        8383612538015906466,
+        -1009028143763882323,
+        -5026178851147503935,
+        -6985475894571420844,
+        -5195318014737504524,
+        625244020421713352,
+        1615347909062885725,
+        -8858969765105239782,
+        4386080819550754039,
+        -1998126912702714474,
+        -5464587147259904726,
+        -4392466487880372436,
+        8662189887172959665,
+        7383487794680301662,
+        3070886953108944553,
+        4434199473959401274,
+        -6043488983015564872,
+        2830135092404807029,
+        -1832796451425790530,
+        6731813600916921789,
+        -3002620561328345420,
+        -1675313839863872608,
+        4372757132183620629,
+        -8160993476422120141,
+        3642027994222514360,
+        -6716366554842879006,
+        5356055022384200473,
+        -3860749281032724687,
+        -7730530061321622648,
+        7732292878748269941,
+        -2195906214191930944,
+        -4300460392255924967,
+        -1762183484210977099,
+        -2489782185219258586,
+        -3112517388520782285,
+        5169275595651532210,
+        7407917491593568731,
+        -1213403418845994718,
+        -6837294146416668475,
+        3117630742589894804,
+        3935065195189438991,
+        -4673154661469103336,
+        -8482151180644949440,
+        -2258469539858379045,
+        -739258431576542518,
+        9037077099756428407,
+        1683333197431832226,
+        2950829070761627596,
+        -6688356324749418820,
+        -8199813923660642466,
+        -5752916631943263251,
+        -4385235846811154864,
+        6772262434030868072,
+        6131827269179168833,
+        -3921887743538233428,
+        -8071741053249768227,
+        -4164873444917996543,
+        -8835539898861388705,
+        3340329756936260734,
+        1438096718629208284,
+        8461152581686812720,
+        -7077777790762004100,
+    ],
+    [
+        7463620662245206239,
+        7541462888528596770,
+        -2943902749854769257,
+        7086012959351808565,
+        763681384763714479,
+        623258608789234440,
+        1805194379697900291,
+        -8337942995767372075,
+        -380738626934502398,
+        -8981684058520105281,
+        4369909599120660107,
+        -2467730489290219730,
+        4016212291613849601,
+        5361454484359568788,
+        328392435280140761,
+        -5254596817549861717,
+        -2985044552889965426,
+        4447984420833904715,
+        -2285799262289736670,
+        -2926847717088738144,
+        870369696568834476,
+        7311493866194364136,
+        -3744306574878095920,
+        7621555944451764459,
+        -2366191307739890589,
+        -27002853636130347,
+        -9087503755551919460,
+        -157954863308944895,
+        2018076244051378266,
+        2514817965284212711,
+        -2436071306079426992,
+        -9190290466476848888,
+        3411507909995043728,
+        7857606830906578716,
+        5993574269529665018,
+        -7494761394181143714,
+        3028676844558158552,
+        6022145846006792539,
+        -981606136721039122,
+        701837942485184504,
+        832168941460633499,
+        -3942961191746906380,
+        -16327271330565535,
+        8830401213941943993,
+        5950826994987189881,
+        -7983881953342724507,
+        4106230277510129790,
+        -4681208150140389475,
+        -716617925927476268,
+        -7528108684896066412,
+        -8616798050212562096,
+        9186051512923580428,
+        4920368991059024702,
+        7453508224546468863,
+        -8361903732434412945,
+        -9223143490007484399,
+        4523376406207276635,
+        -6484408778664121185,
+        2166182589434108006,
+        -3065838181961796933,
+        -1265614378499875794,
+        3965983962242435190,
+        3981275731542164948,
+        7329451964333284548,
+    ],
+    [
+        1731439127186242018,
+        842368990648328204,
+        -3369190140436731156,
+        7447611741406674918,
+        4536932470345529113,
+        4750958396598457179,
+        8388515918518920495,
+        3401921474550008617,
+        8839174907549596943,
+        6861764407699033978,
+        -4480731047975504195,
+        3361884530765405336,
+        -5285706531323531543,
+        6175439710715248811,
+        2397972198477973162,
+        4052235393695861634,
+        2545655543846261198,
+        -7391131420505284332,
+        -6801506761586931272,
+        -3163417480243148735,
+        7934553750773713942,
+        -6231411721025158848,
+        -7562732923036654995,
+        -5056995628921241961,
+        3980772462276392311,
+        9183134596605109009,
+        -5080669748339432523,
+        6142449291090956435,
+        -5246276155188720345,
+        -4570248697785535218,
+        3735905287201333630,
+        -90858587436985897,
+        6531277870630541056,
+        3083062519463493612,
+        -7331297447399370274,
+        -7933541671861406960,
+        3500324126722852451,
+        -8873456816283448423,
+        -6172240938887774325,
+        8763343762973091192,
+        1245992257371458081,
+        -15823517665272776,
+        6807458757884795751,
+        5363988668624592124,
+        -3076079547442608178,
+        2889926811251685592,
+        3834840281633944520,
+        -7769369330286780447,
+        4858544315321898538,
+        -3018501480397940127,
+        7561907982545160950,
+        5778859347853551943,
+        87515532004044665,
+        -638232141148105696,
+        -1902215738334536653,
+        8987939553708685518,
+        -1459365359279034207,
+        5897401928665828188,
+        9075583465970481808,
+        4941652037978745069,
+        -4911817749020748314,
+        2455718899081338040,
+        -6481977054362205985,
+        -5964469016608652655,
+    ],
+    [
+        2184675121084795462,
+        -4200885086870947338,
+        2921530523451391266,
+        -3817480115568118784,
+        -3959463229949011909,
+        -5187608846519241165,
+        -3789070873608624680,
+        -538931350530623430,
+        -7467614995321503781,
+        3745832556129370036,
+        -3124350055196983686,
+        8822310869879994912,
+        7093077126522124932,
+        -7240032117614647704,
+        -686396431937018498,
+        -7473282144338289693,
+        6836105942897321192,
+        -924928602327054016,
+        4612252543429052291,
+        -5442544401710719806,
+        7027835927631905650,
+        598010212149196310,
+        -8388164347430472355,
+        -2984977662264596205,
+        1652726706589387389,
+        -4562210130950128283,
+        -6259526884899595965,
+        -7151405897698635578,
+        7490899548356432317,
+        -6086020695425755893,
+        -6514868838878320680,
+        6871072298045329069,
+        -7055121960324853883,
+        3788727476004341491,
+        -8240250877744718748,
+        3877285413492926787,
+        8378356028366971008,
+        -141060354913824973,
+        -3728955433482937194,
+        7336949208519392104,
+        -95839394668417347,
+        4959966200183207306,
+        1665913617354621963,
+        5468795926942775964,
+        -1939817453190420612,
+        -4739471777974913253,
+        939231491591314489,
+        -8253735021269819523,
+        -9040198866057768556,
+        -892350394943273160,
+        636576597852394574,
+        2303359397924503047,
+        1808204698236239913,
+        -1619421665110030277,
+        8565978527342966335,
+        -541425818303376203,
+        4486339282994348519,
+        -5062380103512652168,
+        5641190363784465626,
+        2094986887206772129,
+        -6928199256796338667,
+        2928762925283983701,
+        -2755793589079891892,
+        -1858506239838535910,
+    ],
+]
+
+ZOBRIST_LAST_FROM = [
+    7135555904065831180,
+    3029070889343911010,
+    -4101594151324331302,
+    -8768358829895435984,
+    1015218777431942222,
+    -3894107608866650595,
+    5290790767663140962,
+    2368636863103313292,
+    252873759715578392,
+    -8423707414035724939,
+    -1905998506986457902,
+    -1783146963519920722,
+    -6698618355143163376,
+    1319718370137495975,
+    4952370061274313234,
+    5766698180552985153,
+    -5166738378979683458,
+    1371487751761169653,
+    7653901271342382750,
+    3250551896028306414,
+    2285925393568620057,
+    3595494167450504380,
+    1102881366383985057,
+    -6932867559229739445,
+    5565058189344326002,
+    -602770801109743155,
+    4593700395681691139,
+    -2454523225576864603,
+    -2502135164099824373,
+    -452854676694757344,
+    -8479938817998768049,
+    -4334132814655294648,
+    1719920397427806976,
+    -3422278080046956559,
+    962784456820779835,
+    -8430288402972315891,
+    9083607138796238301,
+    8014937897345209969,
+    2902381862869011215,
+    1531652924861473121,
+    -1073968006009692068,
+    2747189735664173486,
+    8984644424440298727,
+    -2112424991637787024,
+    -7221457859154838129,
+    -8191556297173384336,
+    -1824358396502111692,
+    -5319697669900271352,
+    4634694555631316098,
+    4470871639448017904,
+    -5311946215855668480,
+    -6127170787857462489,
+    -4952383665473114818,
+    -1907538704705834520,
+    1960170809301757206,
+    5064896469848950070,
+    -6436012293084799577,
+    -2072369073021629311,
+    5054129360109814018,
+    -771422524150382921,
+    875427336798918380,
+    7506991849401881938,
+    7974439843254029902,
+    8919038973261653951,
+]
+
+ZOBRIST_LAST_PIECE = [
+    0,
+    -1876643280757881728,
+    -3051092461290045341,
+    -2304007151318111749,
+    804319456841708704,
+    4605897932592262124,
+    -2181223152944324015,
+    -5120508282780359275,
+    4725068794582534846,
+    6175637516858489221,
+    2605119532509393103,
+    -342271171179126723,
+    2691348655557448614,
+    -2742908443246033352,
+    -2708571160252078923,
+]
+
+ZOBRIST_PUSH = -8993754769675041483
+
+ZOBRIST_SIDE = 416404860724340598
+
+ZOBRIST_STEPS = [
+    8004025086298868713,
+    7638394607194208434,
+    -1338113248816925588,
+    468263976398724376,
+    -5212052708496142599,
+]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""Opening books built from game records
+
+A book file is a header followed by fixed size records of (position key,
+move code, weight, games, wins) sorted by key and move code. Lookups map the
+file into memory and binary search it, so a book can be far larger than
+what is worth reading in for a single game.
+
+Positions are keyed by Position.canonical_key so a position and its mirror
+image share their entries. Moves are stored for the orientation whose
+Zobrist hash is the canonical key and mirrored back when looked up from the
+other one.
+
+Moves are stored as the 64 bit move codes of pyrimaa.notation.pack_move.
+"""
+
+import mmap
+import struct
+import sys
+import time
+from argparse import ArgumentParser
+
+from pyrimaa import pgn
+from pyrimaa.board import BLANK_BOARD, Color, IllegalMove, Position, _get_rng
+from pyrimaa.notation import (
+    MoveKind,
+    decode_move,
+    encode_setup,
+    encode_steps,
+    pack_move,
+    unpack_move,
+)
+
+MAGIC = b"AEIBOOK\x00"
+VERSION = 1
+
+# moves from the start of each game that are put into a book by default
+DEFAULT_MAX_PLY = 20
+
+# magic, version, record count
+_HEADER = struct.Struct("<8sIQ")
+# key, move code, weight, games, wins
+_RECORD = struct.Struct("<qQIII")
+_KEY = struct.Struct("<q")
+
+
+def _flip(pos):
+    """7 if book moves for pos are stored mirrored, otherwise 0"""
+    return 7 if pos.mirror_key() < pos._zhash else 0
+
+
+def encode_move(pos, kind, items):
+    """Code for a decoded move made from pos, in the orientation of its key"""
+    return pack_move(pos.color, kind, items, _flip(pos))
+
+
+def decode_move_code(pos, code):
+    """Decode a move code for pos into its kind and steps or placements"""
+    return unpack_move(pos.color, code, _flip(pos))
+
+
+def build_book(games, path, max_ply=DEFAULT_MAX_PLY, min_games=1):
+    """Write a book of the moves played in games to path
+
+    games is an iterable of (moves, winner) pairs, moves being the move
+    strings of a game starting with the setup and winner the Color that won
+    or None. Only the first max_ply moves of each game are used and moves
+    played in fewer than min_games games are left out. A game with an
+    illegal move is used up to that move. The weight of each move is the
+    number of games it was played in.
+
+    Returns a dictionary with the games read, those with an illegal move,
+    the positions and moves written and the seconds taken.
+    """
+    start_time = time.perf_counter()
+    counts = {}
+    total = 0
+    bad = 0
+    for moves, winner in games:
+        total += 1
+        pos = Position(Color.GOLD, 4, BLANK_BOARD)
+        for move_str in moves[:max_ply]:
+            try:
+                kind, items = decode_move(move_str)
+                if kind == MoveKind.SETUP:
+                    result = pos.do_setup(items)
+                else:
+                    result = pos.do_move(items)
+            except (IllegalMove, ValueError):
+                bad += 1
+                break
+            entry_key = (pos.canonical_key(), encode_move(pos, kind, items))
+            entry = counts.get(entry_key)
+            if entry is None:
+                entry = counts[entry_key] = [0, 0]
+            entry[0] += 1
+            if winner == pos.color:
+                entry[1] += 1
+            pos = result
+    records = sorted(
+        (key, code, played, wins)
+        for (key, code), (played, wins) in counts.items()
+        if played >= min_games
+    )
+    with open(path, "wb") as book_file:
+        book_file.write(_HEADER.pack(MAGIC, VERSION, len(records)))
+        for key, code, played, wins in records:
+            book_file.write(_RECORD.pack(key, code, played, played, wins))
+    return {
+        "games": total,
+        "illegal": bad,
+        "positions": len({record[0] for record in records}),
+        "moves": len(records),
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+class Book:
+    """A book file mapped into memory for lookups
+
+    Raises ValueError if the file is not a book.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file can not be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book") from None
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+        magic, version, count = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is book version {version} not {VERSION}")
+        if len(self._map) != _HEADER.size + count * _RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _records(self, key):
+        """The (move code, weight, games, wins) records for a position key"""
+        book_map = self._map
+        lo = 0
+        hi = self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _KEY.unpack_from(book_map, _HEADER.size + mid * _RECORD.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        records = []
+        for num in range(lo, self._count):
+            record = _RECORD.unpack_from(book_map, _HEADER.size + num * _RECORD.size)
+            if record[0] != key:
+                break
+            records.append(record[1:])
+        return records
+
+    def lookup(self, pos):
+        """The book moves for a position
+
+        Returns a list of (move string, weight, games, wins) tuples, wins
+        being the games won by the side that played the move, with the
+        heaviest moves first. The list is empty if the position is not in
+        the book.
+        """
+        moves = []
+        for code, weight, games, wins in self._records(pos.canonical_key()):
+            kind, items = decode_move_code(pos, code)
+            if kind == MoveKind.SETUP:
+                move_str = encode_setup(items)
+            else:
+                move_str = encode_steps(pos, items)
+            moves.append((move_str, weight, games, wins))
+        moves.sort(key=lambda move: move[1], reverse=True)
+        return moves
+
+    def choose(self, pos, rnd=None):
+        """Pick a book move at random in proportion to the move weights
+
+        rnd can be a random.Random instance or a seed, by default the random
+        module is used. Returns None if the position is not in the book.
+        """
+        moves = self.lookup(pos)
+        if not moves:
+            return None
+        rnd = _get_rng(rnd)
+        return rnd.choices(moves, weights=[move[1] for move in moves])[0][0]
+
+
+def main(args=None):
+    """Main entry point
+
+    Builds an opening book from files of game records.
+    """
+    parser = ArgumentParser(description="Build an opening book from game records")
+    parser.add_argument(
+        "-p",
+        "--plies",
+        type=int,
+        default=DEFAULT_MAX_PLY,
+        help="Moves from the start of each game to put in the book, counting "
+        "the setup moves",
+    )
+    parser.add_argument(
+        "-m",
+        "--min-games",
+        type=int,
+        default=1,
+        help="Leave out moves played in fewer games than this",
+    )
+    parser.add_argument("book", help="Book file to write")
+    parser.add_argument("games", nargs="+", help="PGN files of games")
+    config = parser.parse_args(args)
+    if config.plies < 1:
+        print("Plies must be at least 1")
+        return 1
+    if config.min_games < 1:
+        print("Min games must be at least 1")
+        return 1
+
+    def read_all():
+        for filename in config.games:
+            with open(filename) as game_file:
+                yield from pgn.read_results(game_file)
+
+    result = build_book(read_all(), config.book, config.plies, config.min_games)
+    print(
+        f"Read {result['games']} games, {result['illegal']} with an illegal move, "
+        f"in {result['seconds']:.3f}s"
+    )
+    print(
+        f"Wrote {result['moves']} moves for {result['positions']} positions "
+        f"to {config.book}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -90,7 +90,7 @@ class Game:
             elif self.position.is_rabbit_loss():
                 result = (0 - min(self.position.is_rabbit_loss(), 0), "e")
             else:  # immobilization
-                assert len(self.position.get_steps()) == 0
+                assert not self.position.has_legal_step()
                 result = (self.position.color ^ 1, "m")
         self.result = result
         return result
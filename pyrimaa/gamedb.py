@@ -0,0 +1,556 @@
+#!/usr/bin/env python
+"""Game database indexed by the positions reached
+
+A database file holds every game as a list of 64 bit move codes (see
+pyrimaa.notation.pack_move), an index of (Zobrist key, game, ply) entries
+sorted by key and a table with the piece bitboards of each distinct position
+in the games. Queries map the file into memory, a position is found by
+binary search of the index and bitboard patterns are checked against the
+position table, so no games are replayed to answer them.
+
+Building streams the moves to disk and sorts the index and position table
+in runs that are merged into the file, so only a few runs of records are
+held in memory however many games are read. The file takes about 120 bytes
+per ply, most of it for the bitboards of the positions. A database can be
+extended with more games, the existing tables are merged with those of the
+new games rather than rebuilt.
+
+Games are numbered from 0 in the order they were added. The position at ply
+n of a game is the one after its first n moves, the empty board before the
+setup is not indexed.
+"""
+
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from pyrimaa import board, pgn
+from pyrimaa.board import BLANK_BOARD, Color, IllegalMove, Piece, Position
+from pyrimaa.notation import (
+    MoveKind,
+    decode_move,
+    encode_setup,
+    encode_steps,
+    pack_move,
+    unpack_move,
+)
+
+MAGIC = b"AEIGMDB\x00"
+VERSION = 1
+
+# magic, version, games, moves, index entries, positions
+_HEADER = struct.Struct("<8sI4Q")
+# first move, number of moves, winner or -1 when not known
+_GAME = struct.Struct("<QHb")
+_MOVE = struct.Struct("<Q")
+# key, game, ply
+_ENTRY = struct.Struct("<qIH")
+_KEY = struct.Struct("<q")
+# key, color to move, bitboards of the pieces in _PIECES order
+_POSITION = struct.Struct("<qB12Q")
+
+# records sorted in memory at a time when building, and records read or
+# written at a time when merging them
+_RUN_SIZE = 1 << 16
+_CHUNK = 4096
+
+_PIECES = tuple(
+    piece for piece in range(Piece.GRABBIT, Piece.COUNT) if Piece.PCHARS[piece] != "x"
+)
+
+# pattern tokens that match any gold piece, any silver piece or no piece
+_ANY_GOLD = "G"
+_ANY_SILVER = "S"
+_EMPTY = "."
+
+
+def parse_pattern(text):
+    """Parse a bitboard pattern of piece and square tokens
+
+    A token is a piece and a square, "Ed5" needs a gold elephant on d5 and
+    "rc6" a silver rabbit on c6. "G" or "S" in place of a piece needs any
+    gold or silver piece on the square and "." needs it to be empty. So
+    "Ed5 Sc6" is a gold elephant on d5 with a silver piece on the c6 trap.
+
+    Returns a tuple of ((table index, bits) for each piece type, gold bits,
+    silver bits, empty bits) for find_pattern. Raises ValueError for a bad
+    token.
+
+    """
+    pieces = {}
+    gold = silver = empty = 0
+    for token in text.split():
+        if len(token) != 3 or token[1:] not in board.SQUARE_NAMES:
+            raise ValueError(f"Invalid pattern token {token!r}")
+        bit = 1 << board.alg_to_index(token[1:])
+        pchar = token[0]
+        if pchar == _ANY_GOLD:
+            gold |= bit
+        elif pchar == _ANY_SILVER:
+            silver |= bit
+        elif pchar == _EMPTY:
+            empty |= bit
+        else:
+            piece = Piece.PCHARS.find(pchar)
+            if piece < 1 or pchar == "x":
+                raise ValueError(f"Invalid pattern token {token!r}")
+            slot = _PIECES.index(piece)
+            pieces[slot] = pieces.get(slot, 0) | bit
+    return (tuple(pieces.items()), gold, silver, empty)
+
+
+class _SortedRuns:
+    """Records sorted in runs of at most _RUN_SIZE kept in a scratch file
+
+    With unique set records with the same first field, a position key, are
+    only kept once. merged() yields the records of every run in order.
+    """
+
+    def __init__(self, record, unique=False):
+        self.record = record
+        self.unique = unique
+        self._buffer = {} if unique else []
+        self._file = tempfile.TemporaryFile()
+        self._runs = []
+        self._extra = []
+
+    def add(self, item):
+        if self.unique:
+            self._buffer.setdefault(item[0], item)
+        else:
+            self._buffer.append(item)
+        if len(self._buffer) >= _RUN_SIZE:
+            self._write_run()
+
+    def add_run(self, buf, offset, count):
+        """Add a run already sorted in buf, such as a table of a database"""
+        self._extra.append((buf, offset, count))
+
+    def _write_run(self):
+        items = self._buffer.values() if self.unique else self._buffer
+        items = sorted(items)
+        offset = self._file.tell()
+        for start in range(0, len(items), _CHUNK):
+            self._file.write(
+                b"".join(
+                    self.record.pack(*item) for item in items[start : start + _CHUNK]
+                )
+            )
+        self._runs.append((offset, len(items)))
+        self._buffer = {} if self.unique else []
+
+    def _read_run(self, buf, offset, count):
+        size = self.record.size
+        while count:
+            num = min(count, _CHUNK)
+            yield from self.record.iter_unpack(buf[offset : offset + num * size])
+            offset += num * size
+            count -= num
+
+    def merged(self):
+        if self._buffer:
+            self._write_run()
+        self._file.flush()
+        runs = list(self._extra)
+        run_map = None
+        if self._runs:
+            run_map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            runs += [(run_map, offset, count) for offset, count in self._runs]
+        try:
+            records = heapq.merge(*(self._read_run(*run) for run in runs))
+            if not self.unique:
+                yield from records
+                return
+            last = None
+            for item in records:
+                if item[0] != last:
+                    last = item[0]
+                    yield item
+        finally:
+            if run_map is not None:
+                run_map.close()
+
+    def close(self):
+        self._file.close()
+
+
+def build_database(games, path, append=False):
+    """Write a database of games to path
+
+    games is an iterable of (moves, winner) pairs, moves being the move
+    strings of a game starting with the setup and winner the Color that won
+    or None. A game with an illegal move is kept up to that move. With
+    append the games are added after those of the database already at path.
+
+    Moves are written to a scratch file as they are read and the index and
+    position table are sorted in runs of _RUN_SIZE records that are merged
+    into the new file, so memory use does not grow with the games. The new
+    database replaces path once it is complete.
+
+    Returns a dictionary with the games read, those with an illegal move,
+    the moves and distinct positions in the database and the seconds taken.
+    """
+    start_time = time.perf_counter()
+    entries = _SortedRuns(_ENTRY)
+    positions = _SortedRuns(_POSITION, unique=True)
+    game_file = tempfile.TemporaryFile()
+    move_file = tempfile.TemporaryFile()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    base = None
+    try:
+        if append and os.path.exists(path):
+            base = GameDatabase(path)
+            _copy_range(base._map, base._game_offset, base._move_offset, game_file)
+            _copy_range(base._map, base._move_offset, base._entry_offset, move_file)
+            entries.add_run(base._map, base._entry_offset, base._entries)
+            positions.add_run(base._map, base._position_offset, base._positions)
+        first_game = len(base) if base is not None else 0
+        move_count = move_file.tell() // _MOVE.size
+        num = first_game - 1
+        bad = 0
+        for num, (moves, winner) in enumerate(games, first_game):
+            codes = []
+            pos = Position(Color.GOLD, 4, BLANK_BOARD)
+            for move_str in moves:
+                try:
+                    kind, items = decode_move(move_str)
+                    if kind == MoveKind.SETUP:
+                        result = pos.do_setup(items)
+                    else:
+                        result = pos.do_move(items)
+                except (IllegalMove, ValueError):
+                    bad += 1
+                    break
+                codes.append(pack_move(pos.color, kind, items))
+                pos = result
+                key = pos._zhash
+                entries.add((key, num, len(codes)))
+                bitboards = pos.bitBoards
+                positions.add((key, pos.color) + tuple(bitboards[p] for p in _PIECES))
+            move_file.write(struct.pack(f"<{len(codes)}Q", *codes))
+            game_file.write(
+                _GAME.pack(move_count, len(codes), -1 if winner is None else winner)
+            )
+            move_count += len(codes)
+        game_count = num + 1
+
+        with open(tmp_path, "wb") as db_file:
+            db_file.write(bytes(_HEADER.size))
+            for scratch in (game_file, move_file):
+                scratch.seek(0)
+                shutil.copyfileobj(scratch, db_file)
+            entry_count = _write_records(db_file, _ENTRY, entries.merged())
+            position_count = _write_records(db_file, _POSITION, positions.merged())
+            db_file.seek(0)
+            db_file.write(
+                _HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    game_count,
+                    move_count,
+                    entry_count,
+                    position_count,
+                )
+            )
+        if base is not None:
+            base.close()
+            base = None
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if base is not None:
+            base.close()
+        for scratch in (entries, positions, game_file, move_file):
+            scratch.close()
+    return {
+        "games": game_count - first_game,
+        "illegal": bad,
+        "moves": move_count,
+        "positions": position_count,
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+def _copy_range(buf, start, end, out):
+    """Write buf[start:end] to a file a chunk at a time"""
+    step = _CHUNK * _POSITION.size
+    for offset in range(start, end, step):
+        out.write(buf[offset : min(offset + step, end)])
+
+
+def _write_records(out, record, items):
+    """Write records to a file in chunks, returning the number written"""
+    count = 0
+    chunk = []
+    for item in items:
+        chunk.append(record.pack(*item))
+        if len(chunk) == _CHUNK:
+            out.write(b"".join(chunk))
+            count += len(chunk)
+            chunk = []
+    out.write(b"".join(chunk))
+    return count + len(chunk)
+
+
+class GameDatabase:
+    """A game database file mapped into memory for queries
+
+    Raises ValueError if the file is not a game database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file can not be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a game database") from None
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a game database")
+        magic, version, games, moves, entries, positions = _HEADER.unpack_from(
+            self._map
+        )
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a game database")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is database version {version} not {VERSION}")
+        self._games = games
+        self._entries = entries
+        self._positions = positions
+        self._game_offset = _HEADER.size
+        self._move_offset = self._game_offset + games * _GAME.size
+        self._entry_offset = self._move_offset + moves * _MOVE.size
+        self._position_offset = self._entry_offset + entries * _ENTRY.size
+        size = self._position_offset + positions * _POSITION.size
+        if len(self._map) != size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self._games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _game_record(self, num):
+        if not 0 <= num < self._games:
+            raise IndexError(f"No game {num} in the database")
+        return _GAME.unpack_from(self._map, self._game_offset + num * _GAME.size)
+
+    def _replay(self, num, plies=None):
+        """Yield the position before each move of a game and the move"""
+        first, count, _ = self._game_record(num)
+        if plies is not None:
+            count = min(count, plies)
+        offset = self._move_offset + first * _MOVE.size
+        codes = struct.unpack_from(f"<{count}Q", self._map, offset)
+        pos = Position(Color.GOLD, 4, BLANK_BOARD)
+        for code in codes:
+            kind, items = unpack_move(pos.color, code)
+            yield pos, kind, items
+            if kind == MoveKind.SETUP:
+                pos = pos.do_setup(items, strict_checks=False)
+            else:
+                pos = pos.do_move(items, strict_checks=False)
+        yield pos, None, None
+
+    def game(self, num):
+        """The (moves, winner) of a game, as given to build_database"""
+        moves = []
+        for pos, kind, items in self._replay(num):
+            if kind == MoveKind.SETUP:
+                moves.append(encode_setup(items))
+            elif kind == MoveKind.STEPS:
+                moves.append(encode_steps(pos, items))
+        winner = self._game_record(num)[2]
+        return (moves, None if winner < 0 else winner)
+
+    def position(self, num, ply):
+        """The position of a game after its first ply moves"""
+        return list(self._replay(num, ply))[-1][0]
+
+    def _find_key(self, key):
+        """The (game, ply) entries in the index for a position key"""
+        db_map = self._map
+        base = self._entry_offset
+        lo = 0
+        hi = self._entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _KEY.unpack_from(db_map, base + mid * _ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        for num in range(lo, self._entries):
+            entry_key, game, ply = _ENTRY.unpack_from(db_map, base + num * _ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((game, ply))
+        return found
+
+    def find_position(self, pos):
+        """The (game, ply) of every time pos was reached, by game and ply"""
+        return self._find_key(pos._zhash)
+
+    def find_pattern(self, pattern, color=None):
+        """The (game, ply) of every position matching a pattern
+
+        pattern is a string for parse_pattern or the tuple it returns. With a
+        color only positions with that side to move match. Results are in
+        order of game and ply.
+        """
+        if isinstance(pattern, str):
+            pattern = parse_pattern(pattern)
+        pieces, gold, silver, empty = pattern
+        start = self._position_offset
+        table = memoryview(self._map)[start : start + self._positions * _POSITION.size]
+        keys = []
+        try:
+            for record in _POSITION.iter_unpack(table):
+                if color is not None and record[1] != color:
+                    continue
+                for slot, bits in pieces:
+                    if record[slot + 2] & bits != bits:
+                        break
+                else:
+                    if gold or empty:
+                        gold_bits = 0
+                        for bits in record[2:8]:
+                            gold_bits |= bits
+                    if silver or empty:
+                        silver_bits = 0
+                        for bits in record[8:14]:
+                            silver_bits |= bits
+                    if gold and gold_bits & gold != gold:
+                        continue
+                    if silver and silver_bits & silver != silver:
+                        continue
+                    if empty and (gold_bits | silver_bits) & empty:
+                        continue
+                    keys.append(record[0])
+        finally:
+            table.release()
+        found = []
+        for key in keys:
+            found += self._find_key(key)
+        found.sort()
+        return found
+
+
+def _move_label(ply):
+    """The move number and side of the move played from a ply"""
+    return f"{ply // 2 + 1}{'gs'[ply % 2]}"
+
+
+def _print_found(found, limit):
+    print(f"Found {len(found)} positions")
+    for game, ply in found[:limit]:
+        print(f"game {game} at {_move_label(ply)}")
+    if len(found) > limit:
+        print(f"and {len(found) - limit} more")
+
+
+def main(args=None):
+    """Main entry point
+
+    Builds a game database from PGN files or searches one for a position or
+    pattern.
+    """
+    parser = ArgumentParser(description="Build and search a database of games")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+    build = commands.add_parser("build", help="Build a database from PGN files")
+    build.add_argument(
+        "-a", "--append", action="store_true", help="Add to an existing database"
+    )
+    build.add_argument("database", help="Database file to write")
+    build.add_argument("games", nargs="+", help="PGN files of games")
+    position = commands.add_parser(
+        "position", help="Find the games that reached a position"
+    )
+    position.add_argument("database", help="Database file to search")
+    position.add_argument("position", help="Position file in long or short format")
+    pattern = commands.add_parser(
+        "pattern", help="Find the positions matching a bitboard pattern"
+    )
+    pattern.add_argument(
+        "--side", choices=("g", "s"), help="Only match positions with this side to move"
+    )
+    pattern.add_argument("database", help="Database file to search")
+    pattern.add_argument("pattern", help='Pattern to find, for example "Ed5 Sc6"')
+    for command in (position, pattern):
+        command.add_argument(
+            "-l", "--limit", type=int, default=20, help="Most games to list"
+        )
+    config = parser.parse_args(args)
+
+    if config.command == "build":
+
+        def read_all():
+            for filename in config.games:
+                with open(filename) as game_file:
+                    yield from pgn.read_results(game_file)
+
+        try:
+            result = build_database(read_all(), config.database, config.append)
+        except (OSError, ValueError) as exc:
+            print(f"Could not build database: {exc}")
+            return 1
+        print(
+            f"Read {result['games']} games, {result['illegal']} with an illegal "
+            f"move, in {result['seconds']:.3f}s"
+        )
+        print(
+            f"Wrote {result['moves']} moves and {result['positions']} positions "
+            f"to {config.database}"
+        )
+        return 0
+
+    if config.command == "pattern":
+        try:
+            query = parse_pattern(config.pattern)
+        except ValueError as exc:
+            print(exc)
+            return 1
+    else:
+        with open(config.position) as posfile:
+            movenum, query = board.parse_pos_file(posfile.readlines())
+    try:
+        database = GameDatabase(config.database)
+    except (OSError, ValueError) as exc:
+        print(f"Could not open database: {exc}")
+        return 1
+    with database:
+        if config.command == "pattern":
+            color = None if config.side is None else "gs".index(config.side)
+            found = database.find_pattern(query, color)
+        else:
+            found = database.find_position(query)
+    _print_found(found, config.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Write the precomputed tables used by pyrimaa.board to board_tables.py
+
+Run "python -m pyrimaa.make_tables" after changing any of the table
+generators in board.py.
+"""
+
+import os
+import sys
+
+from pyrimaa import board
+
+HEADER = '''"""Precomputed tables for pyrimaa.board
+
+Generated by "python -m pyrimaa.make_tables" from the _generate_* functions
+in board.py, do not edit.
+"""
+'''
+
+
+def _format(value, indent=0, as_hex=False):
+    if isinstance(value, list):
+        inner = " " * (indent + 4)
+        items = [f"{inner}{_format(item, indent + 4, as_hex)},\n" for item in value]
+        return "[\n" + "".join(items) + " " * indent + "]"
+    if as_hex:
+        return f"0x{value:016X}"
+    return str(value)
+
+
+def generate_tables():
+    """Compute every table, returns a dictionary of name to value"""
+    tables = {
+        "MOVE_OFFSETS": board._generate_move_offsets(),
+        "INDEPENDENT_BEFORE": board._generate_canonical_masks(),
+    }
+    tables.update(board._generate_zobrist_keys())
+    return tables
+
+
+def table_source():
+    """Python source of the board_tables module"""
+    # bitboards are written in hex, zobrist keys in decimal
+    bitboard_tables = ("MOVE_OFFSETS", "INDEPENDENT_BEFORE")
+    lines = [HEADER]
+    for name, value in sorted(generate_tables().items()):
+        lines.append(f"{name} = {_format(value, as_hex=name in bitboard_tables)}\n")
+    return "\n".join(lines)
+
+
+def main(args=None):
+    """Main entry point
+
+    Writes board_tables.py next to this module, or to the given file name.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    if args:
+        filename = args[0]
+    else:
+        filename = os.path.join(os.path.dirname(__file__), "board_tables.py")
+    with open(filename, "w") as tablefile:
+        tablefile.write(table_source())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+from pyrimaa.board import (
+    SQUARE_NEIGHBORS,
+    TRAP_NEIGHBORS,
+    TRAPS,
+    ZOBRIST_KEYS,
+    ZOBRIST_TURN,
+    Color,
+    Piece,
+    Position,
+    _zobrist_state,
+    neighbors_of,
+)
+
+# kinds of entries kept on the history stack
+_STEP = 0
+_PASS = 1
+
+
+class MutablePosition:
+    """Position that is changed in place with make_step and unmake_step
+
+    Meant for search code where creating a new Position for every node is
+    too slow. It holds the same bitboards and turn state as Position, keeps
+    the Zobrist hash up to date as steps are made and unmade, and a history
+    stack records what is needed to undo each change.
+
+    Since it changes, a MutablePosition is not hashable. Use the zobrist
+    attribute, or to_position() to get an immutable copy.
+
+    """
+
+    __slots__ = (
+        "color",
+        "stepsLeft",
+        "bitBoards",
+        "inpush",
+        "last_piece",
+        "last_from",
+        "placement",
+        "_zhash",
+        "_mhash",
+        "_stronger",
+        "_frozen",
+        "history",
+    )
+
+    __hash__ = None
+
+    def __init__(self, position):
+        self.color = position.color
+        self.stepsLeft = position.stepsLeft
+        self.bitBoards = list(position.bitBoards)
+        self.inpush = position.inpush
+        self.last_piece = position.last_piece
+        self.last_from = position.last_from
+        self.placement = list(position.placement)
+        self._zhash = position._zhash
+        self._mhash = None
+        self._stronger = None
+        self._frozen = None
+        self.history = []
+
+    # read only methods that work on any object with the Position attributes
+    _state_hash = Position._state_hash
+    check_hash = Position.check_hash
+    check_boards = Position.check_boards
+    is_goal = Position.is_goal
+    is_rabbit_loss = Position.is_rabbit_loss
+    has_legal_step = Position.has_legal_step
+    _to_long_str = Position._to_long_str
+    _to_short_str = Position._to_short_str
+    board_to_str = Position.board_to_str
+    to_placing_move = Position.to_placing_move
+    check_step = Position.check_step
+    stronger_neighbors = Position.stronger_neighbors
+    frozen_pieces = Position.frozen_pieces
+    piece_at = Position.piece_at
+    is_frozen_at = Position.is_frozen_at
+    frozen_neighbors = Position.frozen_neighbors
+    iter_steps = Position.iter_steps
+    iter_single_steps = Position.iter_single_steps
+    mirror_key = Position.mirror_key
+    canonical_key = Position.canonical_key
+
+    @property
+    def zobrist(self):
+        """Zobrist hash of the current position"""
+        return self._zhash
+
+    def to_position(self):
+        """Create an immutable Position from the current state"""
+        return Position(
+            self.color,
+            self.stepsLeft,
+            self.bitBoards,
+            self.inpush,
+            self.last_piece,
+            self.last_from,
+            placement=self.placement,
+            zobrist=self._zhash,
+        )
+
+    def __eq__(self, other):
+        try:
+            return (
+                self._zhash == other._zhash
+                and self.color == other.color
+                and self.stepsLeft == other.stepsLeft
+                and self.inpush == other.inpush
+                and self.last_from == other.last_from
+                and self.last_piece == other.last_piece
+                and tuple(self.bitBoards) == tuple(other.bitBoards)
+            )
+        except Exception:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def make_step(self, step, piece=None):
+        """Take a step, changing this position in place
+
+        The same as Position.do_step but without creating a new position. If
+        the piece being moved is already known, as it is for the steps from
+        iter_steps, passing it in saves looking it up again.
+
+        """
+        bitBoards = self.bitBoards
+        placement = self.placement
+        color = self.color
+        stepsLeft = self.stepsLeft
+        inpush = self.inpush
+        last_piece = self.last_piece
+        last_from = self.last_from
+        zobrist = self._zhash
+        from_ix, to_ix = step
+        from_bit = 1 << from_ix
+        to_bit = 1 << to_ix
+        if piece is None:
+            pcolor = bool(placement[1] & from_bit)
+            pcbit = pcolor << 3
+            for piece in range(Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1):
+                if bitBoards[piece] & from_bit:
+                    break
+            else:
+                raise ValueError("Tried to move from an empty square")
+        else:
+            pcbit = piece & Piece.COLOR
+            pcolor = pcbit >> 3
+        ispush = False
+        ispull = False
+        if pcolor != color:
+            if (
+                last_piece != Piece.EMPTY
+                and last_from == to_ix
+                and (piece & Piece.DECOLOR) < (last_piece & Piece.DECOLOR)
+            ):
+                ispull = True
+            else:
+                ispush = True
+        step_bits = from_bit | to_bit
+        bitBoards[piece] ^= step_bits
+        placement[pcolor] ^= step_bits
+        bitBoards[Piece.EMPTY] ^= step_bits
+        zobrist ^= ZOBRIST_KEYS[piece][from_ix] ^ ZOBRIST_KEYS[piece][to_ix]
+        # remove trapped pieces, can only be one if any
+        captured = None
+        if from_bit & TRAP_NEIGHBORS:
+            ntrap = SQUARE_NEIGHBORS[from_ix] & TRAPS & ~neighbors_of(placement[pcolor])
+            if ntrap & placement[pcolor]:
+                tix = ntrap.bit_length() - 1
+                bitBoards[Piece.EMPTY] |= ntrap
+                placement[pcolor] &= ~ntrap
+                for tpiece in range(
+                    Piece.GRABBIT | pcbit, (Piece.GELEPHANT | pcbit) + 1
+                ):
+                    if bitBoards[tpiece] & ntrap:
+                        zobrist ^= ZOBRIST_KEYS[tpiece][tix]
+                        bitBoards[tpiece] &= ~ntrap
+                        captured = (tpiece, tix)
+                        break
+        self.history.append(
+            (
+                _STEP,
+                from_ix,
+                to_ix,
+                piece,
+                captured,
+                color,
+                stepsLeft,
+                inpush,
+                last_piece,
+                last_from,
+                self._zhash,
+            )
+        )
+        zobrist ^= _zobrist_state(color, stepsLeft, inpush, last_piece, last_from)
+        stepsLeft -= 1
+        if stepsLeft < 1:
+            color ^= 1
+            stepsLeft = 4
+            piece = Piece.EMPTY
+            from_ix = None
+        if inpush or ispull:
+            piece = Piece.EMPTY
+            from_ix = None
+        self.color = color
+        self.stepsLeft = stepsLeft
+        self.inpush = ispush
+        self.last_piece = piece
+        self.last_from = from_ix
+        self._zhash = zobrist ^ _zobrist_state(color, stepsLeft, ispush, piece, from_ix)
+        self._mhash = None
+        self._stronger = None
+        self._frozen = None
+
+    def make_null_move(self):
+        """End the turn without taking any more steps"""
+        self.history.append(
+            (
+                _PASS,
+                None,
+                None,
+                None,
+                None,
+                self.color,
+                self.stepsLeft,
+                self.inpush,
+                self.last_piece,
+                self.last_from,
+                self._zhash,
+            )
+        )
+        self._zhash ^= self._state_hash() ^ ZOBRIST_TURN[self.color ^ 1][4]
+        self._mhash = None
+        self.color ^= 1
+        self.stepsLeft = 4
+        self.inpush = False
+        self.last_piece = Piece.EMPTY
+        self.last_from = None
+
+    def make_move(self, steps):
+        """Take all the steps of a move and end the turn if needed
+
+        Returns the number of history entries added, to pass to unmake_move.
+        """
+        color = self.color
+        for step in steps:
+            self.make_step(step)
+        if self.color == color:
+            self.make_null_move()
+            return len(steps) + 1
+        return len(steps)
+
+    def unmake_step(self):
+        """Undo the last step or null move"""
+        (
+            kind,
+            from_ix,
+            to_ix,
+            piece,
+            captured,
+            color,
+            stepsLeft,
+            inpush,
+            last_piece,
+            last_from,
+            zobrist,
+        ) = self.history.pop()
+        if kind == _STEP:
+            bitBoards = self.bitBoards
+            placement = self.placement
+            pcolor = (piece & Piece.COLOR) >> 3
+            if captured is not None:
+                tpiece, tix = captured
+                tbit = 1 << tix
+                bitBoards[tpiece] |= tbit
+                bitBoards[Piece.EMPTY] &= ~tbit
+                placement[pcolor] |= tbit
+            step_bits = (1 << from_ix) | (1 << to_ix)
+            bitBoards[piece] ^= step_bits
+            placement[pcolor] ^= step_bits
+            bitBoards[Piece.EMPTY] ^= step_bits
+            self._stronger = None
+            self._frozen = None
+        self.color = color
+        self.stepsLeft = stepsLeft
+        self.inpush = inpush
+        self.last_piece = last_piece
+        self.last_from = last_from
+        self._zhash = zobrist
+        self._mhash = None
+
+    def unmake_move(self, count):
+        """Undo the given number of steps and null moves"""
+        for _ in range(count):
+            self.unmake_step()
+
+    def is_end_state(self):
+        goal = self.is_goal()
+        if goal:
+            return goal
+        norabbits = self.is_rabbit_loss()
+        if norabbits:
+            return norabbits
+        if not self.has_legal_step():
+            if self.color == Color.GOLD:
+                return -1
+            else:
+                return 1
+        return False
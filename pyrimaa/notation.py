@@ -0,0 +1,259 @@
+"""Encoding and decoding of Arimaa move notation
+
+Every token that can appear in a move string, a step such as "Ea1n", a
+capture such as "Cc3x" or a placement such as "Ra1", is decoded by a single
+lookup in a table built at import time. Whole move strings are cached since
+the same moves, setups in particular, come up again and again when replaying
+games.
+"""
+
+from functools import lru_cache
+
+from pyrimaa.board import (
+    SQUARE_NAMES,
+    SQUARE_NEIGHBORS,
+    TRAPS,
+    IllegalMove,
+    Piece,
+    pack_step,
+    unpack_step,
+)
+
+
+class MoveKind:
+    STEPS = 0
+    SETUP = 1
+
+
+# kinds of move string tokens
+_STEP = 0
+_CAPTURE = 1
+_PLACE = 2
+
+_DIRECTIONS = {"n": 8, "s": -8, "e": 1, "w": -1}
+_DIRECTION_CHARS = {8: "n", -8: "s", 1: "e", -1: "w"}
+
+DECODE_CACHE_SIZE = 8192
+
+# marks a setup in a move code, see pack_move
+SETUP_FLAG = 1 << 63
+
+
+def _generate_tokens():
+    tokens = {}
+    for piece in range(Piece.GRABBIT, Piece.COUNT):
+        pchar = Piece.PCHARS[piece]
+        if pchar == "x":
+            continue
+        for ix, square in enumerate(SQUARE_NAMES):
+            tokens[pchar + square] = (_PLACE, (piece, ix))
+            tokens[pchar + square + "x"] = (_CAPTURE, None)
+            for dchar, offset in _DIRECTIONS.items():
+                to_ix = ix + offset
+                if offset in (1, -1) and to_ix // 8 != ix // 8:
+                    continue
+                if 0 <= to_ix < 64:
+                    tokens[pchar + square + dchar] = (_STEP, (ix, to_ix))
+    return tokens
+
+
+_TOKENS = _generate_tokens()
+
+
+def _generate_trap_tables():
+    """The squares next to each trap and the trap next to each square
+
+    Squares without a neighboring trap have -1 in the second table.
+    """
+    trap_neighbors = {}
+    near_trap = [-1] * 64
+    for tix in range(64):
+        if TRAPS & (1 << tix):
+            neighbors = [ix for ix in range(64) if SQUARE_NEIGHBORS[tix] & (1 << ix)]
+            trap_neighbors[tix] = tuple(neighbors)
+            for ix in neighbors:
+                near_trap[ix] = tix
+    return trap_neighbors, near_trap
+
+
+_TRAP_NEIGHBORS, _NEAR_TRAP = _generate_trap_tables()
+
+
+def _bad_token(token):
+    if len(token) == 4 and token[:3] in _TOKENS:
+        return ValueError(f"Invalid step direction. {token!r}")
+    return ValueError(f"Invalid step {token!r}")
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def decode_move(move_str):
+    """Decode a move string into its kind and contents
+
+    Returns a tuple of (kind, items). For MoveKind.STEPS items is a tuple of
+    (from, to) square index steps with any captures left out, for
+    MoveKind.SETUP it is a tuple of (piece, square index) placements.
+
+    Raises ValueError for unrecognized tokens and IllegalMove when steps and
+    placements are mixed in one move.
+
+    """
+    tokens = move_str.split()
+    if not tokens:
+        raise ValueError(f"No steps in move given to parse. {move_str!r}")
+    kind = None
+    items = []
+    for token in tokens:
+        try:
+            token_kind, item = _TOKENS[token]
+        except KeyError:
+            raise _bad_token(token) from None
+        if token_kind == _CAPTURE:
+            if kind == MoveKind.SETUP:
+                raise IllegalMove("Found mixture of step types")
+            kind = MoveKind.STEPS
+            continue
+        token_kind = MoveKind.SETUP if token_kind == _PLACE else MoveKind.STEPS
+        if kind is None:
+            kind = token_kind
+        elif kind != token_kind:
+            raise IllegalMove("Found mixture of step types")
+        items.append(item)
+    return (kind, tuple(items))
+
+
+def move_kind(move_str):
+    """The MoveKind of a move string"""
+    return decode_move(move_str)[0]
+
+
+def decode_steps(move_str):
+    """Decode a move string of steps into a list of (from, to) steps"""
+    kind, items = decode_move(move_str)
+    if kind != MoveKind.STEPS:
+        raise ValueError("Can't represent placing step")
+    return list(items)
+
+
+def decode_moves(move_strs):
+    """Decode a sequence of move strings, see decode_move"""
+    return [decode_move(move_str) for move_str in move_strs]
+
+
+def _mailbox(position):
+    """The piece on each square of a position as a list of 64"""
+    squares = [Piece.EMPTY] * 64
+    bitboards = position.bitBoards
+    for piece in range(Piece.GRABBIT, Piece.COUNT):
+        bits = bitboards[piece]
+        while bits:
+            bit = bits & -bits
+            squares[bit.bit_length() - 1] = piece
+            bits ^= bit
+    return squares
+
+
+def _encode(squares, steps):
+    pchars = Piece.PCHARS
+    move_rep = []
+    for from_ix, to_ix in steps:
+        piece = squares[from_ix]
+        if piece == Piece.EMPTY:
+            raise ValueError("Tried to move empty piece")
+        direction = _DIRECTION_CHARS.get(to_ix - from_ix)
+        if direction is None:
+            move_rep.append(
+                f"{pchars[piece]}{SQUARE_NAMES[from_ix]},{SQUARE_NAMES[to_ix]}"
+            )
+        else:
+            move_rep.append(pchars[piece] + SQUARE_NAMES[from_ix] + direction)
+        squares[from_ix] = Piece.EMPTY
+        squares[to_ix] = piece
+        # only a trap next to the square left can lose its last defender
+        tix = _NEAR_TRAP[from_ix]
+        if tix < 0:
+            continue
+        tpiece = squares[tix]
+        if tpiece == Piece.EMPTY or (tpiece ^ piece) & Piece.COLOR:
+            continue
+        pcolor = piece & Piece.COLOR
+        for nix in _TRAP_NEIGHBORS[tix]:
+            npiece = squares[nix]
+            if npiece != Piece.EMPTY and npiece & Piece.COLOR == pcolor:
+                break
+        else:
+            squares[tix] = Piece.EMPTY
+            move_rep.append(pchars[tpiece] + SQUARE_NAMES[tix] + "x")
+    return " ".join(move_rep)
+
+
+def encode_steps(position, steps):
+    """Convert the steps of a move from position to a move string
+
+    Captures are added after the step causing them. The steps are not
+    checked for legality.
+
+    """
+    return _encode(_mailbox(position), steps)
+
+
+def encode_moves(position, moves):
+    """Convert many step sequences from the same position to move strings"""
+    squares = _mailbox(position)
+    return [_encode(squares[:], steps) for steps in moves]
+
+
+def encode_setup(placements):
+    """Convert (piece, square index) placements to a setup move string"""
+    pchars = Piece.PCHARS
+    return " ".join(pchars[piece] + SQUARE_NAMES[ix] for piece, ix in placements)
+
+
+def pack_move(color, kind, items, flip=0):
+    """Pack a decoded move by color into a 64 bit move code
+
+    Step moves have up to four 16 bit steps packed by board.pack_step, the
+    first in the low bits and unused steps left 0. Setup moves have
+    SETUP_FLAG set and a 3 bit piece type for each of the 16 squares of the
+    setup area, a1 (a7 for silver) in the low bits and 0 for an empty square.
+    A flip of 7 packs the move mirrored left to right. Raises ValueError for
+    a setup placement outside the setup area of color.
+
+    """
+    if kind == MoveKind.SETUP:
+        base = 48 if color else 0
+        code = SETUP_FLAG
+        for piece, ix in items:
+            slot = (ix ^ flip) - base
+            if not 0 <= slot < 16:
+                raise ValueError(
+                    f"Setup square {SQUARE_NAMES[ix] if 0 <= ix < 64 else ix} is "
+                    f"outside the {'silver' if color else 'gold'} setup area"
+                )
+            code |= (piece & ~Piece.COLOR) << (3 * slot)
+        return code
+    if len(items) > 4:
+        raise ValueError("Move codes can not have more than 4 steps")
+    code = 0
+    for num, (from_ix, to_ix) in enumerate(items):
+        code |= pack_step((from_ix ^ flip, to_ix ^ flip)) << (16 * num)
+    return code
+
+
+def unpack_move(color, code, flip=0):
+    """Unpack a move code made by pack_move into its kind and items"""
+    if code & SETUP_FLAG:
+        base = 48 if color else 0
+        color_bit = color * Piece.COLOR
+        placements = []
+        for slot in range(16):
+            ptype = (code >> (3 * slot)) & 7
+            if ptype:
+                placements.append((ptype | color_bit, (base + slot) ^ flip))
+        placements.sort(key=lambda placement: placement[1])
+        return (MoveKind.SETUP, tuple(placements))
+    steps = []
+    while code:
+        from_ix, to_ix = unpack_step(code & 0xFFFF)
+        steps.append((from_ix ^ flip, to_ix ^ flip))
+        code >>= 16
+    return (MoveKind.STEPS, tuple(steps))
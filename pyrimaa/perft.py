@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+
+import json
+import os
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from pyrimaa import board
+
+
+def perft(pos, depth, canonical=False):
+    """Count unique moves and step nodes for a full turn depth
+
+    Returns a tuple of (moves, nodes) where moves is the number of unique
+    moves found at the last turn summed over every line leading there and
+    nodes is the number of steps generated on the way. With canonical the
+    canonical step order move generator is used.
+    """
+    moves, nodes = pos.get_moves_nodes(canonical=canonical)
+    if depth <= 1:
+        return (len(moves), nodes)
+    total = 0
+    for move in moves:
+        sub_moves, sub_nodes = perft(move, depth - 1, canonical)
+        total += sub_moves
+        nodes += sub_nodes
+    return (total, nodes)
+
+
+def _subtree_moves(pos, color, canonical=False):
+    """Find the moves that finish a turn already started
+
+    pos is the position after the first step of the turn and color the side
+    that took it. If that step was the last of the turn pos is itself the
+    only finished move. Returns a tuple of
+    the set of Zobrist keys of the finished moves and the number of steps
+    generated. The caller has to remove the null move of the turn, a
+    sequence of steps can end up back at the starting position.
+    """
+    keys = set()
+    nodes = 0
+    partial = {pos}
+    while partial:
+        nextpart = set()
+        for npos in partial:
+            if npos.color != color:
+                keys.add(npos._zhash)
+                continue
+            steps = npos._canonical_steps() if canonical else npos.get_steps()
+            nodes += len(steps)
+            for _, move in steps:
+                if move.color == color:
+                    nextpart.add(move)
+                else:
+                    keys.add(move._zhash)
+            if not npos.inpush:
+                keys.add(npos.get_null_move()._zhash)
+        partial = nextpart
+    return (keys, nodes)
+
+
+def divide(pos, workers=None, canonical=False):
+    """Count the moves from a position by splitting the turn at its first step
+
+    The moves following each first step are found in separate processes, at
+    most workers at a time which defaults to the number of CPUs. Moves found
+    after more than one first step are only counted once. Returns a tuple of
+    (moves, nodes, counts) where counts is a list of (step, moves) with the
+    number of unique moves found after each first step. The number of moves
+    matches perft at depth 1, the nodes are higher since positions reached
+    after different first steps are expanded once for each.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    steps = pos.get_steps()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                _subtree_moves,
+                [child for _, child in steps],
+                repeat(pos.color),
+                repeat(canonical),
+                chunksize=max(1, len(steps) // (4 * workers)),
+            )
+        )
+    keys = set()
+    nodes = len(steps)
+    counts = []
+    for (step, _), (sub_keys, sub_nodes) in zip(steps, results):
+        keys |= sub_keys
+        nodes += sub_nodes
+        counts.append((step, len(sub_keys)))
+    # passing the turn is not a legal move
+    keys.discard(pos.get_null_move()._zhash)
+    return (len(keys), nodes, counts)
+
+
+def _perft_task(args):
+    return perft(*args)
+
+
+def parallel_perft(pos, depth, workers=None, canonical=False):
+    """perft using several processes
+
+    At depth 1 the work is split with divide, deeper the moves from the root
+    are searched in separate processes. The number of moves is always the
+    same as perft gives and at depths above 1 so is the number of nodes.
+    """
+    if depth <= 1:
+        moves, nodes, _ = divide(pos, workers, canonical)
+        return (moves, nodes)
+    moves, nodes = pos.get_moves_nodes(canonical=canonical)
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = ((move, depth - 1, canonical) for move in moves)
+        for sub_moves, sub_nodes in executor.map(_perft_task, tasks, chunksize=16):
+            total += sub_moves
+            nodes += sub_nodes
+    return (total, nodes)
+
+
+def run_perft(pos, depth, repeat=1, canonical=False, workers=None):
+    """Time perft for each depth from 1 to depth
+
+    Every depth is run repeat times and the fastest time is reported. With
+    workers parallel_perft is used with that many processes. Returns a list
+    of dictionaries, one per depth.
+    """
+    results = []
+    for cur_depth in range(1, depth + 1):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if workers:
+                moves, nodes = parallel_perft(pos, cur_depth, workers, canonical)
+            else:
+                moves, nodes = perft(pos, cur_depth, canonical)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results.append(
+            {
+                "depth": cur_depth,
+                "generator": "canonical" if canonical else "standard",
+                "workers": workers or 1,
+                "moves": moves,
+                "nodes": nodes,
+                "seconds": best,
+                "nps": nodes / best if best > 0 else 0.0,
+            }
+        )
+    return results
+
+
+def compare_perft(pos, depth, repeat=1):
+    """Time perft with both move generators
+
+    Returns a list of dictionaries, one per depth, with the results of both
+    generators and the speedup of the canonical generator. Raises
+    RuntimeError if the generators do not find the same number of moves.
+    """
+    standard = run_perft(pos, depth, repeat)
+    canonical = run_perft(pos, depth, repeat, canonical=True)
+    results = []
+    for std, can in zip(standard, canonical):
+        if std["moves"] != can["moves"]:
+            raise RuntimeError(
+                f"Move generators disagree at depth {std['depth']}, "
+                f"{std['moves']} standard and {can['moves']} canonical moves"
+            )
+        results.append(
+            {
+                "depth": std["depth"],
+                "moves": std["moves"],
+                "standard": std,
+                "canonical": can,
+                "speedup": std["seconds"] / can["seconds"] if can["seconds"] else 0.0,
+            }
+        )
+    return results
+
+
+def _print_result(res, prefix="depth"):
+    print(
+        f"  {prefix} {res['depth']}: {res['moves']} moves "
+        f"{res['nodes']} nodes {res['seconds']:.3f}s "
+        f"{res['nps']:.0f} nodes/s"
+    )
+
+
+def main(args=None):
+    """Main entry point
+
+    Runs perft on each of the given position files and reports the results
+    either as a table or as JSON.
+    """
+    parser = ArgumentParser(description="Benchmark move generation on positions")
+    parser.add_argument(
+        "-d", "--depth", type=int, default=1, help="Number of turns to search"
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=1,
+        help="Times to run each depth, the fastest time is reported",
+    )
+    generator = parser.add_mutually_exclusive_group()
+    generator.add_argument(
+        "--canonical",
+        action="store_true",
+        help="Use the canonical step order move generator",
+    )
+    generator.add_argument(
+        "--compare",
+        action="store_true",
+        help="Run both move generators, check they agree and report the speedup",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes to search with, defaults to one or with "
+        "--divide the number of CPUs",
+    )
+    parser.add_argument(
+        "--divide",
+        action="store_true",
+        help="Split the turn at its first step, search each part in parallel "
+        "and report the moves found after each step",
+    )
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument(
+        "positions", nargs="+", help="Position files in long or short format"
+    )
+    config = parser.parse_args(args)
+    if config.depth < 1:
+        print("Depth must be at least 1")
+        return 1
+    if config.repeat < 1:
+        print("Repeat must be at least 1")
+        return 1
+    if config.jobs is not None and config.jobs < 1:
+        print("Jobs must be at least 1")
+        return 1
+    if config.divide and config.compare:
+        print("Divide can not be used with compare")
+        return 1
+    if config.divide and config.depth != 1:
+        print("Divide only works at depth 1")
+        return 1
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "depth": config.depth,
+        "repeat": config.repeat,
+        "positions": [],
+    }
+    for filename in config.positions:
+        with open(filename) as posfile:
+            movenum, pos = board.parse_pos_file(posfile.readlines())
+        if config.compare:
+            try:
+                results = compare_perft(pos, config.depth, config.repeat)
+            except RuntimeError as exc:
+                print(f"{filename}: {exc}")
+                return 1
+        elif config.divide:
+            start = time.perf_counter()
+            moves, nodes, counts = divide(pos, config.jobs, config.canonical)
+            elapsed = time.perf_counter() - start
+            results = [
+                {
+                    "depth": 1,
+                    "generator": "canonical" if config.canonical else "standard",
+                    "workers": config.jobs or os.cpu_count() or 1,
+                    "moves": moves,
+                    "nodes": nodes,
+                    "seconds": elapsed,
+                    "nps": nodes / elapsed if elapsed > 0 else 0.0,
+                    "divide": [
+                        {"step": pos.steps_to_str([step]), "moves": count}
+                        for step, count in counts
+                    ],
+                }
+            ]
+        else:
+            results = run_perft(
+                pos, config.depth, config.repeat, config.canonical, config.jobs
+            )
+        report["positions"].append(
+            {
+                "file": filename,
+                "move": f"{movenum}{'gs'[pos.color]}",
+                "position": pos.board_to_str("short"),
+                "results": results,
+            }
+        )
+        if not config.json:
+            print(f"{filename} {movenum}{'gs'[pos.color]}")
+            if config.divide:
+                for entry in results[0]["divide"]:
+                    print(f"  {entry['step']} {entry['moves']}")
+            for res in results:
+                if config.compare:
+                    _print_result(res["standard"], "standard depth")
+                    _print_result(res["canonical"], "canonical depth")
+                    print(f"  speedup {res['speedup']:.2f}x")
+                else:
+                    _print_result(res)
+    if config.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
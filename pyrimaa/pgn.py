@@ -0,0 +1,88 @@
+"""Reading game records in PGN form
+
+This is the form roundrobin writes with --pgn. Each game has tag lines such
+as [Result "1-0"], one line per move starting with its move number, for
+example "2g Ee2n Ee3n", and then the result. Gold plays white and silver
+black.
+"""
+
+from pyrimaa.board import Color
+
+RESULTS = {"1-0": Color.GOLD, "0-1": Color.SILVER}
+
+
+def _parse_tag(line):
+    name, _, value = line[1:].rstrip("]").partition(" ")
+    return name, value.strip().strip('"')
+
+
+def read_records(lines):
+    """Read the games from lines of PGN keeping all that roundrobin writes
+
+    Yields a (tags, moves) pair for each game, tags being a list of (name,
+    value) pairs in the order they were read and moves the move lines with
+    their numbers, such as "2g Ee2n Ee3n". A result line after the moves is
+    added as a "Result" tag if the game does not have one.
+    """
+    tags = []
+    moves = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == "[":
+            if moves:
+                yield (tags, moves)
+                tags = []
+                moves = []
+            tags.append(_parse_tag(line))
+        elif line in RESULTS:
+            if not any(name == "Result" for name, _ in tags):
+                tags.append(("Result", line))
+            yield (tags, moves)
+            tags = []
+            moves = []
+        elif line[0].isdigit() and len(line.split(None, 1)) == 2:
+            moves.append(line)
+    if moves:
+        yield (tags, moves)
+
+
+def read_games(lines):
+    """Read the games from lines of PGN
+
+    Yields a (tags, moves) pair for each game, tags being a dictionary of
+    tag values by name and moves the move strings without their numbers. A
+    result line after the moves is stored as the "Result" tag.
+    """
+    for tags, moves in read_records(lines):
+        yield (dict(tags), [move.split(None, 1)[1] for move in moves])
+
+
+def write_game(out, tags, moves):
+    """Write a game to a file in the form roundrobin uses
+
+    tags is a sequence of (name, value) pairs and moves the move lines with
+    their numbers, as read by read_records or kept in Game.moves. The value
+    of the "Result" tag, if there is one, is repeated after the moves.
+    """
+    for name, value in tags:
+        out.write(f'[{name} "{value}"]\n')
+    out.write("\n")
+    for move in moves:
+        out.write(f"{move}\n")
+    result = dict(tags).get("Result")
+    if result is not None:
+        out.write(f"{result}\n")
+    out.write("\n")
+
+
+def winner(tags):
+    """The Color that won a game from its tags, or None if not known"""
+    return RESULTS.get(tags.get("Result"))
+
+
+def read_results(lines):
+    """Read (moves, winner) pairs of the games in lines of PGN"""
+    for tags, moves in read_games(lines):
+        yield (moves, winner(tags))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import json
+import os
+import platform
+import random
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+
+from pyrimaa import board
+from pyrimaa.board import Color
+
+# playouts run by each task given to a worker process
+BATCH_SIZE = 32
+
+
+def playout(pos, rnd=None, max_turns=None):
+    """Play random step moves from a position until the game ends
+
+    rnd is passed to get_rnd_step_move. With max_turns the playout stops
+    after that many moves if the game has not ended.
+
+    Returns a tuple of (winner, reason, turns). winner is the Color of the
+    winning side and reason is "g" for goal, "e" for elimination or "m" for
+    immobilization, the same as the game results of pyrimaa.game. Both are
+    None when the turn limit was reached.
+    """
+    turns = 0
+    while True:
+        goal = pos.is_goal()
+        if goal:
+            return (Color.GOLD if goal > 0 else Color.SILVER, "g", turns)
+        norabbits = pos.is_rabbit_loss()
+        if norabbits:
+            return (Color.GOLD if norabbits > 0 else Color.SILVER, "e", turns)
+        if max_turns is not None and turns >= max_turns:
+            return (None, None, turns)
+        steps, result = pos.get_rnd_step_move(rnd)
+        if steps is None:
+            return (pos.color ^ 1, "m", turns)
+        pos = result
+        turns += 1
+
+
+def _playout_batch(pos, count, seed, max_turns):
+    """Run count playouts with a generator seeded by seed
+
+    Returns the number of [gold wins, silver wins, unfinished games], a dict
+    of wins by reason and the total turns played.
+    """
+    rnd = random.Random(seed)
+    wins = [0, 0, 0]
+    reasons = {"g": 0, "e": 0, "m": 0}
+    total_turns = 0
+    for _ in range(count):
+        winner, reason, turns = playout(pos, rnd, max_turns)
+        total_turns += turns
+        if winner is None:
+            wins[2] += 1
+        else:
+            wins[winner] += 1
+            reasons[reason] += 1
+    return (wins, reasons, total_turns)
+
+
+def _batch_task(args):
+    return _playout_batch(*args)
+
+
+def rollout(pos, playouts, workers=None, seed=None, max_turns=None):
+    """Score a position by playing random games from it
+
+    The playouts are split into batches of BATCH_SIZE, each with its own
+    random generator seeded from seed, and run by at most workers processes,
+    one per CPU by default. With a workers of 1 everything runs in this
+    process. For the same seed the results do not depend on the number of
+    workers.
+
+    Returns a dictionary with the win counts and rates of each side, the
+    number of wins by goal, elimination and immobilization, the games
+    stopped by the max_turns limit and the playouts per second.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    seeder = random.Random(seed)
+    tasks = []
+    for start in range(0, playouts, BATCH_SIZE):
+        count = min(BATCH_SIZE, playouts - start)
+        tasks.append((pos, count, seeder.getrandbits(64), max_turns))
+    start_time = time.perf_counter()
+    if workers == 1:
+        results = [_batch_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_batch_task, tasks))
+    elapsed = time.perf_counter() - start_time
+    wins = [0, 0, 0]
+    reasons = {"g": 0, "e": 0, "m": 0}
+    total_turns = 0
+    for batch_wins, batch_reasons, batch_turns in results:
+        for ix in range(3):
+            wins[ix] += batch_wins[ix]
+        for reason, count in batch_reasons.items():
+            reasons[reason] += count
+        total_turns += batch_turns
+    return {
+        "playouts": playouts,
+        "workers": workers,
+        "seed": seed,
+        "max_turns": max_turns,
+        "gold_wins": wins[Color.GOLD],
+        "silver_wins": wins[Color.SILVER],
+        "unfinished": wins[2],
+        "gold_win_rate": wins[Color.GOLD] / playouts if playouts else 0.0,
+        "silver_win_rate": wins[Color.SILVER] / playouts if playouts else 0.0,
+        "goal": reasons["g"],
+        "elimination": reasons["e"],
+        "immobilization": reasons["m"],
+        "average_turns": total_turns / playouts if playouts else 0.0,
+        "seconds": elapsed,
+        "playouts_per_second": playouts / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(args=None):
+    """Main entry point
+
+    Plays random games from a position file and reports how often each side
+    won and how.
+    """
+    parser = ArgumentParser(description="Score a position with random playouts")
+    parser.add_argument(
+        "-n", "--playouts", type=int, default=100, help="Number of games to play"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes to play with, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed for reproducible playouts"
+    )
+    parser.add_argument(
+        "-t",
+        "--max-turns",
+        type=int,
+        default=None,
+        help="Stop a game unfinished after this many moves",
+    )
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument("position", help="Position file in long or short format")
+    config = parser.parse_args(args)
+    if config.playouts < 1:
+        print("Playouts must be at least 1")
+        return 1
+    if config.jobs is not None and config.jobs < 1:
+        print("Jobs must be at least 1")
+        return 1
+    if config.max_turns is not None and config.max_turns < 1:
+        print("Max turns must be at least 1")
+        return 1
+
+    with open(config.position) as posfile:
+        movenum, pos = board.parse_pos_file(posfile.readlines())
+    result = rollout(pos, config.playouts, config.jobs, config.seed, config.max_turns)
+    if config.json:
+        report = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "file": config.position,
+            "move": f"{movenum}{'gs'[pos.color]}",
+            "position": pos.board_to_str("short"),
+            "results": result,
+        }
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"{config.position} {movenum}{'gs'[pos.color]}")
+        print(
+            f"  gold {result['gold_wins']} wins {result['gold_win_rate']:.1%}, "
+            f"silver {result['silver_wins']} wins {result['silver_win_rate']:.1%}, "
+            f"{result['unfinished']} unfinished"
+        )
+        print(
+            f"  {result['goal']} by goal, {result['elimination']} by elimination, "
+            f"{result['immobilization']} by immobilization"
+        )
+        print(
+            f"  {result['playouts']} playouts averaging "
+            f"{result['average_turns']:.1f} turns in {result['seconds']:.3f}s "
+            f"{result['playouts_per_second']:.1f} playouts/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
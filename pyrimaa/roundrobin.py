@@ -5,8 +5,10 @@ import sys
 import time
 from argparse import ArgumentParser
 from configparser import ConfigParser, NoOptionError
+from contextlib import ExitStack
 
-from pyrimaa import aei
+from pyrimaa import aei, pgn
+from pyrimaa.archive import ArchiveWriter
 from pyrimaa.game import Game
 from pyrimaa.util import TimeControl
 
@@ -56,6 +58,7 @@ def get_config(args=None):
     parser.add_argument(
         "--config", default="roundrobin.cfg", help="Configuration file to use"
     )
+    parser.add_argument("--archive", help="Binary game archive filename")
     parser.add_argument("--log", help="Set log output level")
     parser.add_argument("--pgn", help="PGN results filename")
     parser.add_argument("-r", "--rounds", type=int, help="Number of rounds to run")
@@ -108,6 +111,12 @@ def get_config(args=None):
         except Exception:
             pass
 
+    if args.archive is None:
+        try:
+            args.archive = config.get("global", "archive_filename")
+        except NoOptionError:
+            pass
+
     if args.rounds is None:
         try:
             args.rounds = config.getint("global", "rounds")
@@ -179,7 +188,7 @@ def main(args=None):
     print()
 
     # setup to write a bayeselo compatible pgn file
-    write_pgn = False
+    pgn_file = None
     if cfg.pgn is not None:
         try:
             pgn_file = open(cfg.pgn, "a+")
@@ -187,7 +196,14 @@ def main(args=None):
             print(f"Could not open pgn file {cfg.pgn}")
             return 1
         print(f"Writing results to pgn file: {cfg.pgn}")
-        write_pgn = True
+    archive_writer = None
+    if cfg.archive is not None:
+        try:
+            archive_writer = ArchiveWriter(cfg.archive, append=True)
+        except (OSError, ValueError) as exc:
+            print(f"Could not open game archive {cfg.archive}: {exc}")
+            return 1
+        print(f"Writing games to archive: {cfg.archive}")
 
     bots = []
     for bname in cfg.bots:
@@ -219,6 +235,14 @@ def main(args=None):
             print(f"Did not find a bot section for {bname}")
             return 1
 
+    with ExitStack() as stack:
+        if archive_writer is not None:
+            stack.enter_context(archive_writer)
+        return play_rounds(cfg, bots, timecontrol, tctl_str, pgn_file, archive_writer)
+
+
+def play_rounds(cfg, bots, timecontrol, tctl_str, pgn_file, archive_writer):
+    """Play the rounds of the tournament, recording the games as they end"""
     start_time = time.time()
     for round_num in range(cfg.rounds):
         for bot_ix, bot in enumerate(bots[:-1]):
@@ -264,26 +288,32 @@ def main(args=None):
                     [gbot, sbot][wside ^ 1]["timeouts"] += 1
                 winner["reasons"][reason] = winner["reasons"].get(reason, 0) + 1
 
-                # write game result to pgn file
-                if write_pgn:
+                # write game record to the pgn file and archive
+                if pgn_file is not None or archive_writer is not None:
                     ply_count = game.movenumber * 2
                     if game.position.color:
                         ply_count -= 1
                     else:
                         ply_count -= 2
                     results = ["1-0", "0-1"]
-                    pgn_file.write(f'[White "{gbot["name"]}"]\n')
-                    pgn_file.write(f'[Black "{sbot["name"]}"]\n')
+                    tags = [("White", gbot["name"]), ("Black", sbot["name"])]
                     if timecontrol:
-                        pgn_file.write(f'[TimeControl "{tctl_str}"]\n')
-                    pgn_file.write(f'[PlyCount "{ply_count}"]\n')
-                    pgn_file.write(f'[ResultCode "{reason}"]\n')
-                    pgn_file.write(f'[Result "{results[wside]}"]\n')
-                    pgn_file.write("\n")
-                    for move in game.moves:
-                        pgn_file.write(f"{move}\n")
-                    pgn_file.write(f"{results[wside]}\n\n")
-                    pgn_file.flush()
+                        tags.append(("TimeControl", tctl_str))
+                    tags += [
+                        ("PlyCount", str(ply_count)),
+                        ("ResultCode", reason),
+                        ("Result", results[wside]),
+                    ]
+                    if pgn_file is not None:
+                        pgn.write_game(pgn_file, tags, game.moves)
+                        pgn_file.flush()
+                    if archive_writer is not None:
+                        try:
+                            archive_writer.add_game(tags, game.moves)
+                        except ValueError as exc:
+                            log.error("Could not add game to archive: %s", exc)
+                        else:
+                            archive_writer.flush()
 
                 # give the engines up to 30 more seconds to exit normally
                 for _ in range(30):
@@ -13,6 +13,7 @@ from pyrimaa.board import (
     Position,
     parse_short_pos,
 )
+from pyrimaa.book import Book
 
 
 class _ComThread(Thread):
@@ -45,6 +46,7 @@ class AEIEngine:
         self.strict_checks = True
         self.move_delay = None
         self.total_move_time = 0.0
+        self.book = None
         self.controller = controller
         try:
             header = controller.messages.get(30)
@@ -89,6 +91,15 @@ class AEIEngine:
             self.strict_checks = value.lower().strip() not in ["false", "no", "0"]
         elif name == "delaymove":
             self.move_delay = float(value)
+        elif name == "book":
+            if self.book is not None:
+                self.book.close()
+                self.book = None
+            if value and value.strip():
+                try:
+                    self.book = Book(value.strip())
+                except (OSError, ValueError) as exc:
+                    self.log(f"Warning: Could not open book, {exc}")
         elif name not in std_opts:
             self.log(f"Warning: Received unrecognized option, {name}")
 
@@ -105,12 +116,17 @@ class AEIEngine:
     def go(self):
         pos = self.position
         start_time = time.time()
-        if self.insetup:
+        move_str = None
+        if self.book is not None:
+            # None once the game has left the book
+            move_str = self.book.choose(pos)
+        if move_str is None and self.insetup:
             setup = Position(Color.GOLD, 4, BASIC_SETUP)
             setup_moves = setup.to_placing_move()
             move_str = setup_moves[pos.color][2:]
-        else:
-            steps, result = pos.get_rnd_step_move()
+        elif move_str is None:
+            # take a win by goal when there is one
+            steps, result = pos.get_goal_move() or pos.get_rnd_step_move()
             if steps is None:
                 # we are immobilized, return an empty move
                 move_str = ""
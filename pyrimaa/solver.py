@@ -0,0 +1,199 @@
+"""Prove or refute forced wins with depth-first proof-number search
+
+The side to move at the root is the attacker, it is looking for a win by
+goal, elimination or immobilization within a given number of its own moves.
+Positions are expanded with get_moves so this is only practical in endgames
+or other positions with few moves.
+"""
+
+import time
+
+from pyrimaa.board import Color
+
+INFINITY = 10**9
+
+WIN = "win"
+LOSS = "loss"
+UNKNOWN = "unknown"
+
+
+class _SearchLimit(Exception):
+    """Raised inside the search when the node or time limit is reached"""
+
+
+class TranspositionTable:
+    """Proof and disproof numbers of positions keyed by Zobrist hash
+
+    Holds at most max_entries entries, when full the least recently stored
+    entry is dropped.
+    """
+
+    def __init__(self, max_entries=1000000):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def store(self, key, pn, dn):
+        entries = self.entries
+        if key in entries:
+            del entries[key]
+        elif len(entries) >= self.max_entries:
+            del entries[next(iter(entries))]
+        entries[key] = (pn, dn)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class Solver:
+    """Depth-first proof-number search for forced wins
+
+    max_nodes and max_time limit the positions evaluated and the seconds
+    spent by each call to solve, when reached the result is unknown. The
+    transposition table is kept between calls.
+    """
+
+    def __init__(self, max_entries=1000000, max_nodes=None, max_time=None):
+        self.table = TranspositionTable(max_entries)
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.nodes = 0
+        self._attacker = Color.GOLD
+        self._deadline = None
+
+    def _evaluate(self, pos, depth):
+        """Proof and disproof numbers of a position not yet expanded
+
+        depth is the number of moves the attacker has left.
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise _SearchLimit("node limit")
+        end = pos.is_end_state()
+        if end:
+            attacker_won = (end > 0) == (self._attacker == Color.GOLD)
+            return (0, INFINITY) if attacker_won else (INFINITY, 0)
+        if pos.color == self._attacker:
+            if depth < 1:
+                return (INFINITY, 0)
+            if pos.get_goal_move():
+                return (0, INFINITY)
+        else:
+            if pos.get_goal_move():
+                return (INFINITY, 0)
+            # the attacker has no moves left to win with after this one
+            if depth < 1:
+                return (INFINITY, 0)
+        return (1, 1)
+
+    def _lookup(self, pos, depth):
+        key = (pos._zhash, depth)
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self._evaluate(pos, depth)
+            self.table.store(key, *entry)
+        return entry
+
+    def _children(self, pos, depth):
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _SearchLimit("time limit")
+        if pos.color == self._attacker:
+            depth -= 1
+        return [(child, depth) for child in pos.get_moves(canonical=True)]
+
+    def _mid(self, pos, depth, pn_threshold, dn_threshold):
+        """Search below pos until its numbers reach one of the thresholds"""
+        key = (pos._zhash, depth)
+        children = self._children(pos, depth)
+        is_or = pos.color == self._attacker
+        numbers = [self._lookup(child, cdepth) for child, cdepth in children]
+        if not numbers:
+            # every move returns to the starting position, so there are none
+            numbers = [(INFINITY, 0) if is_or else (0, INFINITY)]
+        while True:
+            if is_or:
+                pn = min(pn for pn, _ in numbers)
+                dn = min(INFINITY, sum(dn for _, dn in numbers))
+            else:
+                pn = min(INFINITY, sum(pn for pn, _ in numbers))
+                dn = min(dn for _, dn in numbers)
+            if pn >= pn_threshold or dn >= dn_threshold:
+                break
+            # the most promising child and the number of the next best
+            best = second = None
+            select = 0 if is_or else 1
+            for ix, entry in enumerate(numbers):
+                if best is None or entry[select] < numbers[best][select]:
+                    if best is not None:
+                        second = numbers[best][select]
+                    best = ix
+                elif second is None or entry[select] < second:
+                    second = entry[select]
+            if second is None:
+                second = INFINITY
+            cpn, cdn = numbers[best]
+            if is_or:
+                child_pn = min(pn_threshold, second + 1)
+                child_dn = dn_threshold - dn + cdn
+            else:
+                child_pn = pn_threshold - pn + cpn
+                child_dn = min(dn_threshold, second + 1)
+            child, cdepth = children[best]
+            numbers[best] = self._mid(child, cdepth, child_pn, child_dn)
+        self.table.store(key, pn, dn)
+        return (pn, dn)
+
+    def solve(self, pos, depth):
+        """Look for a win for the side to move within depth of its moves
+
+        Returns a dictionary with the result, which is WIN, LOSS or UNKNOWN,
+        the winning move as a list of steps when there is one, the nodes
+        evaluated, the seconds taken and nodes per second. A LOSS means there
+        is no forced win within depth moves, not that the other side has one.
+        """
+        self._attacker = pos.color
+        self.nodes = 0
+        start = time.perf_counter()
+        self._deadline = None if self.max_time is None else start + self.max_time
+        result = UNKNOWN
+        move = None
+        try:
+            pn, dn = self._lookup(pos, depth)
+            if pn and dn:
+                pn, dn = self._mid(pos, depth, INFINITY, INFINITY)
+        except _SearchLimit:
+            pass
+        else:
+            if pn == 0:
+                result = WIN
+                move = self._winning_move(pos, depth)
+            elif dn == 0:
+                result = LOSS
+        elapsed = time.perf_counter() - start
+        return {
+            "result": result,
+            "move": move,
+            "depth": depth,
+            "nodes": self.nodes,
+            "seconds": elapsed,
+            "nps": self.nodes / elapsed if elapsed > 0 else 0.0,
+            "table_entries": len(self.table),
+        }
+
+    def _winning_move(self, pos, depth):
+        goal = pos.get_goal_move()
+        if goal:
+            return goal[0]
+        for child, steps in pos.get_moves().items():
+            entry = self.table.get((child._zhash, depth - 1))
+            if entry is None:
+                entry = self._evaluate(child, depth - 1)
+            if entry[0] == 0:
+                return steps
+        # the proof was dropped from the table
+        return None
@@ -7,7 +7,7 @@ from importlib import reload
 from io import StringIO
 from tempfile import NamedTemporaryFile
 
-from pyrimaa import aei, analyze, board
+from pyrimaa import aei, analyze, board, book
 
 
 @contextmanager
@@ -193,6 +193,20 @@ illegal_setup = """\
 """
 
 
+race_pos = """12g
+ +-----------------+
+8| . . . . . . . r |
+7| . . . . . . . e |
+6| . . x . . x . . |
+5| . . . . . . . . |
+4| . . . . . . . . |
+3| R . x . . x . . |
+2| . . . . . . . . |
+1| . . . E . . . . |
+ +-----------------+
+   a b c d e f g h"""
+
+
 class FastTimeoutCom(aei._ProcCom):
     _original_procom = aei._ProcCom
 
@@ -431,3 +445,60 @@ class AnalyzeTest(unittest.TestCase):
                 stdout = out.getvalue()
             self.assertEqual(ret, 0)
             self.assertIn("Disabling full legality checking on setup", stdout)
+
+    def test_solve(self):
+        with get_temps(1) as (pos,):
+            pos.write(race_pos.encode("utf-8"))
+            pos.close()
+            with save_stdio() as (out, err):
+                ret = analyze.main(
+                    ["--config", "nonexistantfilename", "--solve", "2", pos.name]
+                )
+                stdout = out.getvalue()
+            self.assertEqual(ret, 0)
+            self.assertIn("solve win in 2 moves", stdout)
+            self.assertIn("bestmove: ", stdout)
+            with save_stdio() as (out, err):
+                ret = analyze.main(
+                    ["--config", "nonexistantfilename", "--solve", "1", pos.name]
+                )
+                stdout = out.getvalue()
+            self.assertEqual(ret, 0)
+            self.assertIn("solve loss in 1 moves", stdout)
+            self.assertNotIn("bestmove: ", stdout)
+            with save_stdio() as (out, err):
+                ret = analyze.main(["--solve", "0", pos.name])
+            self.assertGreater(ret, 0)
+
+    def test_book(self):
+        setup = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        gold_setup, silver_setup = [m[2:] for m in setup.to_placing_move()]
+        games = [
+            ([gold_setup, silver_setup, "Da2n Da3n"], board.Color.GOLD),
+            ([gold_setup, silver_setup, "Dh2n"], board.Color.SILVER),
+        ]
+        with get_temps(2) as (pos, book_file):
+            pos.write(f"1g {gold_setup}\n1s {silver_setup}\n".encode())
+            pos.close()
+            book_file.close()
+            book.build_book(games, book_file.name)
+            with save_stdio() as (out, err):
+                ret = analyze.main(
+                    [
+                        "--config",
+                        "nonexistantfilename",
+                        "--book",
+                        book_file.name,
+                        pos.name,
+                    ]
+                )
+                stdout = out.getvalue()
+            self.assertEqual(ret, 0)
+            self.assertIn("book 2 moves", stdout)
+            self.assertIn("Da2n Da3n: weight 1, won 1 of 1 games", stdout)
+            self.assertIn("Dh2n: weight 1, won 0 of 1 games", stdout)
+            with save_stdio() as (out, err):
+                ret = analyze.main(["--book", pos.name, pos.name])
+                stdout = out.getvalue()
+            self.assertEqual(ret, 1)
+            self.assertIn("Could not open book", stdout)
@@ -0,0 +1,164 @@
+import os
+import random
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from pyrimaa import archive, board, pgn
+from pyrimaa.board import Color, Position
+
+GOLD_SETUP, SILVER_SETUP = (
+    move[2:] for move in Position(Color.GOLD, 4, board.BASIC_SETUP).to_placing_move()
+)
+
+
+def random_records(count, seed):
+    """Games as roundrobin records them, with captures and odd moves"""
+    rnd = random.Random(seed)
+    records = []
+    for num in range(count):
+        pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+        moves = [f"1g {GOLD_SETUP}", f"1s {SILVER_SETUP}"]
+        number = 2
+        for _ in range(rnd.randrange(1, 60)):
+            steps, result = pos.get_rnd_step_move(rnd)
+            if steps is None or result.is_end_state():
+                break
+            moves.append(f"{number}{'gs'[pos.color]} {pos.steps_to_str(steps)}")
+            number += pos.color
+            pos = result
+        if num % 5 == 4:
+            # moves kept as text, an odd length one and one of unicode
+            moves.append(f"{number}{'gs'[pos.color]} resigns")
+            moves.append(f"{number + pos.color}{'sg'[pos.color]} Ee2n  Ee3n ✓")
+        wside = rnd.choice((Color.GOLD, Color.SILVER))
+        tags = [("White", f"bot{num % 3}"), ("Black", "other")]
+        if num % 2:
+            tags.append(("TimeControl", "3s/30s/100"))
+        tags += [
+            ("PlyCount", str(len(moves))),
+            ("ResultCode", rnd.choice("gemt")),
+            ("Result", ["1-0", "0-1"][wside]),
+        ]
+        records.append((tags, moves))
+    return records
+
+
+def to_text(records):
+    out = StringIO()
+    for tags, moves in records:
+        pgn.write_game(out, tags, moves)
+    return out.getvalue()
+
+
+class ArchiveTest(unittest.TestCase):
+    def test_encode_move(self):
+        for move in (GOLD_SETUP, "Ee2n", "Ee2n Ee3n rb3e rc3x", "Da2n  Da3n", "", "x"):
+            words = archive.encode_move(move)
+            self.assertEqual(list(archive.decode_moves(words)), [move])
+        self.assertEqual(len(archive.encode_move(GOLD_SETUP)), 16)
+        self.assertEqual(len(archive.encode_move("Ee2n Ee3n rb3e rc3x")), 4)
+        self.assertRaises(ValueError, archive.encode_move, "x" * 5000)
+
+    def test_round_trip(self):
+        records = random_records(30, 5)
+        text = to_text(records)
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "games.arc")
+            self.assertEqual(archive.pack_games(text.splitlines(), path), 30)
+            self.assertLess(os.path.getsize(path), len(text.encode("utf-8")) / 2)
+            out = StringIO()
+            self.assertEqual(archive.unpack_games(path, out), 30)
+            self.assertEqual(out.getvalue(), text)
+            with archive.GameArchive(path) as games:
+                self.assertEqual(len(games), 30)
+                for num in (29, 0, 17):
+                    tags, moves = records[num]
+                    self.assertEqual(games[num], (tags, moves))
+                    self.assertEqual(games.tags(num), tags)
+                    self.assertEqual(
+                        games.result(num),
+                        (pgn.winner(dict(tags)), dict(tags)["ResultCode"]),
+                    )
+                self.assertEqual(games[-1], records[-1])
+                self.assertEqual(next(games.moves(3)), records[3][1][0])
+                self.assertRaises(IndexError, games.tags, 30)
+
+            # appending keeps the games already there without rewriting them
+            with open(path, "rb") as archive_file:
+                packed = archive_file.read()
+            with archive.ArchiveWriter(path, append=True) as writer:
+                self.assertEqual(len(writer), 30)
+                writer.add_game([("Result", "1-0")], ["12s Ee2n", "13g Ee3n"])
+                writer.add_game([], [])
+                self.assertRaises(ValueError, writer.add_game, [], ["1g Ee2n", "2g a"])
+                self.assertRaises(ValueError, writer.add_game, [], ["Ee2n"])
+                self.assertRaises(ValueError, writer.add_game, [], ["70000g Ee2n"])
+                self.assertRaises(
+                    ValueError, writer.add_game, [("Event", "")] * 70000, []
+                )
+            with open(path, "rb") as archive_file:
+                appended = archive_file.read()
+            header = archive._HEADER.size
+            self.assertEqual(appended[header : len(packed)], packed[header:])
+            with archive.GameArchive(path) as games:
+                self.assertEqual(len(games), 32)
+                self.assertEqual(list(games)[:30], records)
+                self.assertEqual(
+                    games[30], ([("Result", "1-0")], ["12s Ee2n", "13g Ee3n"])
+                )
+                self.assertEqual(games.result(30), (Color.GOLD, None))
+                self.assertEqual(games[31], ([], []))
+                self.assertEqual(games.result(31), (None, None))
+
+            # the archive stays whole until a flush writes the new games
+            writer = archive.ArchiveWriter(path, append=True)
+            writer.add_game([("Result", "0-1")], ["1g Ee2n"])
+            with archive.GameArchive(path) as games:
+                self.assertEqual(len(games), 32)
+                self.assertEqual(games[0], records[0])
+            writer.flush()
+            writer.add_game([], ["2s Ee3n"])
+            with archive.GameArchive(path) as games:
+                self.assertEqual(len(games), 33)
+                self.assertEqual(games[32], ([("Result", "0-1")], ["1g Ee2n"]))
+            writer.close()
+            # a game cut off part way through writing is left out
+            with open(path, "ab") as archive_file:
+                archive_file.write(b"\x01\x02\x03")
+            with archive.GameArchive(path) as games:
+                self.assertEqual(len(games), 34)
+                self.assertEqual(list(games)[:30], records)
+                self.assertEqual(games[33], ([], ["2s Ee3n"]))
+            with archive.ArchiveWriter(path, append=True) as writer:
+                writer.add_game([], ["3g Ee4n"])
+            with archive.GameArchive(path) as games:
+                self.assertEqual(games[-1], ([], ["3g Ee4n"]))
+            self.assertEqual(os.listdir(tmpdir), ["games.arc"])
+
+            with open(path, "r+b") as archive_file:
+                archive_file.truncate(os.path.getsize(path) - 1)
+            self.assertRaises(ValueError, archive.GameArchive, path)
+            open(path, "wb").close()
+            self.assertRaises(ValueError, archive.GameArchive, path)
+
+    def test_main(self):
+        text = to_text(random_records(4, 9))
+        with TemporaryDirectory() as tmpdir:
+            pgn_path = os.path.join(tmpdir, "games.pgn")
+            with open(pgn_path, "w") as pgn_file:
+                pgn_file.write(text)
+            path = os.path.join(tmpdir, "games.arc")
+            out = StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(archive.main(["pack", path, pgn_path]), 0)
+                self.assertEqual(archive.main(["pack", "-a", path, pgn_path]), 0)
+            self.assertIn("Wrote 4 games", out.getvalue())
+            out_path = os.path.join(tmpdir, "out.pgn")
+            self.assertEqual(archive.main(["unpack", path, out_path]), 0)
+            with open(out_path) as pgn_file:
+                self.assertEqual(pgn_file.read(), text + text)
+            with redirect_stdout(StringIO()):
+                self.assertEqual(archive.main(["unpack", pgn_path]), 1)
+                self.assertEqual(archive.main(["pack", "-a", pgn_path, pgn_path]), 1)
@@ -0,0 +1,77 @@
+import json
+import os
+import random
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from pyrimaa import benchmark, board
+
+SHORT_POS = """1g
+[rrrrrrrrdhcemchd                                DHCMECHDRRRRRRRR]
+"""
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_position_size(self):
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        size = benchmark.position_size(pos, 100)
+        self.assertGreater(size, 0)
+        self.assertLess(size, 2000)
+
+    def test_memory(self):
+        with NamedTemporaryFile("w", suffix=".txt", delete=False) as pfile:
+            pfile.write(SHORT_POS)
+        try:
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = benchmark.main(["--json", "memory", pfile.name])
+            self.assertEqual(ret, 0)
+            report = json.loads(out.getvalue())
+            self.assertEqual(report["benchmark"], "memory")
+            self.assertEqual(report["results"]["moves"], 3353)
+            self.assertGreater(report["results"]["bytes_per_position"], 0)
+            self.assertGreaterEqual(
+                report["results"]["peak_bytes"], report["results"]["moves_bytes"]
+            )
+            self.assertGreater(report["results"]["moves_bytes"], 0)
+        finally:
+            os.remove(pfile.name)
+
+    def test_startup(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            ret = benchmark.main(["--json", "startup", "-r", "1"])
+        self.assertEqual(ret, 0)
+        results = json.loads(out.getvalue())["results"]
+        self.assertEqual(results["module"], "pyrimaa.board")
+        self.assertGreater(results["startup_seconds"], 0)
+        self.assertGreater(results["interpreter_seconds"], 0)
+
+    def test_bits(self):
+        for ix in range(64):
+            bit = 1 << ix
+            self.assertEqual(benchmark._bit_to_index_cascade(bit), ix)
+            self.assertEqual(board.bit_to_index(bit), ix)
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        result = benchmark.bench_bits(pos, repeat=1, number=1)
+        self.assertIn("bit_length_scan", result)
+        self.assertGreater(result["cascade_scan"], 0)
+
+    def test_notation(self):
+        pos = board.parse_short_pos(board.Color.GOLD, 4, SHORT_POS.splitlines()[1])
+        result = benchmark.bench_notation(pos, games=2, repeat=1)
+        self.assertEqual(result["position_moves"], 3353)
+        self.assertGreater(result["moves"], 4)
+        self.assertGreater(result["decode_cached_per_second"], 0)
+        self.assertGreater(result["replay_per_second"], 0)
+
+    def test_sampler(self):
+        pos = board.parse_short_pos(board.Color.GOLD, 4, SHORT_POS.splitlines()[1])
+        result = benchmark.bench_sampler(pos, samples=5, uniform_samples=1)
+        self.assertGreater(result["restart_per_second"], 0)
+        self.assertGreater(result["backtrack_per_second"], 0)
+        self.assertGreater(result["uniform_per_second"], 0)
+        steps, result = benchmark._restart_step_move(pos, random.Random(3))
+        self.assertEqual(pos.do_move(steps), result)
@@ -1,7 +1,8 @@
+import pickle
 import random
 import unittest
 
-from pyrimaa import board
+from pyrimaa import board, board_tables, make_tables
 
 GOLD_GOAL_POS = """23w
  +-----------------+
@@ -157,6 +158,20 @@ class BoardTest(unittest.TestCase):
         move_num, position = board.parse_long_pos(INDUCE_NULL_MOVE_POS)
         for _ in range(100):
             position.get_rnd_step_move()
+        moves = position.get_moves()
+        rnd = random.Random(1017)
+        for uniform in (False, True):
+            for _ in range(50):
+                steps, result = position.get_rnd_step_move(rnd, uniform)
+                self.assertIn(result, moves)
+                self.assertEqual(position.do_move(steps), result)
+            self.assertEqual(
+                position.get_rnd_step_move(17, uniform),
+                position.get_rnd_step_move(random.Random(17), uniform),
+            )
+        move_num, position = board.parse_long_pos(DOUBLE_IMMOBILIZATION_POS)
+        self.assertEqual(position.get_rnd_step_move(1), (None, position))
+        self.assertEqual(position.get_rnd_step_move(1, True), (None, position))
 
     def test_utility(self):
         self.assertEqual(board.index_to_alg(0), "a1")
@@ -193,6 +208,51 @@ class BoardTest(unittest.TestCase):
         b1 = b1.do_move_str("Cc2n")
         self.assertEqual(b1, b2)
 
+    def test_compact_position(self):
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        self.assertFalse(hasattr(pos, "__dict__"))
+        self.assertRaises(AttributeError, setattr, pos, "extra", 1)
+        self.assertIsInstance(pos.placement, tuple)
+        npos = pos.do_step((8, 16))
+        self.assertIsInstance(npos.placement, tuple)
+        self.assertIs(pos.get_null_move().placement, pos.placement)
+
+    def test_full_hash(self):
+        gb = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        sb = board.Position(board.Color.SILVER, 4, board.BASIC_SETUP)
+        self.assertNotEqual(hash(gb), hash(sb))
+        g3 = board.Position(board.Color.GOLD, 3, board.BASIC_SETUP)
+        self.assertNotEqual(hash(gb), hash(g3))
+        move, pos = board.parse_long_pos(CHECK_STEP_POS)
+        push_pos = pos.do_step((36, 35))
+        nopush = board.Position(
+            push_pos.color,
+            push_pos.stepsLeft,
+            push_pos.bitBoards,
+            False,
+            push_pos.last_piece,
+            push_pos.last_from,
+        )
+        self.assertNotEqual(hash(push_pos), hash(nopush))
+        self.assertNotEqual(push_pos, nopush)
+        step_pos = pos.do_step((8, 16))
+        nolast = board.Position(step_pos.color, step_pos.stepsLeft, step_pos.bitBoards)
+        self.assertNotEqual(hash(step_pos), hash(nolast))
+
+        positions = [gb, pos, push_pos, board.parse_long_pos(CHECK_TRAP_STEP)[1]]
+        for start in positions:
+            start.check_hash()
+            start.get_null_move().check_hash()
+            for _, child in start.get_steps():
+                child.check_hash()
+                for _, grandchild in child.get_steps():
+                    grandchild.check_hash()
+            for _, child in start.get_single_steps():
+                child.check_hash()
+        for move in gb.get_moves():
+            move.check_hash()
+        self.assertEqual(gb.do_move([(8, 16)]), gb.do_step((8, 16)).get_null_move())
+
     def test_sanity_checks(self):
         pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
         pos.check_hash()
@@ -393,6 +453,17 @@ class BoardTest(unittest.TestCase):
         npos = spos.remove_piece(56)
         self.assertEqual(pos, npos)
         self.assertEqual(npos.piece_at(1 << 56), board.Piece.EMPTY)
+        # part way through a turn the edited position starts a fresh step
+        mid_turn = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP).do_step(
+            (8, 16)
+        )
+        npos = mid_turn.remove_piece(63)
+        npos.check_hash()
+        self.assertEqual(npos.last_piece, board.Piece.EMPTY)
+        self.assertEqual(npos, board.Position(board.Color.GOLD, 3, npos.bitBoards))
+        ppos = npos.place_piece(board.Piece.SRABBIT, 63)
+        ppos.check_hash()
+        self.assertEqual(ppos, board.Position(board.Color.GOLD, 3, mid_turn.bitBoards))
 
     def test_check_step(self):
         move, pos = board.parse_long_pos(CHECK_STEP_POS)
@@ -629,3 +700,306 @@ class BoardTest(unittest.TestCase):
         moves, nodes = pos.get_moves_nodes()
         self.assertEqual(len(moves), 3353)
         self.assertEqual(nodes, 16440)
+
+    def test_lazy_steps(self):
+        positions = [board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)]
+        for text in (CHECK_STEP_POS, CHECK_TRAP_STEP, DOUBLE_IMMOBILIZATION_POS):
+            positions.append(board.parse_long_pos(text)[1])
+        move, pos = board.parse_long_pos(CHECK_TRAP_STEP)
+        positions.append(pos.do_step((53, 45)))
+        positions.append(pos.do_step((54, 46)))
+        positions.append(pos.do_step((8, 16)).do_step((16, 24)).do_step((24, 32)))
+        for pos in positions:
+            steps = pos.get_steps()
+            lazy_steps = list(pos.iter_steps())
+            self.assertEqual([s for s, p in steps], [s for s, p in lazy_steps])
+            for (step, child), (lstep, piece) in zip(steps, lazy_steps):
+                self.assertEqual(pos.piece_at(1 << step[0]), piece)
+                self.assertEqual(pos.do_step(lstep, piece), child)
+            if pos.inpush:
+                continue
+            singles = pos.get_single_steps()
+            lazy_singles = list(pos.iter_single_steps())
+            self.assertEqual([s for s, p in singles], [s for s, p in lazy_singles])
+            for (_, child), (lstep, piece) in zip(singles, lazy_singles):
+                self.assertEqual(pos.do_step(lstep, piece), child)
+
+    def test_iter_moves(self):
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        moves = pos.get_moves()
+        iter_moves = list(pos.iter_moves())
+        self.assertEqual(len(iter_moves), len(moves))
+        self.assertEqual([(m, s) for s, m in iter_moves], list(moves.items()))
+        self.assertNotIn(pos.get_null_move(), [m for s, m in iter_moves])
+        # stopping early only takes the first moves found
+        first = []
+        for _, move in pos.iter_moves():
+            first.append(move)
+            if len(first) == 5:
+                break
+        self.assertEqual(first, list(moves)[:5])
+        for steps, move in iter_moves[:50]:
+            self.assertEqual(pos.do_move(steps), move)
+        move, pos = board.parse_long_pos(DOUBLE_IMMOBILIZATION_POS)
+        self.assertIsNone(next(pos.iter_moves(), None))
+
+    def test_rnd_game(self):
+        random.seed(1004)
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        num_moves, move = board._rnd_move(pos)
+        self.assertEqual(num_moves, 3353)
+        self.assertIn(move, pos.get_moves())
+        move, pos = board.parse_long_pos(DOUBLE_IMMOBILIZATION_POS)
+        self.assertEqual(board._rnd_move(pos), (0, None))
+        self.assertEqual(board.rnd_game(pos), -1)
+        move, pos = board.parse_long_pos(GOLD_GOAL_POS)
+        self.assertEqual(board.rnd_game(pos), 1)
+
+    def test_moveset(self):
+        for step in [(0, 8), (63, 55), (18, 19), (10, 2)]:
+            code = board.pack_step(step)
+            self.assertLess(code, 1 << 16)
+            self.assertEqual(board.unpack_step(code), step)
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        moves = pos.get_moves()
+        packed = pos.get_moves(packed=True)
+        self.assertIsInstance(packed, board.MoveSet)
+        self.assertEqual(len(packed), len(moves))
+        self.assertNotIn(pos.get_null_move(), packed)
+        for ix, (move, steps) in enumerate(list(moves.items())[:100]):
+            self.assertIn(move, packed)
+            self.assertIn(hash(move), packed)
+            self.assertEqual(packed.index(move), ix)
+            self.assertEqual(packed[move], steps)
+            self.assertEqual(packed.steps_at(ix), steps)
+            self.assertEqual(packed.position_at(ix), move)
+        self.assertEqual(list(packed)[:10], list(moves)[:10])
+        self.assertEqual(list(packed.items())[-10:], list(moves.items())[-10:])
+        self.assertRaises(ValueError, packed.index, pos)
+        self.assertRaises(KeyError, packed.__getitem__, pos)
+        self.assertFalse(packed.add(move, steps))
+        self.assertEqual(len(packed), len(moves))
+        packed_nodes, nodes = pos.get_moves_nodes(packed=True)
+        self.assertEqual(len(packed_nodes), 3353)
+        self.assertEqual(nodes, 16440)
+
+    def test_canonical_moves(self):
+        positions = [board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)]
+        for text in (CHECK_STEP_POS, INDUCE_NULL_MOVE_POS):
+            positions.append(board.parse_long_pos(text)[1])
+        random.seed(1005)
+        pos = positions[0]
+        for _ in range(30):
+            steps, pos = pos.get_rnd_step_move()
+        positions.append(pos)
+        total_nodes = total_cnodes = 0
+        for pos in positions:
+            moves, nodes = pos.get_moves_nodes()
+            cmoves, cnodes = pos.get_moves_nodes(canonical=True)
+            self.assertEqual(set(moves), set(cmoves))
+            self.assertLessEqual(cnodes, nodes)
+            total_nodes += nodes
+            total_cnodes += cnodes
+            for move, steps in list(cmoves.items())[::50]:
+                self.assertEqual(pos.do_move(steps), move)
+        self.assertLess(total_cnodes, total_nodes)
+        packed = positions[0].get_moves(packed=True, canonical=True)
+        self.assertEqual(len(packed), 3353)
+
+    def test_bit_primitives(self):
+        random.seed(1013)
+        values = [0, 1, 1 << 63, board.ALL_BITS, board.TRAPS]
+        values += [random.getrandbits(64) for _ in range(50)]
+        for bits in values:
+            expected = [1 << ix for ix in range(64) if bits & (1 << ix)]
+            self.assertEqual(list(board.iter_bits(bits)), expected)
+            self.assertEqual(board.popcount(bits), len(expected))
+        for ix in range(64):
+            bit = 1 << ix
+            self.assertEqual(board.bit_to_index(bit), ix)
+            self.assertEqual(board.SQUARE_BITS[ix], bit)
+            self.assertEqual(board.SQUARE_NEIGHBORS[ix], board.neighbors_of(bit))
+            self.assertEqual(board.alg_to_index(board.index_to_alg(ix)), ix)
+        self.assertEqual(board.index_to_alg(0), "a1")
+        self.assertEqual(board.index_to_alg(63), "h8")
+
+    def test_precomputed_tables(self):
+        tables = make_tables.generate_tables()
+        for name, value in tables.items():
+            self.assertEqual(getattr(board_tables, name), value, name)
+            self.assertIs(getattr(board, name), getattr(board_tables, name))
+        zobrist_keys = [tables["ZOBRIST_SIDE"], tables["ZOBRIST_PUSH"]]
+        zobrist_keys += tables["ZOBRIST_STEPS"] + tables["ZOBRIST_LAST_FROM"]
+        zobrist_keys += tables["ZOBRIST_LAST_PIECE"][1:]
+        for piece in tables["ZOBRIST_KEYS"][1:]:
+            zobrist_keys += piece
+        self.assertEqual(len(zobrist_keys), len(set(zobrist_keys)))
+        self.assertNotIn(0, zobrist_keys)
+        with open(board_tables.__file__) as tables_file:
+            self.assertEqual(tables_file.read(), make_tables.table_source())
+
+    def test_get_goal_move(self):
+        text = "[   e    rH      R                   E                          r]"
+        pos = board.parse_short_pos(board.Color.GOLD, 4, text)
+        steps, result = pos.get_goal_move()
+        self.assertEqual(pos.do_move(steps), result)
+        self.assertEqual(result.is_goal(), 1)
+        self.assertIsNone(
+            board.parse_short_pos(board.Color.GOLD, 3, text).get_goal_move()
+        )
+        # silver already has a rabbit on goal so any move wins
+        pos = board.parse_short_pos(board.Color.SILVER, 4, text)
+        self.assertEqual(pos.get_goal_move()[1].is_goal(), -1)
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        self.assertIsNone(pos.get_goal_move())
+        # cross check against every move from positions part way through a
+        # turn with rabbits near goal
+        rnd = random.Random(1019)
+        positions = []
+        for _ in range(20):
+            pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+            for _ in range(150):
+                if pos.is_end_state():
+                    break
+                if pos._goal_distance(pos.color) <= 2:
+                    npos = pos
+                    for _ in range(2):
+                        steps = npos.get_steps()
+                        if steps:
+                            npos = rnd.choice(steps)[1]
+                    if npos.color == pos.color:
+                        positions.append(npos)
+                steps, pos = pos.get_rnd_step_move(rnd)
+        self.assertGreater(len(positions), 50)
+        found = 0
+        for pos in positions:
+            mover = 1 if pos.color == board.Color.GOLD else -1
+            goal = pos.get_goal_move()
+            expected = any(move.is_goal() == mover for move in pos.get_moves())
+            self.assertEqual(goal is not None, expected)
+            if goal:
+                found += 1
+                steps, result = goal
+                self.assertEqual(pos.do_move(steps), result)
+                self.assertEqual(result.is_goal(), mover)
+        self.assertGreater(found, 5)
+
+    def test_to_bytes(self):
+        positions = []
+        for text in (CHECK_STEP_POS, INDUCE_NULL_MOVE_POS, DOUBLE_GOAL_POS):
+            pos = board.parse_long_pos(text)[1]
+            positions.append(pos)
+            positions += [spos for _, spos in pos.get_steps()[:20]]
+        # check positions in a push and after a step that allows a pull
+        self.assertTrue(any(pos.inpush for pos in positions))
+        self.assertTrue(any(pos.last_from is not None for pos in positions))
+        for pos in positions:
+            data = pos.to_bytes()
+            self.assertEqual(len(data), board.POSITION_BYTES)
+            npos = board.Position.from_bytes(data)
+            self.assertEqual(npos, pos)
+            self.assertEqual(npos.placement, pos.placement)
+            self.assertEqual(npos.bitBoards, pos.bitBoards)
+            self.assertEqual(npos.inpush, pos.inpush)
+            self.assertEqual(npos.last_from, pos.last_from)
+            npos.check_hash()
+            npos.check_boards()
+            ppos = pickle.loads(pickle.dumps(pos, pickle.HIGHEST_PROTOCOL))
+            self.assertEqual(ppos, pos)
+            self.assertEqual(hash(ppos), hash(pos))
+        self.assertRaises(ValueError, board.Position.from_bytes, data[:-1])
+
+    def test_mirror(self):
+        self.assertEqual(board.mirror_bits(0x0102040810204080), 0x8040201008040201)
+        self.assertEqual(board.mirror_bits(board.RANK_MASKS[3]), board.RANK_MASKS[3])
+        self.assertEqual(board.mirror_steps([(0, 8), (9, 1)]), [(7, 15), (14, 6)])
+        positions = []
+        for text in (CHECK_STEP_POS, INDUCE_NULL_MOVE_POS, DOUBLE_GOAL_POS):
+            pos = board.parse_long_pos(text)[1]
+            positions.append(pos)
+            positions += [spos for _, spos in pos.get_steps()[:20]]
+        self.assertTrue(any(pos.inpush for pos in positions))
+        self.assertTrue(any(pos.last_from is not None for pos in positions))
+        for pos in positions:
+            mpos = pos.mirror()
+            mpos.check_hash()
+            mpos.check_boards()
+            self.assertEqual(mpos._zhash, pos.mirror_key())
+            self.assertEqual(mpos.mirror_key(), pos._zhash)
+            self.assertEqual(mpos.canonical_key(), pos.canonical_key())
+            back = mpos.mirror()
+            self.assertEqual(back, pos)
+            self.assertEqual(back.bitBoards, pos.bitBoards)
+            self.assertEqual(back.last_from, pos.last_from)
+            for steps, spos in pos.get_steps()[:10]:
+                mstep = board.mirror_steps([steps])[0]
+                self.assertEqual(mpos.do_step(mstep), spos.mirror())
+        # a symmetric position is its own mirror
+        pos = board.Position(board.Color.GOLD, 4, board.BLANK_BOARD)
+        self.assertEqual(pos.mirror_key(), pos._zhash)
+        pos = board.parse_short_pos(board.Color.GOLD, 4, "[r" + " " * 62 + "R]")
+        self.assertNotEqual(pos.mirror_key(), pos._zhash)
+        moves = pos.get_moves()
+        mirrored = {mpos._zhash for mpos in pos.mirror().get_moves()}
+        self.assertEqual({mpos.mirror_key() for mpos in moves}, mirrored)
+
+    def test_has_legal_step(self):
+        positions = []
+        for text in (DOUBLE_IMMOBILIZATION_POS, CHECK_STEP_POS, INDUCE_NULL_MOVE_POS):
+            pos = board.parse_long_pos(text)[1]
+            positions += [pos, pos.get_null_move()]
+        random.seed(1010)
+        for _ in range(20):
+            pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+            for _ in range(200):
+                steps = pos.get_steps()
+                if not steps or pos.is_goal() or pos.is_rabbit_loss():
+                    break
+                positions.append(pos)
+                pos = random.choice(steps)[1]
+            positions.append(pos)
+        found = set()
+        for pos in positions:
+            has_step = next(pos.iter_steps(), None) is not None
+            self.assertEqual(pos.has_legal_step(), has_step)
+            found.add((has_step, pos.inpush))
+        self.assertIn((False, False), found)
+        self.assertIn((True, True), found)
+
+    def test_frozen_pieces(self):
+        def is_frozen(pos, ix):
+            piece = pos.piece_at(1 << ix)
+            pcolor = (piece & board.Piece.COLOR) >> 3
+            friendly = enemy = False
+            for nix in range(64):
+                if (1 << nix) & board.neighbors_of(1 << ix):
+                    npiece = pos.piece_at(1 << nix)
+                    if npiece == board.Piece.EMPTY:
+                        continue
+                    if (npiece & board.Piece.COLOR) >> 3 == pcolor:
+                        friendly = True
+                    elif npiece & board.Piece.DECOLOR > piece & board.Piece.DECOLOR:
+                        enemy = True
+            return enemy and not friendly
+
+        positions = [board.parse_long_pos(CHECK_STEP_POS)[1]]
+        random.seed(1009)
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        for _ in range(40):
+            steps, pos = pos.get_rnd_step_move()
+            if pos.is_end_state():
+                break
+            positions.append(pos)
+        for pos in positions:
+            all_frozen = 0
+            for color in (board.Color.GOLD, board.Color.SILVER):
+                frozen = 0
+                for ix in range(64):
+                    if (1 << ix) & pos.placement[color] and is_frozen(pos, ix):
+                        frozen |= 1 << ix
+                self.assertEqual(pos.frozen_pieces(color), frozen)
+                all_frozen |= frozen
+            for ix in range(64):
+                bit = 1 << ix
+                self.assertEqual(pos.is_frozen_at(bit), bool(bit & all_frozen))
+            self.assertEqual(pos.get_null_move().frozen_pieces(1), pos.frozen_pieces(1))
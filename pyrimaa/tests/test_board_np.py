@@ -0,0 +1,115 @@
+import random
+import unittest
+
+from pyrimaa import board
+
+try:
+    import numpy as np
+
+    from pyrimaa import board_np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+def random_positions(count, seed):
+    rnd = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        bitboards = [0] * board.Piece.COUNT
+        bitboards[board.Piece.GELEPHANT + 1] = None
+        bitboards[board.Piece.COLOR] = None
+        occupied = 0
+        for _ in range(rnd.randint(0, 40)):
+            bit = 1 << rnd.randrange(64)
+            if bit & (occupied | board.TRAPS):
+                continue
+            piece = rnd.choice(board.Piece.PCHARS.replace("x", "").strip())
+            bitboards[board.Piece.PCHARS.index(piece)] |= bit
+            occupied |= bit
+        bitboards[board.Piece.EMPTY] = board.ALL_BITS & ~occupied
+        pos = board.Position(rnd.randint(0, 1), rnd.randint(1, 4), bitboards)
+        for _ in range(rnd.randint(0, 3)):
+            steps = list(pos.iter_steps())
+            if not steps:
+                break
+            step, piece = rnd.choice(steps)
+            pos = pos.do_step(step, piece)
+        positions.append(pos)
+    return positions
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+class PositionBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.positions = random_positions(300, 1011)
+        self.positions.append(board.Position(board.Color.GOLD, 4, board.BASIC_SETUP))
+        self.batch = board_np.PositionBatch.from_positions(self.positions)
+
+    def test_conversion(self):
+        batch = self.batch
+        self.assertEqual(len(batch), len(self.positions))
+        self.assertEqual(batch.boards.dtype, np.uint64)
+        converted = batch.to_positions()
+        self.assertEqual(converted, self.positions)
+        for pos, cpos in zip(self.positions, converted):
+            self.assertEqual(pos.last_from, cpos.last_from)
+            self.assertEqual(pos.placement, cpos.placement)
+        empty = board_np.PositionBatch.from_positions([])
+        self.assertEqual(len(empty), 0)
+        self.assertRaises(
+            ValueError,
+            board_np.PositionBatch,
+            batch.boards[:3],
+            batch.color,
+            batch.steps_left,
+            batch.inpush,
+            batch.last_piece,
+            batch.last_from,
+        )
+
+    def test_neighbors_and_popcount(self):
+        rnd = random.Random(11)
+        bits = [rnd.getrandbits(64) for _ in range(100)] + [0, board.ALL_BITS]
+        neighbors = board_np.neighbors_of(np.array(bits, dtype=np.uint64))
+        self.assertEqual(
+            [int(n) for n in neighbors], [board.neighbors_of(b) for b in bits]
+        )
+        counts = board_np.popcount(np.array(bits, dtype=np.uint64))
+        self.assertEqual(list(counts), [bin(b).count("1") for b in bits])
+
+    def test_end_checks(self):
+        goal = self.batch.is_goal()
+        rabbit_loss = self.batch.is_rabbit_loss()
+        for ix, pos in enumerate(self.positions):
+            self.assertEqual(goal[ix], int(pos.is_goal()))
+            self.assertEqual(rabbit_loss[ix], int(pos.is_rabbit_loss()))
+        self.assertTrue((goal != 0).any())
+        self.assertTrue((rabbit_loss != 0).any())
+
+    def test_frozen_and_mobility(self):
+        placement = self.batch.placement()
+        frozen = self.batch.frozen()
+        mobility = self.batch.mobility()
+        for ix, pos in enumerate(self.positions):
+            for color in (board.Color.GOLD, board.Color.SILVER):
+                self.assertEqual(int(placement[color, ix]), pos.placement[color])
+                self.assertEqual(int(frozen[color, ix]), pos.frozen_pieces(color))
+            if pos.inpush:
+                continue
+            other = pos.get_null_move()
+            self.assertEqual(
+                mobility[pos.color, ix], len(list(pos.iter_single_steps()))
+            )
+            self.assertEqual(
+                mobility[other.color, ix], len(list(other.iter_single_steps()))
+            )
+
+    def test_material(self):
+        material = self.batch.material()
+        self.assertEqual(material.shape, (board.Piece.COUNT, len(self.positions)))
+        for ix, pos in enumerate(self.positions):
+            for piece, bits in enumerate(pos.bitBoards):
+                count = 0 if bits is None else bin(bits).count("1")
+                self.assertEqual(material[piece, ix], count)
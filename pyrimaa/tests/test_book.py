@@ -0,0 +1,161 @@
+import os
+import random
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from pyrimaa import board, book, notation
+from pyrimaa.board import Color, Position
+from pyrimaa.notation import MoveKind, decode_move
+
+GOLD_SETUP, SILVER_SETUP = (
+    move[2:] for move in Position(Color.GOLD, 4, board.BASIC_SETUP).to_placing_move()
+)
+
+GAMES_PGN = f"""[White "bot1"]
+[Black "bot2"]
+[Result "1-0"]
+
+1g {GOLD_SETUP}
+1s {SILVER_SETUP}
+2g Da2n Da3n
+2s dh7s dh6s
+1-0
+
+[White "bot2"]
+[Black "bot1"]
+[Result "0-1"]
+
+1g {GOLD_SETUP}
+1s {SILVER_SETUP}
+2g Da2n Da3n
+0-1
+"""
+
+
+def random_games(count, seed):
+    """Games of random moves after the basic setup, some played mirrored"""
+    rnd = random.Random(seed)
+    games = []
+    for _ in range(count):
+        pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+        moves = [GOLD_SETUP, SILVER_SETUP]
+        for _ in range(rnd.randrange(1, 8)):
+            if rnd.random() < 0.5:
+                steps, result = pos.get_rnd_step_move(rnd)
+            else:
+                steps, result = pos.mirror().get_rnd_step_move(rnd)
+                steps = board.mirror_steps(steps)
+                result = result.mirror()
+            moves.append(pos.steps_to_str(steps))
+            pos = result
+        games.append((moves, rnd.choice((Color.GOLD, Color.SILVER, None))))
+    return games
+
+
+class BookTest(unittest.TestCase):
+    def test_move_codes(self):
+        blank = Position(Color.GOLD, 4, board.BLANK_BOARD)
+        pos = blank.do_move_str(GOLD_SETUP)
+        for start, move_str in ((blank, GOLD_SETUP), (pos, SILVER_SETUP)):
+            kind, items = decode_move(move_str)
+            code = book.encode_move(start, kind, items)
+            self.assertTrue(code & notation.SETUP_FLAG)
+            kind, decoded = book.decode_move_code(start, code)
+            self.assertEqual(kind, MoveKind.SETUP)
+            self.assertEqual(start.do_setup(decoded), start.do_setup(items))
+        pos = pos.do_move_str(SILVER_SETUP)
+        steps = ((8, 16), (16, 24), (24, 32), (32, 40))
+        for start in (pos, pos.mirror()):
+            code = book.encode_move(start, MoveKind.STEPS, steps)
+            self.assertFalse(code & notation.SETUP_FLAG)
+            self.assertEqual(
+                book.decode_move_code(start, code), (MoveKind.STEPS, steps)
+            )
+        self.assertRaises(
+            ValueError, book.encode_move, pos, MoveKind.STEPS, steps + ((0, 8),)
+        )
+
+    def test_build_and_lookup(self):
+        games = random_games(100, 22)
+        games.append(([GOLD_SETUP, SILVER_SETUP, "Da2n Da3n Da4n Da5n Da6n"], None))
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "test.book")
+            result = book.build_book(games, path)
+            self.assertEqual(result["games"], 101)
+            self.assertEqual(result["illegal"], 1)
+            with book.Book(path) as opening_book:
+                self.assertEqual(len(opening_book), result["moves"])
+                blank = Position(Color.GOLD, 4, board.BLANK_BOARD)
+                found = opening_book.lookup(blank)
+                self.assertEqual(len(found), 1)
+                self.assertEqual(found[0][1:3], (101, 101))
+                self.assertEqual(
+                    blank.do_move_str(found[0][0]), blank.do_move_str(GOLD_SETUP)
+                )
+                for moves, _ in games[:-1]:
+                    pos = blank
+                    for move_str in moves:
+                        result = pos.do_move_str(move_str)
+                        found = opening_book.lookup(pos)
+                        self.assertIn(
+                            result, [pos.do_move_str(move[0]) for move in found]
+                        )
+                        if pos.mirror() != pos:
+                            mirrored = pos.mirror()
+                            self.assertIn(
+                                result.mirror(),
+                                [
+                                    mirrored.do_move_str(move[0])
+                                    for move in opening_book.lookup(mirrored)
+                                ],
+                            )
+                        pos = result
+                # gold moves always change the board
+                pos = Position(Color.SILVER, 4, board.BASIC_SETUP)
+                self.assertEqual(opening_book.lookup(pos), [])
+                self.assertIsNone(opening_book.choose(pos))
+                pos = blank.do_move_str(GOLD_SETUP)
+                self.assertEqual(
+                    pos.do_move_str(opening_book.choose(pos, 7)),
+                    pos.do_move_str(SILVER_SETUP),
+                )
+
+            small = os.path.join(tmpdir, "small.book")
+            result = book.build_book(games, small, max_ply=3, min_games=2)
+            with book.Book(small) as opening_book:
+                self.assertEqual(len(opening_book), result["moves"])
+                pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+                for _, weight, games_played, wins in opening_book.lookup(pos):
+                    self.assertGreaterEqual(games_played, 2)
+                    self.assertEqual(weight, games_played)
+                    self.assertLessEqual(wins, games_played)
+                self.assertEqual(opening_book.lookup(pos.do_move_str("Da2n")), [])
+
+            with open(path, "r+b") as book_file:
+                book_file.truncate(os.path.getsize(path) - 1)
+            self.assertRaises(ValueError, book.Book, path)
+            with open(path, "wb") as book_file:
+                book_file.write(b"not a book file at all")
+            self.assertRaises(ValueError, book.Book, path)
+            open(path, "wb").close()
+            self.assertRaises(ValueError, book.Book, path)
+
+    def test_main(self):
+        with TemporaryDirectory() as tmpdir:
+            pgn = os.path.join(tmpdir, "games.pgn")
+            with open(pgn, "w") as pgn_file:
+                pgn_file.write(GAMES_PGN)
+            path = os.path.join(tmpdir, "games.book")
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = book.main([path, pgn])
+            self.assertEqual(ret, 0)
+            self.assertIn("Read 2 games", out.getvalue())
+            with book.Book(path) as opening_book:
+                pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+                self.assertEqual(len(opening_book.lookup(pos)), 1)
+                self.assertEqual(opening_book.lookup(pos)[0][1:], (2, 2, 1))
+            with redirect_stdout(StringIO()):
+                self.assertEqual(book.main(["-p", "0", path, pgn]), 1)
@@ -0,0 +1,197 @@
+import os
+import random
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from pyrimaa import board, gamedb
+from pyrimaa.board import Color, Piece, Position
+
+GOLD_SETUP, SILVER_SETUP = (
+    move[2:] for move in Position(Color.GOLD, 4, board.BASIC_SETUP).to_placing_move()
+)
+
+PATTERN_PGN = f"""[Result "1-0"]
+1g {GOLD_SETUP}
+1s {SILVER_SETUP}
+2g Ee2n Ee3n Ee4w Ed4n
+2s hb7s cc7s
+1-0
+"""
+
+
+def random_games(count, seed):
+    rnd = random.Random(seed)
+    games = []
+    for _ in range(count):
+        pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+        moves = [GOLD_SETUP, SILVER_SETUP]
+        for _ in range(rnd.randrange(1, 30)):
+            steps, result = pos.get_rnd_step_move(rnd)
+            if steps is None or result.is_end_state():
+                break
+            moves.append(pos.steps_to_str(steps))
+            pos = result
+        games.append((moves, rnd.choice((Color.GOLD, Color.SILVER, None))))
+    return games
+
+
+class GameDatabaseTest(unittest.TestCase):
+    def test_parse_pattern(self):
+        pieces, gold, silver, empty = gamedb.parse_pattern("Ed5 Sc6 .d4 Ra1 Rb1 rh8")
+        self.assertEqual(
+            dict(pieces),
+            {
+                gamedb._PIECES.index(Piece.GELEPHANT): 1 << 35,
+                gamedb._PIECES.index(Piece.GRABBIT): 3,
+                gamedb._PIECES.index(Piece.SRABBIT): 1 << 63,
+            },
+        )
+        self.assertEqual((gold, silver, empty), (0, 1 << 42, 1 << 27))
+        for bad in ("Ed9", "xd5", "Ed", "Kd5", " d5"):
+            self.assertRaises(ValueError, gamedb.parse_pattern, bad)
+
+    def test_build_and_search(self):
+        games = random_games(40, 23)
+        games.append(([GOLD_SETUP, SILVER_SETUP, "Ra1n"], None))
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "test.db")
+            result = gamedb.build_database(games, path)
+            self.assertEqual(result["games"], 41)
+            self.assertEqual(result["illegal"], 1)
+            with gamedb.GameDatabase(path) as database:
+                self.assertEqual(len(database), 41)
+                for num, (moves, winner) in enumerate(games[:-1]):
+                    db_moves, db_winner = database.game(num)
+                    self.assertEqual(db_winner, winner)
+                    # setups come back with the pieces in square order
+                    self.assertEqual(db_moves[2:], moves[2:])
+                    self.assertEqual(
+                        [sorted(move.split()) for move in db_moves[:2]],
+                        [sorted(move.split()) for move in moves[:2]],
+                    )
+                    self.assertEqual(
+                        database.position(num, 2),
+                        Position(Color.GOLD, 4, board.BASIC_SETUP),
+                    )
+                self.assertEqual(len(database.game(40)[0]), 2)
+                self.assertRaises(IndexError, database.game, 41)
+
+                # every position reached is found and only where it was reached
+                reached = {}
+                for num, (moves, _) in enumerate(games):
+                    pos = Position(Color.GOLD, 4, board.BLANK_BOARD)
+                    for ply, move_str in enumerate(moves, 1):
+                        try:
+                            pos = pos.do_move_str(move_str)
+                        except board.IllegalMove:
+                            break
+                        reached.setdefault(pos, []).append((num, ply))
+                for pos, found in reached.items():
+                    self.assertEqual(database.find_position(pos), found)
+                self.assertEqual(
+                    database.find_position(
+                        Position(Color.SILVER, 4, board.BLANK_BOARD)
+                    ),
+                    [],
+                )
+
+                def matching(check, color=None):
+                    return sorted(
+                        entry
+                        for pos, found in reached.items()
+                        if (color is None or pos.color == color) and check(pos)
+                        for entry in found
+                    )
+
+                self.assertEqual(
+                    database.find_pattern("Md2 Ee2", Color.SILVER),
+                    matching(
+                        lambda pos: (
+                            pos.piece_at(1 << 11) == Piece.GCAMEL
+                            and pos.piece_at(1 << 12) == Piece.GELEPHANT
+                        ),
+                        Color.SILVER,
+                    ),
+                )
+                found = database.find_pattern("Hb2 Sd7 .c2")
+                self.assertGreater(len(found), 0)
+                self.assertEqual(
+                    found,
+                    matching(
+                        lambda pos: (
+                            pos.piece_at(1 << 9) == Piece.GHORSE
+                            and pos.placement[Color.SILVER] & (1 << 51)
+                            and pos.bitBoards[Piece.EMPTY] & (1 << 10)
+                        )
+                    ),
+                )
+
+            open(path, "wb").close()
+            self.assertRaises(ValueError, gamedb.GameDatabase, path)
+
+    def test_append(self):
+        games = random_games(30, 31)
+        run_size = gamedb._RUN_SIZE
+        # runs of a few records so the build has to merge them
+        gamedb._RUN_SIZE = 7
+        try:
+            with TemporaryDirectory() as tmpdir:
+                whole = os.path.join(tmpdir, "whole.db")
+                result = gamedb.build_database(games, whole)
+                path = os.path.join(tmpdir, "parts.db")
+                gamedb.build_database(games[:12], path)
+                gamedb.build_database([], path, append=True)
+                part = gamedb.build_database(games[12:], path, append=True)
+                self.assertEqual(part["games"], 18)
+                self.assertEqual(part["moves"], result["moves"])
+                self.assertEqual(part["positions"], result["positions"])
+                with open(whole, "rb") as whole_file, open(path, "rb") as part_file:
+                    self.assertEqual(whole_file.read(), part_file.read())
+                with gamedb.GameDatabase(path) as database:
+                    self.assertEqual(len(database), 30)
+                    self.assertEqual(database.game(20)[1], games[20][1])
+                    self.assertEqual(database.game(20)[0][2:], games[20][0][2:])
+                self.assertEqual(sorted(os.listdir(tmpdir)), ["parts.db", "whole.db"])
+                pgn_path = os.path.join(tmpdir, "games.pgn")
+                with open(pgn_path, "w") as pgn_file:
+                    pgn_file.write(PATTERN_PGN)
+                self.assertRaises(
+                    ValueError, gamedb.build_database, games, pgn_path, append=True
+                )
+        finally:
+            gamedb._RUN_SIZE = run_size
+
+    def test_main(self):
+        with TemporaryDirectory() as tmpdir:
+            pgn_path = os.path.join(tmpdir, "games.pgn")
+            with open(pgn_path, "w") as pgn_file:
+                pgn_file.write(PATTERN_PGN)
+            path = os.path.join(tmpdir, "games.db")
+            out = StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(gamedb.main(["build", path, pgn_path]), 0)
+            self.assertIn("Read 1 games", out.getvalue())
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = gamedb.main(["pattern", path, "Ed5 Sc6"])
+            self.assertEqual(ret, 0)
+            self.assertEqual(out.getvalue(), "Found 1 positions\ngame 0 at 3g\n")
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = gamedb.main(["pattern", "--side", "s", path, "Ed5"])
+            self.assertEqual(out.getvalue(), "Found 1 positions\ngame 0 at 2s\n")
+            pos_path = os.path.join(tmpdir, "pos.txt")
+            with open(pos_path, "w") as pos_file:
+                pos_file.write(
+                    "2g\n" + Position(Color.GOLD, 4, board.BASIC_SETUP).board_to_str()
+                )
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = gamedb.main(["position", path, pos_path])
+            self.assertEqual(ret, 0)
+            self.assertEqual(out.getvalue(), "Found 1 positions\ngame 0 at 2g\n")
+            with redirect_stdout(StringIO()):
+                self.assertEqual(gamedb.main(["pattern", path, "Ed9"]), 1)
+                self.assertEqual(gamedb.main(["position", pos_path, pos_path]), 1)
@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from pyrimaa import board
+from pyrimaa.mutable_board import MutablePosition
+
+TRAP_POS = """10g
+ +-----------------+
+8|                 |
+7|                 |
+6|     x     x     |
+5|                 |
+4|       R         |
+3|     r d   x     |
+2|       E         |
+1|                 |
+ +-----------------+
+   a b c d e f g h""".splitlines()
+
+
+class MutablePositionTest(unittest.TestCase):
+    def assertSamePosition(self, mpos, pos):
+        self.assertEqual(mpos.to_position(), pos)
+        self.assertEqual(mpos.zobrist, pos._zhash)
+        self.assertEqual(tuple(mpos.placement), pos.placement)
+        self.assertEqual(mpos.color, pos.color)
+        self.assertEqual(mpos.stepsLeft, pos.stepsLeft)
+        self.assertEqual(mpos.inpush, pos.inpush)
+        self.assertEqual(mpos.last_piece, pos.last_piece)
+        self.assertEqual(mpos.last_from, pos.last_from)
+        self.assertEqual(mpos.mirror_key(), pos.mirror_key())
+        mpos.check_hash()
+        mpos.check_boards()
+
+    def test_conversion(self):
+        pos = board.parse_long_pos(TRAP_POS)[1]
+        mpos = MutablePosition(pos)
+        self.assertSamePosition(mpos, pos)
+        self.assertEqual(mpos, pos)
+        self.assertEqual(mpos.board_to_str(), pos.board_to_str())
+        self.assertEqual(list(mpos.iter_steps()), list(pos.iter_steps()))
+        self.assertRaises(TypeError, hash, mpos)
+        copy = mpos.to_position()
+        mpos.make_step((board.alg_to_index("d2"), board.alg_to_index("e2")))
+        self.assertEqual(copy, pos)
+
+    def test_make_unmake(self):
+        pos = board.parse_long_pos(TRAP_POS)[1]
+        mpos = MutablePosition(pos)
+        start = mpos.to_position()
+        # pushing the silver dog away captures the rabbit on c3
+        step = (board.alg_to_index("d3"), board.alg_to_index("e3"))
+        mpos.make_step(step)
+        npos = pos.do_step(step)
+        self.assertSamePosition(mpos, npos)
+        self.assertEqual(
+            mpos.piece_at(1 << board.alg_to_index("c3")), board.Piece.EMPTY
+        )
+        step = (board.alg_to_index("d2"), board.alg_to_index("d3"))
+        mpos.make_step(step)
+        npos = npos.do_step(step)
+        self.assertSamePosition(mpos, npos)
+        mpos.make_null_move()
+        self.assertSamePosition(mpos, npos.get_null_move())
+        mpos.unmake_move(3)
+        self.assertSamePosition(mpos, start)
+        self.assertEqual(mpos.history, [])
+
+    def test_random_walk(self):
+        rnd = random.Random(1208)
+        pos = board.Position(board.Color.GOLD, 4, board.BLANK_BOARD)
+        pos = pos.do_move_str(
+            "Ra1 Rb1 Rc1 Rd1 Re1 Rf1 Rg1 Rh1 Ha2 Db2 Cc2 Md2 Ee2 Cf2 Dg2 Hh2"
+        )
+        pos = pos.do_move_str(
+            "ra8 rb8 rc8 rd8 re8 rf8 rg8 rh8 ha7 db7 cc7 ed7 me7 cf7 dg7 hh7"
+        )
+        mpos = MutablePosition(pos)
+        positions = [pos]
+        for _ in range(400):
+            if mpos.is_end_state():
+                break
+            steps = pos.get_steps()
+            step, npos = rnd.choice(steps)
+            if rnd.random() < 0.1 and pos.stepsLeft < 4 and not pos.inpush:
+                mpos.make_null_move()
+                npos = pos.get_null_move()
+            else:
+                mpos.make_step(step)
+            pos = npos
+            positions.append(pos)
+            self.assertSamePosition(mpos, pos)
+        self.assertEqual(mpos.is_end_state(), pos.is_end_state())
+        while mpos.history:
+            mpos.unmake_step()
+            positions.pop()
+            self.assertSamePosition(mpos, positions[-1])
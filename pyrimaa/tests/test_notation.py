@@ -0,0 +1,108 @@
+import random
+import unittest
+
+from pyrimaa import board, notation
+from pyrimaa.board import Color, IllegalMove, Piece, Position
+from pyrimaa.notation import MoveKind
+
+
+class NotationTest(unittest.TestCase):
+    def test_decode_move(self):
+        self.assertEqual(
+            notation.decode_move("Ea1n Eb2w Cc3x Ea2n"),
+            (MoveKind.STEPS, ((0, 8), (9, 8), (8, 16))),
+        )
+        self.assertEqual(
+            notation.decode_move("Ra1 cc7 Eh8"),
+            (
+                MoveKind.SETUP,
+                ((Piece.GRABBIT, 0), (Piece.SCAT, 50), (Piece.GELEPHANT, 63)),
+            ),
+        )
+        self.assertEqual(notation.move_kind("rh7s rh6x"), MoveKind.STEPS)
+        self.assertEqual(notation.move_kind("Ra1"), MoveKind.SETUP)
+        self.assertRaises(ValueError, notation.decode_move, " ")
+        self.assertRaises(ValueError, notation.decode_move, "Ed4d")
+        self.assertRaises(ValueError, notation.decode_move, "Ea1s")
+        self.assertRaises(ValueError, notation.decode_move, "Eh1e")
+        self.assertRaises(ValueError, notation.decode_move, "Xa1n")
+        self.assertRaises(IllegalMove, notation.decode_move, "Ra1 Ra2n")
+        self.assertRaises(IllegalMove, notation.decode_move, "Ra2n Ra1")
+        self.assertRaises(IllegalMove, notation.decode_move, "Ra1 Cc3x")
+        self.assertRaises(ValueError, notation.decode_steps, "Ra1 Rb1")
+        self.assertEqual(notation.decode_steps("Ea1n"), [(0, 8)])
+        self.assertEqual(
+            notation.decode_moves(["Ea1n", "Ra1"]),
+            [(MoveKind.STEPS, ((0, 8),)), (MoveKind.SETUP, ((Piece.GRABBIT, 0),))],
+        )
+
+    def test_encode_setup(self):
+        pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+        for setup in pos.to_placing_move():
+            setup = setup[2:]
+            kind, placements = notation.decode_move(setup)
+            self.assertEqual(kind, MoveKind.SETUP)
+            self.assertEqual(notation.encode_setup(placements), setup)
+        blank = Position(Color.GOLD, 4, board.BLANK_BOARD)
+        gold, silver = pos.to_placing_move()
+        setup_pos = blank.do_move_str(gold[2:]).do_move_str(silver[2:])
+        self.assertEqual(setup_pos.bitBoards, pos.bitBoards)
+
+    def test_encode_random_games(self):
+        random.seed(1016)
+        captures = 0
+        for _ in range(10):
+            pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+            for _ in range(100):
+                if pos.is_end_state():
+                    break
+                moves = [pos.get_rnd_step_move() for _ in range(10)]
+                move_strs = notation.encode_moves(pos, [steps for steps, _ in moves])
+                for (steps, result), move_str in zip(moves, move_strs):
+                    self.assertEqual(notation.encode_steps(pos, steps), move_str)
+                    self.assertEqual(notation.decode_steps(move_str), list(steps))
+                    self.assertEqual(pos.do_move_str(move_str), result)
+                    captures += move_str.count("x")
+                pos = result
+        self.assertGreater(captures, 0)
+
+    def test_pack_move(self):
+        pos = Position(Color.GOLD, 4, board.BASIC_SETUP)
+        for color, setup in enumerate(pos.to_placing_move()):
+            kind, placements = notation.decode_move(setup[2:])
+            code = notation.pack_move(color, kind, placements)
+            self.assertTrue(code & notation.SETUP_FLAG)
+            self.assertEqual(
+                notation.unpack_move(color, code),
+                (MoveKind.SETUP, tuple(sorted(placements, key=lambda p: p[1]))),
+            )
+            mirrored = notation.unpack_move(color, code, flip=7)[1]
+            self.assertEqual(
+                sorted(ix ^ 7 for _, ix in mirrored), sorted(ix for _, ix in placements)
+            )
+        steps = ((8, 16), (63, 55), (0, 1), (30, 31))
+        for flip in (0, 7):
+            code = notation.pack_move(Color.SILVER, MoveKind.STEPS, steps, flip)
+            self.assertFalse(code & notation.SETUP_FLAG)
+            self.assertEqual(
+                notation.unpack_move(Color.SILVER, code, flip), (MoveKind.STEPS, steps)
+            )
+        code = notation.pack_move(Color.GOLD, MoveKind.STEPS, steps[:1], 7)
+        self.assertEqual(
+            notation.unpack_move(Color.GOLD, code), (MoveKind.STEPS, ((15, 23),))
+        )
+        self.assertRaises(
+            ValueError, notation.pack_move, Color.GOLD, MoveKind.STEPS, steps * 2
+        )
+        # the steps of a move code are packed the same as in a MoveSet
+        self.assertEqual(
+            code & 0xFFFF, board.pack_step((steps[0][0] ^ 7, steps[0][1] ^ 7))
+        )
+        for color, ix in ((Color.GOLD, 21), (Color.GOLD, 63), (Color.SILVER, 47)):
+            self.assertRaises(
+                ValueError,
+                notation.pack_move,
+                color,
+                MoveKind.SETUP,
+                ((Piece.GRABBIT | color * Piece.COLOR, ix),),
+            )
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from pyrimaa import board, perft
+
+SHORT_POS = """1g
+[rrrrrrrrdhcemchd                                DHCMECHDRRRRRRRR]
+"""
+
+
+class PerftTest(unittest.TestCase):
+    def test_perft(self):
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        self.assertEqual(perft.perft(pos, 1), (3353, 16440))
+        results = perft.run_perft(pos, 1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["depth"], 1)
+        self.assertEqual(results[0]["moves"], 3353)
+        self.assertEqual(results[0]["nodes"], 16440)
+        moves, nodes = perft.perft(pos, 1, canonical=True)
+        self.assertEqual(moves, 3353)
+        self.assertLess(nodes, 16440)
+        results = perft.compare_perft(pos, 1)
+        self.assertEqual(results[0]["moves"], 3353)
+        self.assertEqual(results[0]["standard"]["nodes"], 16440)
+        self.assertGreater(results[0]["speedup"], 0)
+
+    def test_divide(self):
+        pos = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        moves, nodes, counts = perft.divide(pos, 2)
+        self.assertEqual(moves, 3353)
+        self.assertEqual([step for step, _ in counts], [s for s, _ in pos.get_steps()])
+        self.assertEqual(perft.divide(pos, 2, canonical=True)[0], 3353)
+        # start part way through a turn where stepping back ends up at the
+        # position the turn started from
+        mid_turn = pos.do_step((board.alg_to_index("d2"), board.alg_to_index("d3")))
+        mid_turn = mid_turn.do_step(
+            (board.alg_to_index("e2"), board.alg_to_index("e3"))
+        )
+        self.assertEqual(perft.divide(mid_turn, 2)[0], perft.perft(mid_turn, 1)[0])
+        # with one step left every first step finishes the turn
+        last_step = mid_turn.do_step(
+            (board.alg_to_index("c2"), board.alg_to_index("c3"))
+        )
+        self.assertEqual(last_step.stepsLeft, 1)
+        self.assertEqual(perft.divide(last_step, 2)[0], len(last_step.get_moves()))
+        self.assertEqual(perft.divide(last_step, 2)[0], perft.perft(last_step, 1)[0])
+        small = board.parse_short_pos(
+            board.Color.GOLD,
+            4,
+            "["
+            + " " * 15
+            + "r"
+            + " " * 20
+            + "e"
+            + " " * 4
+            + "E"
+            + " " * 13
+            + "R"
+            + " " * 7
+            + "]",
+        )
+        self.assertEqual(perft.parallel_perft(small, 2, 2), perft.perft(small, 2))
+        results = perft.run_perft(small, 2, workers=2)
+        self.assertEqual(results[1]["moves"], perft.perft(small, 2)[0])
+        self.assertEqual(results[1]["workers"], 2)
+
+    def test_main(self):
+        with NamedTemporaryFile("w", suffix=".txt", delete=False) as pfile:
+            pfile.write(SHORT_POS)
+        try:
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = perft.main(["--json", pfile.name])
+            self.assertEqual(ret, 0)
+            report = json.loads(out.getvalue())
+            self.assertEqual(report["python"].split(".")[0], str(sys.version_info[0]))
+            self.assertEqual(len(report["positions"]), 1)
+            result = report["positions"][0]["results"][0]
+            self.assertEqual(result["moves"], 3353)
+            self.assertEqual(result["nodes"], 16440)
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = perft.main(["--compare", pfile.name])
+            self.assertEqual(ret, 0)
+            self.assertIn("speedup", out.getvalue())
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = perft.main(["--json", "--divide", "-j", "2", pfile.name])
+            self.assertEqual(ret, 0)
+            result = json.loads(out.getvalue())["positions"][0]["results"][0]
+            self.assertEqual(result["moves"], 3353)
+            self.assertIn("Ee2n", [entry["step"] for entry in result["divide"]])
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = perft.main(["--depth", "0", pfile.name])
+            self.assertEqual(ret, 1)
+            with redirect_stdout(out):
+                ret = perft.main(["--divide", "--depth", "2", pfile.name])
+            self.assertEqual(ret, 1)
+        finally:
+            os.remove(pfile.name)
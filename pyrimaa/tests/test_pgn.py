@@ -0,0 +1,71 @@
+import unittest
+from io import StringIO
+
+from pyrimaa import pgn
+from pyrimaa.board import Color
+
+GAMES_PGN = """[White "bot1"]
+[Black "bot2"]
+[PlyCount "3"]
+[Result "1-0"]
+
+1g Ra1 Rb1 Rc1 Rd1 Re1 Rf1 Rg1 Rh1 Da2 Hb2 Cc2 Md2 Ee2 Cf2 Hg2 Dh2
+1s ra8 rb8 rc8 rd8 re8 rf8 rg8 rh8 da7 hb7 cc7 ed7 me7 cf7 hg7 dh7
+2g Da2n Da3n
+2s
+1-0
+
+[White "bot2"]
+[Black "bot1"]
+1g Ra1 Rb1 Rc1 Rd1 Re1 Rf1 Rg1 Rh1 Da2 Hb2 Cc2 Md2 Ee2 Cf2 Hg2 Dh2
+
+[White "bot3"]
+1g Ra1 Rb1 Rc1 Rd1 Re1 Rf1 Rg1 Rh1 Da2 Hb2 Cc2 Md2 Ee2 Cf2 Hg2 Dh2
+0-1
+"""
+
+
+class PGNTest(unittest.TestCase):
+    def test_read_games(self):
+        games = list(pgn.read_games(GAMES_PGN.splitlines()))
+        self.assertEqual(len(games), 3)
+        tags, moves = games[0]
+        self.assertEqual(
+            tags, {"White": "bot1", "Black": "bot2", "PlyCount": "3", "Result": "1-0"}
+        )
+        self.assertEqual(len(moves), 3)
+        self.assertEqual(moves[2], "Da2n Da3n")
+        self.assertEqual(pgn.winner(tags), Color.GOLD)
+        self.assertEqual(games[1][0], {"White": "bot2", "Black": "bot1"})
+        self.assertIsNone(pgn.winner(games[1][0]))
+        self.assertEqual(games[2][0], {"White": "bot3", "Result": "0-1"})
+        self.assertEqual(
+            [winner for _, winner in pgn.read_results(GAMES_PGN.splitlines())],
+            [Color.GOLD, None, Color.SILVER],
+        )
+        self.assertEqual(list(pgn.read_games([])), [])
+
+    def test_read_records_and_write_game(self):
+        records = list(pgn.read_records(GAMES_PGN.splitlines()))
+        tags, moves = records[0]
+        self.assertEqual(
+            tags,
+            [
+                ("White", "bot1"),
+                ("Black", "bot2"),
+                ("PlyCount", "3"),
+                ("Result", "1-0"),
+            ],
+        )
+        self.assertEqual(moves[2], "2g Da2n Da3n")
+        self.assertEqual(records[2][0], [("White", "bot3"), ("Result", "0-1")])
+        out = StringIO()
+        pgn.write_game(out, tags, moves)
+        self.assertEqual(
+            out.getvalue(), GAMES_PGN[: GAMES_PGN.index("2s\n")] + "1-0\n\n"
+        )
+        out = StringIO()
+        pgn.write_game(out, *records[1])
+        self.assertEqual(
+            list(pgn.read_records(out.getvalue().splitlines())), records[1:2]
+        )
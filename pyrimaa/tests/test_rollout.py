@@ -0,0 +1,75 @@
+import json
+import os
+import random
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from pyrimaa import board, rollout
+from pyrimaa.board import Color
+
+IMMOBILIZED_POS = """12g
+ +-----------------+
+8| r r r r r r r r |
+7|                 |
+6|     X     X     |
+5|                 |
+4|                 |
+3|     X     X     |
+2| d d d d d d d d |
+1| R R R R R R R R |
+ +-----------------+
+   a b c d e f g h"""
+
+
+class RolloutTest(unittest.TestCase):
+    def test_playout(self):
+        pos = board.Position(Color.GOLD, 4, board.BASIC_SETUP)
+        winner, reason, turns = rollout.playout(pos, random.Random(18))
+        self.assertIn(winner, (Color.GOLD, Color.SILVER))
+        self.assertIn(reason, ("g", "e", "m"))
+        self.assertGreater(turns, 0)
+        self.assertEqual(rollout.playout(pos, 4, max_turns=2), (None, None, 2))
+        pos = board.parse_long_pos(IMMOBILIZED_POS.splitlines())[1]
+        self.assertEqual(rollout.playout(pos, 1), (Color.SILVER, "m", 0))
+
+    def test_rollout(self):
+        pos = board.Position(Color.GOLD, 4, board.BASIC_SETUP)
+        result = rollout.rollout(pos, 40, workers=1, seed=5, max_turns=30)
+        self.assertEqual(result["playouts"], 40)
+        self.assertEqual(
+            result["gold_wins"] + result["silver_wins"] + result["unfinished"], 40
+        )
+        self.assertEqual(
+            result["goal"] + result["elimination"] + result["immobilization"],
+            result["gold_wins"] + result["silver_wins"],
+        )
+        self.assertAlmostEqual(result["gold_win_rate"], result["gold_wins"] / 40)
+        self.assertGreater(result["playouts_per_second"], 0)
+        parallel = rollout.rollout(pos, 40, workers=2, seed=5, max_turns=30)
+        self.assertEqual(parallel["workers"], 2)
+        for key in ("gold_wins", "silver_wins", "unfinished", "goal", "average_turns"):
+            self.assertEqual(parallel[key], result[key], key)
+
+    def test_main(self):
+        with NamedTemporaryFile("w", suffix=".txt", delete=False) as pfile:
+            pfile.write(IMMOBILIZED_POS)
+        try:
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = rollout.main(["--json", "-n", "3", "-j", "1", pfile.name])
+            self.assertEqual(ret, 0)
+            report = json.loads(out.getvalue())
+            self.assertEqual(report["move"], "12g")
+            self.assertEqual(report["results"]["silver_wins"], 3)
+            self.assertEqual(report["results"]["immobilization"], 3)
+            out = StringIO()
+            with redirect_stdout(out):
+                ret = rollout.main(["-n", "2", "--seed", "1", pfile.name])
+            self.assertEqual(ret, 0)
+            self.assertIn("2 by immobilization", out.getvalue())
+            with redirect_stdout(StringIO()):
+                self.assertEqual(rollout.main(["-n", "0", pfile.name]), 1)
+        finally:
+            os.remove(pfile.name)
@@ -1,9 +1,11 @@
+import os
 import re
 import unittest
 from queue import Empty, Queue
 from subprocess import PIPE, STDOUT, Popen
+from tempfile import TemporaryDirectory
 
-from pyrimaa import simple_engine
+from pyrimaa import board, book, simple_engine
 
 
 class MockController:
@@ -138,6 +140,39 @@ class EngineTest(unittest.TestCase):
             len(ctl.eng_messages), len(expected), "Unexpected number of responses"
         )
 
+    def test_book(self):
+        gold_setup = "Ra1 Rb1 Rc1 Rd1 Re1 Rf1 Rg1 Rh1 Ha2 Db2 Cc2 Md2 Ee2 Cf2 Dg2 Hh2"
+        silver_setup = "ra8 rb8 rc8 rd8 re8 rf8 rg8 rh8 ha7 db7 cc7 ed7 me7 cf7 dg7 hh7"
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "test.book")
+            book.build_book([([gold_setup, silver_setup], None)], path)
+            ctl = MockController()
+            send = [
+                "aei",
+                "setoption name book value " + os.path.join(tmpdir, "missing"),
+                f"setoption name book value {path}",
+                "go",
+                f"makemove {gold_setup}",
+                "go",
+                "setoption name book value",
+                "go",
+                "quit",
+            ]
+            for msg in send:
+                ctl.messages.put(msg)
+            eng = simple_engine.AEIEngine(ctl)
+            eng.main()
+        self.assertIsNone(eng.book)
+        self.assertTrue(ctl.eng_messages[4].startswith("log Warning:"))
+        bestmoves = [msg[9:] for msg in ctl.eng_messages if msg.startswith("bestmove")]
+        self.assertEqual(len(bestmoves), 3)
+        pos = board.Position(board.Color.GOLD, 4, board.BLANK_BOARD)
+        self.assertEqual(pos.do_move_str(bestmoves[0]), pos.do_move_str(gold_setup))
+        pos = pos.do_move_str(gold_setup)
+        self.assertEqual(pos.do_move_str(bestmoves[1]), pos.do_move_str(silver_setup))
+        basic = board.Position(board.Color.GOLD, 4, board.BASIC_SETUP)
+        self.assertEqual(bestmoves[2], basic.to_placing_move()[1][2:])
+
     def test_script(self):
         cmdline = "python -m pyrimaa.simple_engine"
         proc = Popen(cmdline.split(), stdin=PIPE, stdout=PIPE, stderr=STDOUT)
@@ -0,0 +1,72 @@
+import unittest
+
+from pyrimaa import board, solver
+from pyrimaa.board import Color
+
+# gold rabbit five ranks from goal, silver can't stop it over two moves
+RABBIT_RACE = "[       r       e                        R                  E    ]"
+
+# gold can push the last silver rabbit into the trap at c3
+ELIMINATION = "[                                  rE          e         R       ]"
+
+
+def attacker_wins(pos):
+    """Brute force check for a win with the next move"""
+    mover = 1 if pos.color == Color.GOLD else -1
+    return any(move.is_end_state() == mover for move in pos.get_moves())
+
+
+class SolverTest(unittest.TestCase):
+    def test_solve(self):
+        pos = board.parse_short_pos(Color.GOLD, 4, ELIMINATION)
+        result = solver.Solver().solve(pos, 1)
+        self.assertEqual(result["result"], solver.WIN)
+        self.assertEqual(pos.do_move(result["move"]).is_end_state(), 1)
+
+        pos = board.parse_short_pos(Color.GOLD, 4, RABBIT_RACE)
+        search = solver.Solver()
+        result = search.solve(pos, 1)
+        self.assertEqual(result["result"], solver.LOSS)
+        self.assertFalse(attacker_wins(pos))
+        self.assertGreater(result["nodes"], 0)
+        self.assertGreater(result["nps"], 0)
+        result = search.solve(pos, 2)
+        self.assertEqual(result["result"], solver.WIN)
+        self.assertIsNotNone(result["move"])
+        # every reply leaves gold a win next move
+        after = pos.do_move(result["move"])
+        for reply in after.get_moves():
+            self.assertTrue(reply.get_goal_move() or attacker_wins(reply))
+
+    def test_depth_one(self):
+        # with one move the attacker's moves are only checked for a win
+        for pos in (
+            board.parse_short_pos(Color.GOLD, 4, RABBIT_RACE),
+            board.Position(Color.GOLD, 4, board.BASIC_SETUP),
+        ):
+            result = solver.Solver().solve(pos, 1)
+            self.assertEqual(result["result"], solver.LOSS)
+            self.assertLessEqual(result["nodes"], len(pos.get_moves()) + 1)
+
+    def test_limits(self):
+        pos = board.parse_short_pos(Color.GOLD, 4, RABBIT_RACE)
+        result = solver.Solver(max_nodes=10).solve(pos, 2)
+        self.assertEqual(result["result"], solver.UNKNOWN)
+        self.assertLessEqual(result["nodes"], 11)
+        result = solver.Solver(max_time=0).solve(pos, 2)
+        self.assertEqual(result["result"], solver.UNKNOWN)
+        search = solver.Solver(max_entries=100)
+        self.assertEqual(search.solve(pos, 2)["result"], solver.WIN)
+        self.assertLessEqual(len(search.table), 100)
+
+    def test_table(self):
+        table = solver.TranspositionTable(2)
+        table.store(1, 1, 1)
+        table.store(2, 0, solver.INFINITY)
+        table.store(1, 2, 3)
+        table.store(3, 1, 1)
+        self.assertIsNone(table.get(2))
+        self.assertEqual(table.get(1), (2, 3))
+        self.assertEqual(len(table), 2)
+        table.clear()
+        self.assertEqual(len(table), 0)
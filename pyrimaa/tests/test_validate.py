@@ -0,0 +1,116 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from pyrimaa import board, validate
+from pyrimaa.board import Color, Position
+
+GOLD_SETUP, SILVER_SETUP = (
+    move[2:] for move in Position(Color.GOLD, 4, board.BASIC_SETUP).to_placing_move()
+)
+
+LEGAL = [GOLD_SETUP, SILVER_SETUP, "Ee2n Ee3n", "ed7s ed6s", "Ee4s Ee3s", "ed5n ed6n"]
+# the same position a third time
+REPEATED = LEGAL + ["Ee2n Ee3n", "ed7s ed6s", "Ee4s Ee3s", "ed5n ed6n"]
+# steps from an empty square at ply 3
+EMPTY_STEP = [GOLD_SETUP, SILVER_SETUP, "Ee3n"]
+# the elephant steps out and back
+UNCHANGED = [GOLD_SETUP, SILVER_SETUP, "Ee2n Ee3s"]
+BAD_SETUP = [GOLD_SETUP[4:]]
+
+
+def to_pgn(games):
+    lines = []
+    for moves in games:
+        lines.append('[Result "1-0"]')
+        lines.append("")
+        for ply, move in enumerate(moves):
+            lines.append(f"{ply // 2 + 1}{'gs'[ply % 2]} {move}")
+        lines.append("1-0")
+        lines.append("")
+    return "\n".join(lines)
+
+
+class ValidateTest(unittest.TestCase):
+    def test_validate_game(self):
+        self.assertIsNone(validate.validate_game(LEGAL))
+        self.assertIsNone(validate.validate_game(LEGAL + LEGAL[2:4]))
+        self.assertEqual(validate.validate_game(REPEATED)[0], 10)
+        self.assertIn("3rd time repetition", validate.validate_game(REPEATED)[1])
+        self.assertEqual(validate.validate_game(EMPTY_STEP)[0], 3)
+        self.assertEqual(validate.validate_game(UNCHANGED)[0], 3)
+        self.assertIn("did not change", validate.validate_game(UNCHANGED)[1])
+        self.assertEqual(validate.validate_game(BAD_SETUP)[0], 1)
+        self.assertEqual(validate.validate_game([GOLD_SETUP, "Xa1"])[0], 2)
+
+    def test_validate_files(self):
+        games = [LEGAL] * 150 + [EMPTY_STEP, UNCHANGED] + [LEGAL] * 10 + [REPEATED]
+        text = to_pgn(games)
+        with TemporaryDirectory() as tmpdir:
+            paths = [os.path.join(tmpdir, "games.pgn")]
+            with open(paths[0], "w") as pgn_file:
+                pgn_file.write(text)
+            for ext, opener in (
+                (".gz", gzip.open),
+                (".bz2", bz2.open),
+                (".xz", lzma.open),
+            ):
+                paths.append(os.path.join(tmpdir, "games.pgn" + ext))
+                with opener(paths[-1], "wt") as pgn_file:
+                    pgn_file.write(text)
+            for path in paths:
+                with validate.open_archive(path) as archive:
+                    self.assertEqual(archive.read(), text)
+            result = validate.validate_files(paths, workers=1)
+            self.assertEqual(result["games"], 4 * len(games))
+            self.assertEqual(result["invalid_games"], 12)
+            self.assertEqual(result["moves"], 4 * sum(len(moves) for moves in games))
+            self.assertGreater(result["moves_per_second"], 0)
+            error = result["errors"][0]
+            self.assertEqual(
+                (error["file"], error["game"], error["ply"], error["move"]),
+                (paths[0], 151, 3, "Ee3n"),
+            )
+            self.assertEqual(
+                [(error["game"], error["ply"]) for error in result["errors"][:3]],
+                [(151, 3), (152, 3), (163, 10)],
+            )
+            parallel = validate.validate_files(paths[:2], workers=2)
+            self.assertEqual(parallel["workers"], 2)
+            self.assertEqual(parallel["errors"], result["errors"][:6])
+
+    def test_main(self):
+        with TemporaryDirectory() as tmpdir:
+            good = os.path.join(tmpdir, "good.pgn.gz")
+            with gzip.open(good, "wt") as pgn_file:
+                pgn_file.write(to_pgn([LEGAL, LEGAL]))
+            bad = os.path.join(tmpdir, "bad.pgn")
+            with open(bad, "w") as pgn_file:
+                pgn_file.write(to_pgn([LEGAL, UNCHANGED]))
+            out = StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(validate.main(["-j", "1", good]), 0)
+            self.assertIn("Checked 2 games and 12 moves", out.getvalue())
+            out = StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(validate.main(["-j", "1", good, bad]), 1)
+            self.assertIn(f"{bad} game 2 ply 3 (2g Ee2n Ee3s): Tried", out.getvalue())
+            out = StringIO()
+            with redirect_stdout(out):
+                validate.main(["-j", "1", "--json", bad])
+            report = json.loads(out.getvalue())
+            self.assertEqual(report["results"]["games"], 2)
+            self.assertEqual(report["results"]["errors"][0]["game"], 2)
+            with redirect_stdout(StringIO()):
+                self.assertEqual(validate.main(["-j", "0", good]), 1)
+                self.assertEqual(validate.main([os.path.join(tmpdir, "none")]), 1)
+            with open(good + ".xz", "wb") as bad_archive:
+                bad_archive.write(b"not xz data")
+            with redirect_stdout(StringIO()):
+                self.assertEqual(validate.main([good + ".xz"]), 1)
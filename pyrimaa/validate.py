@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""Check that archives of game records replay legally
+
+Games are read from PGN files, such as those written by roundrobin --pgn,
+as they are needed and checked in batches by worker processes. Files ending
+in .gz, .bz2 or .xz are decompressed as they are read.
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pyrimaa import pgn
+from pyrimaa.board import BLANK_BOARD, Color, IllegalMove, Position
+
+# games checked by each task given to a worker process
+BATCH_SIZE = 64
+
+_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def open_archive(path):
+    """Open a file of game records as text, decompressing it if needed"""
+    opener = _OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    return opener(path, "rt")
+
+
+def validate_game(moves):
+    """Replay the moves of a game from the setup with full legality checks
+
+    Besides the checks of do_move_str a move has to change the board and
+    can not repeat a position a third time, the same as pyrimaa.game.
+
+    Returns None when every move is legal, otherwise a (ply, message) tuple
+    for the first illegal move with ply counting the moves from 1.
+    """
+    pos = Position(Color.GOLD, 4, BLANK_BOARD)
+    seen = {}
+    for ply, move_str in enumerate(moves, 1):
+        try:
+            result = pos.do_move_str(move_str, strict_checks=True)
+        except (IllegalMove, ValueError) as exc:
+            return (ply, str(exc))
+        if result.bitBoards == pos.bitBoards:
+            return (ply, "Tried move that did not change the position")
+        count = seen.get(result, 0) + 1
+        if count > 2:
+            return (ply, "Tried move resulting in a 3rd time repetition")
+        seen[result] = count
+        pos = result
+    return None
+
+
+def _validate_batch(games):
+    """Validate a list of games
+
+    Returns the number of moves checked and a (game index, ply, message)
+    tuple for each game with an illegal move.
+    """
+    moves = 0
+    errors = []
+    for num, game_moves in enumerate(games):
+        error = validate_game(game_moves)
+        if error is None:
+            moves += len(game_moves)
+        else:
+            moves += error[0]
+            errors.append((num,) + error)
+    return (moves, errors)
+
+
+def _read_batches(paths):
+    """Yield (path, number of the first game, games) batches from files"""
+    for path in paths:
+        with open_archive(path) as archive:
+            games = []
+            first = 1
+            for _, moves in pgn.read_games(archive):
+                games.append(moves)
+                if len(games) == BATCH_SIZE:
+                    yield (path, first, games)
+                    first += len(games)
+                    games = []
+            if games:
+                yield (path, first, games)
+
+
+def validate_files(paths, workers=None):
+    """Validate every game in a list of files
+
+    Batches of BATCH_SIZE games are checked by at most workers processes,
+    one per CPU by default, and with a workers of 1 everything runs in this
+    process. Only a few batches per worker are read ahead so files of any
+    size can be checked.
+
+    Returns a dictionary with the games and moves checked, the seconds
+    taken, games and moves per second and a list of errors. Each error is a
+    dictionary of the file, game number in the file counting from 1, ply,
+    move and error message.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    totals = [0, 0]
+    errors = []
+
+    def collect(batch, result):
+        path, first, games = batch
+        moves, batch_errors = result
+        totals[0] += len(games)
+        totals[1] += moves
+        for num, ply, message in batch_errors:
+            errors.append(
+                {
+                    "file": path,
+                    "game": first + num,
+                    "ply": ply,
+                    "move": games[num][ply - 1],
+                    "error": message,
+                }
+            )
+
+    start_time = time.perf_counter()
+    if workers == 1:
+        for batch in _read_batches(paths):
+            collect(batch, _validate_batch(batch[2]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for batch in _read_batches(paths):
+                pending.append((batch, executor.submit(_validate_batch, batch[2])))
+                if len(pending) >= workers * 4:
+                    batch, future = pending.popleft()
+                    collect(batch, future.result())
+            while pending:
+                batch, future = pending.popleft()
+                collect(batch, future.result())
+    elapsed = time.perf_counter() - start_time
+    games, moves = totals
+    return {
+        "files": len(paths),
+        "workers": workers,
+        "games": games,
+        "moves": moves,
+        "invalid_games": len(errors),
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed > 0 else 0.0,
+        "moves_per_second": moves / elapsed if elapsed > 0 else 0.0,
+        "errors": errors,
+    }
+
+
+def main(args=None):
+    """Main entry point
+
+    Checks the games in the given files and reports any illegal moves.
+    Returns 1 if an illegal move was found.
+    """
+    parser = ArgumentParser(description="Check that archives of games replay legally")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes to check with, defaults to the number of CPUs",
+    )
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument(
+        "files", nargs="+", help="PGN files of games, optionally .gz, .bz2 or .xz"
+    )
+    config = parser.parse_args(args)
+    if config.jobs is not None and config.jobs < 1:
+        print("Jobs must be at least 1")
+        return 1
+
+    try:
+        result = validate_files(config.files, config.jobs)
+    except (OSError, EOFError, lzma.LZMAError) as exc:
+        print(f"Could not read games: {exc}")
+        return 1
+    if config.json:
+        report = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "files": config.files,
+            "results": result,
+        }
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for error in result["errors"]:
+            ply = error["ply"]
+            print(
+                f"{error['file']} game {error['game']} ply {ply} "
+                f"({(ply - 1) // 2 + 1}{'gs'[(ply - 1) % 2]} {error['move']}): "
+                f"{error['error']}"
+            )
+        print(
+            f"Checked {result['games']} games and {result['moves']} moves in "
+            f"{result['seconds']:.3f}s with {result['workers']} workers"
+        )
+        print(
+            f"  {result['games_per_second']:.1f} games/s "
+            f"{result['moves_per_second']:.1f} moves/s"
+        )
+        print(f"  {result['invalid_games']} games with illegal moves")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())